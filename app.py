@@ -1,8 +1,13 @@
-from flask import Flask, render_template, request, redirect, url_for, make_response, abort, session, after_this_request, jsonify
-from detailsSeatAvailability import main as detailsSeatAvailability, sort_seat_number
+from flask import Flask, render_template as flask_render_template, request, redirect, url_for, make_response, abort, session, after_this_request, jsonify, Response, stream_with_context, g
+from detailsSeatAvailability import main as detailsSeatAvailability, configure_http, get_connection_stats, configure_seat_layout_cache, get_seat_layout_cache_stats, get_coalescing_stats, configure_circuit_breaker, get_circuit_breaker_stats, UPSTREAM_BREAKER, configure_rate_limiter, get_rate_limiter_stats, iter_train_results, search_train_results, search_dates, SEAT_CLASSES, search_shared, account_layouts, train_results, iter_layout_results, is_auth_error
 from datetime import datetime, timedelta
-import requests, os, json, uuid, pytz, base64, re, logging, sys
+import requests, os, json, uuid, pytz, base64, re, logging, sys, threading, time
 from request_queue import RequestQueue
+from seat_results import compact_result
+from ttl_cache import TTLCache, SQLiteTTLCache
+from queue_backend import SQLiteQueueBackend
+from seat_delta import snapshot_result, diff_results
+from metrics import REGISTRY, PHASE_SECONDS, status_class
 
 app = Flask(__name__)
 app.secret_key = "your_secret_key"
@@ -17,7 +22,23 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-RESULT_CACHE = {}
+STREAM_KEEPALIVE_INTERVAL = 15
+QUEUE_EVENT_MIN_INTERVAL = 1
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "railway_http_request_duration_seconds",
+    "Time to produce a response, by Flask endpoint and status class.",
+    ("endpoint", "status_class")
+)
+TEMPLATE_RENDER_SECONDS = REGISTRY.histogram(
+    "railway_template_render_seconds",
+    "Time spent rendering each Jinja template.",
+    ("template",)
+)
+
+def render_template(template_name, **context):
+    with TEMPLATE_RENDER_SECONDS.time(template_name):
+        return flask_render_template(template_name, **context)
 
 def is_android_device():
     # user_agent = request.headers.get('User-Agent', '').lower()
@@ -149,23 +170,93 @@ if os.path.exists(mobile_instruction_image_path):
 with open('stations_en.json', 'r', encoding='utf-8') as stations_file:
     STATIONS_DATA = json.load(stations_file).get('stations', [])
 
+QUEUE_DB_PATH = CONFIG.get("queue_db_path") or os.path.join(app.instance_path, "railway_queue.sqlite3")
+SHARED_STATE = CONFIG.get("queue_backend", "memory") == "sqlite"
+
+def create_cache(namespace, max_entries, ttl):
+    if SHARED_STATE:
+        return SQLiteTTLCache(QUEUE_DB_PATH, namespace, max_entries=max_entries, ttl=ttl)
+    return TTLCache(max_entries=max_entries, ttl=ttl)
+
 def configure_request_queue():
     max_concurrent = CONFIG.get("queue_max_concurrent", 1)
     cooldown_period = CONFIG.get("queue_cooldown_period", 3)
     batch_cleanup_threshold = CONFIG.get("queue_batch_cleanup_threshold", 10)
     cleanup_interval = CONFIG.get("queue_cleanup_interval", 30)
     heartbeat_timeout = CONFIG.get("queue_heartbeat_timeout", 90)
+    merge_limit = CONFIG.get("queue_merge_limit", 8)
+    backend = None
+    if SHARED_STATE:
+        backend = SQLiteQueueBackend(
+            QUEUE_DB_PATH,
+            poll_interval=CONFIG.get("queue_poll_interval", 0.5),
+            lease_timeout=CONFIG.get("queue_lease_timeout", 120)
+        )
     
     return RequestQueue(
         max_concurrent=max_concurrent, 
         cooldown_period=cooldown_period,
         batch_cleanup_threshold=batch_cleanup_threshold,
         cleanup_interval=cleanup_interval,
-        heartbeat_timeout=heartbeat_timeout
+        heartbeat_timeout=heartbeat_timeout,
+        circuit_breaker=UPSTREAM_BREAKER,
+        merge_limit=merge_limit,
+        backend=backend
     )
 
 request_queue = configure_request_queue()
 
+def configure_upstream_http():
+    configure_http(
+        connect_timeout=CONFIG.get("http_connect_timeout", 5),
+        read_timeout=CONFIG.get("http_read_timeout", 20),
+        pool_connections=CONFIG.get("http_pool_connections", 4),
+        pool_maxsize=CONFIG.get("http_pool_maxsize", 20),
+        stream_seat_layouts=CONFIG.get("seat_layout_streaming", False)
+    )
+
+configure_upstream_http()
+
+configure_circuit_breaker(
+    failure_threshold=CONFIG.get("circuit_failure_threshold", 5),
+    recovery_timeout=CONFIG.get("circuit_recovery_timeout", 30),
+    max_recovery_timeout=CONFIG.get("circuit_max_recovery_timeout", 300),
+    backoff_base_delay=CONFIG.get("backoff_base_delay", 0.5),
+    backoff_max_delay=CONFIG.get("backoff_max_delay", 8)
+)
+
+configure_rate_limiter(
+    backend=CONFIG.get("rate_limit_backend", "sqlite"),
+    db_path=CONFIG.get("rate_limit_db_path") or os.path.join(app.instance_path, "railway_rate_limit.sqlite3"),
+    search_rate=CONFIG.get("rate_limit_search_rate", 0),
+    search_burst=CONFIG.get("rate_limit_search_burst", 1),
+    seat_layout_rate=CONFIG.get("rate_limit_seat_layout_rate", 0),
+    seat_layout_burst=CONFIG.get("rate_limit_seat_layout_burst", 1),
+    max_wait=CONFIG.get("rate_limit_max_wait", 30)
+)
+
+configure_seat_layout_cache(
+    ttl=CONFIG.get("seat_layout_cache_ttl", 0),
+    stale_ttl=CONFIG.get("seat_layout_cache_stale_ttl", 0),
+    max_entries=CONFIG.get("seat_layout_cache_max_entries", 512)
+)
+
+STREAM_JOBS = TTLCache(max_entries=1024, ttl=300)
+QUEUE_EVENT_SLOTS = threading.BoundedSemaphore(CONFIG.get("queue_status_stream_max_connections", 32))
+STREAM_ERRORS = create_cache("stream_errors", max_entries=1024, ttl=300)
+
+REFRESH_SNAPSHOTS = create_cache(
+    "refresh_snapshots",
+    max_entries=CONFIG.get("refresh_snapshot_max_entries", 512),
+    ttl=CONFIG.get("refresh_snapshot_ttl", 900)
+)
+
+SWEEP_RESULTS = create_cache(
+    "sweep_results",
+    max_entries=CONFIG.get("sweep_result_max_entries", 64),
+    ttl=CONFIG.get("sweep_result_ttl", 600)
+)
+
 def block_android_from_route():
     blocked_routes = ['/', '/check_seats', '/queue_wait', '/show_results', '/queue_status']
     
@@ -199,6 +290,17 @@ def filter_cloudflare_requests():
     if request.path.startswith('/cdn-cgi/'):
         return '', 404
 
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.get('request_started')
+    if started is not None:
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, request.endpoint or "unmatched", status_class(response.status_code))
+    return response
+
 @app.after_request
 def add_cache_control_headers(response):
     response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, post-check=0, pre-check=0, max-age=0'
@@ -403,6 +505,8 @@ def home():
         form_values=form_values,
         min_date=min_date.strftime('%Y-%m-%d'),
         max_date=max_date.strftime('%Y-%m-%d'),
+        seat_classes=SEAT_CLASSES,
+        selected_seat_classes=get_seat_classes(form_values or {}),
         bst_midnight_utc=bst_midnight_utc,
         stations=STATIONS_DATA,
         app_version=CONFIG.get("version", "1.0.0"),
@@ -415,71 +519,183 @@ def home():
         script_js=SCRIPT_JS_CONTENT
     )
 
-def process_seat_request(origin, destination, formatted_date, form_values, auth_token, device_key):
-    try:
-        if not auth_token or not device_key:
-            return {"error": "AUTH_CREDENTIALS_REQUIRED"}
-        
-        config = {
-            'from_city': origin,
-            'to_city': destination,
-            'date_of_journey': formatted_date,
-            'seat_class': 'S_CHAIR',
-            'auth_token': auth_token,
-            'device_key': device_key
-        }
-        result = detailsSeatAvailability(config)
+def annotate_train_details(details, from_station, to_station):
+    details['from_station'] = from_station
+    details['to_station'] = to_station
+    details['journey_duration'] = calculate_journey_duration(details['departure_time'], details['arrival_time'])
+    train_has_422_error = False
+    train_error_message = None
+    for seat_type in details['seat_data']:
+        if seat_type.get("is_422") and "error_info" in seat_type:
+            train_has_422_error = True
+            error_info = seat_type["error_info"]
+            message = error_info.get("message", "")
+            error_key = error_info.get("errorKey", "")
+            if error_key == "OrderLimitExceeded" and train_error_message is None:
+                train_error_message = f"Please retry with a different account as you have reached the maximum order limit for this train on the selected day."
+            elif train_error_message is None:
+                train_error_message = "Please retry with a different account to get seat info for this train."
+        if train_error_message:
+            seat_type["error_message"] = train_error_message
+    if train_has_422_error and all(st["is_422"] for st in details['seat_data']):
+        details["all_seats_422"] = True
+    else:
+        details["all_seats_422"] = False
+
+def iter_annotated_train_results(config, events=None):
+    for event in iter_train_results(config) if events is None else events:
+        if event["event"] == "train":
+            annotate_train_details(event["details"], config['from_city'], config['to_city'])
+        yield event
+
+def collect_streamed_result(config, on_progress, events=None):
+    trains = {}
+    for event in iter_annotated_train_results(config, events):
+        on_progress(event)
+        if event["event"] == "error":
+            return {"error": event["error"]}
+        if event["event"] == "train":
+            trains[event["index"]] = (event["train"], event["details"])
+        elif event["event"] == "done" and event["all_seats_422"]:
+            return {"error": "422 error occurred for all trains"}
+    return {train: details for _, (train, details) in sorted(trains.items())}
+
+def get_seat_classes(form_values):
+    seat_classes = [seat_class for seat_class in form_values.get('seat_classes') or [] if seat_class in SEAT_CLASSES]
+    return seat_classes or CONFIG.get("seat_classes", ["S_CHAIR"])
+
+def seat_request_config(origin, destination, formatted_date, form_values, auth_token, device_key, on_progress=None):
+    seat_classes = get_seat_classes(form_values)
+    return {
+        'from_city': origin,
+        'to_city': destination,
+        'date_of_journey': formatted_date,
+        'seat_class': seat_classes[0],
+        'seat_classes': seat_classes,
+        'auth_token': auth_token,
+        'device_key': device_key,
+        'seat_layout_workers': CONFIG.get("seat_layout_workers", 1)
+    }
+
+def seat_request_result(config, form_values, result, on_progress=None, events=None):
+    if on_progress is not None:
+        result = collect_streamed_result(config, on_progress, events)
+        if "error" in result:
+            return result
+        return {"success": True, "result": compact_result(result), "form_values": form_values}
+
+    if not result or "error" in result:
+        return {"error": result.get("error", "No data received. Please try a different criteria.")}
+
+    for train, details in result.items():
+        annotate_train_details(details, config['from_city'], config['to_city'])
+
+    return {"success": True, "result": compact_result(result), "form_values": form_values}
+
+def process_seat_request(origin, destination, formatted_date, form_values, auth_token, device_key, on_progress=None):
+    with PHASE_SECONDS.time("process_seat_request"):
+        try:
+            if not auth_token or not device_key:
+                return {"error": "AUTH_CREDENTIALS_REQUIRED"}
         
-        if not result or "error" in result:
-            return {"error": result.get("error", "No data received. Please try a different criteria.")}
-
-        bst_tz = pytz.timezone('Asia/Dhaka')
-        for train, details in result.items():
-            details['from_station'] = config['from_city']
-            details['to_station'] = config['to_city']
-            details['journey_duration'] = calculate_journey_duration(details['departure_time'], details['arrival_time'])
-            train_has_422_error = False
-            train_error_message = None
-            for seat_type in details['seat_data']:
-                if seat_type.get("is_422") and "error_info" in seat_type:
-                    train_has_422_error = True
-                    error_info = seat_type["error_info"]
-                    message = error_info.get("message", "")
-                    error_key = error_info.get("errorKey", "")
-                    if error_key == "OrderLimitExceeded" and train_error_message is None:
-                        train_error_message = f"Please retry with a different account as you have reached the maximum order limit for this train on the selected day."
-                    elif train_error_message is None:
-                        train_error_message = "Please retry with a different account to get seat info for this train."
-                seat_type['grouped_seats'] = group_by_prefix(seat_type['available_seats'])
-                seat_type['grouped_booking_process'] = group_by_prefix(seat_type['booking_process_seats'])
-
-                issued_seats = []
-                for type_id in [1, 3]:
-                    if type_id in seat_type['ticket_types']:
-                        issued_seats.extend(seat_type['ticket_types'][type_id].get('seats', []))
-                issued_seats = sorted(issued_seats, key=sort_seat_number)
-                grouped_issued = group_by_prefix(issued_seats)
-                seat_type['grouped_ticket_types'] = {
-                    t: group_by_prefix(info['seats']) for t, info in seat_type.get('ticket_types', {}).items()
-                    if 'seats' in info
-                }
+            config = seat_request_config(origin, destination, formatted_date, form_values, auth_token, device_key)
+            if on_progress is not None:
+                return seat_request_result(config, form_values, None, on_progress)
+            return seat_request_result(config, form_values, detailsSeatAvailability(config))
+        except Exception as e:
+            return {"error": str(e)}
+
+def process_seat_requests(group):
+    with PHASE_SECONDS.time("process_seat_requests"):
+        results = [None if params['auth_token'] and params['device_key'] else {"error": "AUTH_CREDENTIALS_REQUIRED"} for params in group]
+        members = [index for index, result in enumerate(results) if result is None]
+        if not members:
+            return results
+
+        configs = [seat_request_config(**group[index]) for index in members]
+        try:
+            lead, train_data, layouts, auth_errors = search_shared(configs[0], [(config['auth_token'], config['device_key']) for config in configs])
+        except Exception as e:
+            for index in members:
+                results[index] = {"error": str(e)}
+            return results
+
+        for position, (index, config) in enumerate(zip(members, configs)):
+            params = group[index]
+            try:
+                if position in auth_errors:
+                    raise auth_errors[position]
+                if position == lead:
+                    own = layouts
+                else:
+                    own = account_layouts(config, train_data, layouts, config['auth_token'], config['device_key'], config['seat_layout_workers'])
+                on_progress = params.get('on_progress')
+                if on_progress is not None:
+                    results[index] = seat_request_result(config, params['form_values'], None, on_progress, iter_layout_results(train_data, own))
+                else:
+                    results[index] = seat_request_result(config, params['form_values'], train_results(train_data, own))
+            except Exception as e:
+                results[index] = {"error": str(e)}
+        return results
+
+def get_sweep_dates(formatted_date):
+    bst_tz = pytz.timezone('Asia/Dhaka')
+    last_date = datetime.now(bst_tz).replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0) + timedelta(days=10)
+    start_date = datetime.strptime(formatted_date, '%d-%b-%Y')
+    days = min((last_date - start_date).days + 1, CONFIG.get("sweep_max_days", 11))
+    return [(start_date + timedelta(days=offset)).strftime('%d-%b-%Y') for offset in range(max(1, days))]
 
-                seat_type['ticket_types']['issued_combined'] = {
-                    'label': 'Issued Tickets to Buy',
-                    'seats': issued_seats,
-                    'count': len(issued_seats),
-                    'grouped': grouped_issued
+def process_sweep_request(origin, destination, dates, form_values, auth_token, device_key):
+    with PHASE_SECONDS.time("process_sweep_request"):
+        try:
+            if not auth_token or not device_key:
+                return {"error": "AUTH_CREDENTIALS_REQUIRED"}
+
+            seat_classes = get_seat_classes(form_values)
+            config = {
+                'from_city': origin,
+                'to_city': destination,
+                'seat_class': seat_classes[0],
+                'seat_classes': seat_classes,
+                'auth_token': auth_token,
+                'device_key': device_key,
+                'seat_layout_workers': CONFIG.get("seat_layout_workers", 1)
+            }
+
+            summary = {}
+            first_error = None
+            for date, result in search_dates(config, dates, CONFIG.get("sweep_date_workers", 3)).items():
+                if "error" in result:
+                    if result["error"] == "422 error occurred for all trains":
+                        message = all_seats_422_message(result.get("details", {}))
+                    else:
+                        message = search_error_message(result["error"])
+                    first_error = first_error or message
+                    summary[date] = {"error": message}
+                    continue
+
+                journey_year = get_journey_year(date)
+                trains = dict(sorted(result.items(), key=lambda item: departure_sort_key(item[1]['departure_time'], journey_year)))
+                summary[date] = {
+                    "trains": trains,
+                    "available": sum(train["available"] for train in trains.values())
                 }
-                if train_error_message:
-                    seat_type["error_message"] = train_error_message
-            if train_has_422_error and all(st["is_422"] for st in details['seat_data']):
-                details["all_seats_422"] = True
-            else:
-                details["all_seats_422"] = False
-
-        return {"success": True, "result": result, "form_values": form_values}
-    except Exception as e:
-        return {"error": str(e)}
+
+            if all("error" in day for day in summary.values()):
+                return {"error": first_error or "No data received. Please try a different criteria."}
+
+            return {
+                "success": True,
+                "sweep": {"dates": dates, "summary": summary, "form_values": form_values},
+                "form_values": form_values
+            }
+        except Exception as e:
+            if "experiencing high traffic" in str(e) or "403" in str(e):
+                raise
+            return {"error": str(e)}
+
+request_queue.register_handler(process_seat_request, process_seat_requests)
+request_queue.register_handler(process_sweep_request)
 
 def calculate_journey_duration(departure_time, arrival_time):
     try:
@@ -497,6 +713,157 @@ def calculate_journey_duration(departure_time, arrival_time):
     except:
         return "N/A"
 
+def all_seats_422_message(details):
+    bst_tz = pytz.timezone('Asia/Dhaka')
+    for train, train_details in details.items():
+        for seat_type in train_details["seat_data"]:
+            if seat_type["is_422"] and "error_info" in seat_type:
+                error_info = seat_type["error_info"]
+                message = error_info.get("message", "")
+                error_key = error_info.get("errorKey", "")
+                if "ticket purchase for this trip will be available" in message or "East Zone" in message or "West Zone" in message:
+                    time_match = re.search(r'(\d+:\d+\s*[APMapm]+)', message)
+                    retry_time = time_match.group(1) if time_match else "8:00 AM or 2:00 PM"
+                    return f"Ticket purchasing for the selected criteria is not yet available, so seat info cannot be fetched at this moment. Please try again after {retry_time}. Alternatively, search for a different day."
+                elif "Your purchase process is on-going" in message:
+                    time_match = re.search(r'(\d+)\s*minute[s]?\s*(\d+)\s*second[s]?', message, re.IGNORECASE)
+                    minutes = int(time_match.group(1))
+                    seconds = int(time_match.group(2))
+                    total_seconds = minutes * 60 + seconds
+                    retry_time = (datetime.now(bst_tz) + timedelta(seconds=total_seconds)).strftime('%I:%M:%S %p')
+                    return f"Your purchase process for some tickets is ongoing for this account, so seat info cannot be fetched at this moment. Please try again after {retry_time} or retry with a different account."
+                elif "Multiple order attempt detected" in message:
+                    time_match = re.search(r'(\d+)\s*minute[s]?\s*(\d+)\s*second[s]?', message, re.IGNORECASE)
+                    minutes = int(time_match.group(1))
+                    seconds = int(time_match.group(2))
+                    total_seconds = minutes * 60 + seconds
+                    retry_time = (datetime.now(bst_tz) + timedelta(seconds=total_seconds)).strftime('%I:%M:%S %p')
+                    return f"You already have an active reservation process in this account, so seat info cannot be fetched at this moment. Please try again after {retry_time} or retry with a different account."
+                elif error_key == "OrderLimitExceeded":
+                    return "Please retry with a different account as you have reached the maximum order limit for all trains between your chosen stations on the selected day, so seat info cannot be fetched at this moment. Alternatively, search for a different day."
+    return "An error occurred while fetching seat details. Please retry with a different account for the given criteria."
+
+def search_error_message(error):
+    if error == "No trains found for the given criteria.":
+        return "At this moment, no trains are found between your selected origin and destination stations on the selected day. Please retry with a different criteria."
+    return error
+
+def auth_error_message(error):
+    if error == "AUTH_DEVICE_KEY_EXPIRED":
+        return "Device key is expired. Please enter a new valid auth token and device key."
+    return "Auth token is expired (valid for 24 hrs). Please enter a new valid auth token and device key."
+
+def get_journey_year(raw_date):
+    try:
+        return datetime.strptime(raw_date, '%d-%b-%Y').year
+    except (TypeError, ValueError):
+        return datetime.now().year
+
+def departure_sort_key(departure_time, journey_year):
+    if not departure_time:
+        return datetime.max
+    try:
+        return datetime.strptime(f"{departure_time} {journey_year}", '%d %b, %I:%M %p %Y')
+    except ValueError:
+        return datetime.max
+
+def create_refresh_snapshot(result, form_values):
+    if not result or not REFRESH_SNAPSHOTS.enabled:
+        return None
+    raw_date = form_values.get('date', '')
+    try:
+        formatted_date = datetime.strptime(raw_date, '%d-%b-%Y').strftime('%d-%b-%Y')
+    except ValueError:
+        return None
+    snapshot_id = str(uuid.uuid4())
+    REFRESH_SNAPSHOTS.set(snapshot_id, {
+        "search": {
+            'from_city': form_values.get('origin', ''),
+            'to_city': form_values.get('destination', ''),
+            'date_of_journey': formatted_date,
+            'seat_classes': get_seat_classes(form_values)
+        },
+        "journey_year": get_journey_year(raw_date),
+        "trains": snapshot_result(result),
+        "train_data": None,
+        "searched_at": 0,
+        "refreshes": 0
+    })
+    return url_for('refresh_results', snapshot_id=snapshot_id)
+
+def sse_event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+def stream_failure(stream_id, message):
+    STREAM_ERRORS.set(stream_id, message)
+    return sse_event("failure", {"message": message, "redirect": url_for('stream_error', stream_id=stream_id)})
+
+def iter_queued_train_results(request_id):
+    cursor = 0
+    last_sent = time.time()
+    while True:
+        status, events = request_queue.wait_for_progress(request_id, cursor, max(0, STREAM_KEEPALIVE_INTERVAL - (time.time() - last_sent)))
+        if status is None:
+            yield {"event": "error", "error": "Your request has expired or could not be found. Please search again."}
+            return
+
+        cursor += len(events)
+        for event in events:
+            yield event
+        if events:
+            last_sent = time.time()
+        elif time.time() - last_sent >= STREAM_KEEPALIVE_INTERVAL:
+            yield {"event": "keepalive"}
+            last_sent = time.time()
+
+        if status in ("completed", "failed"):
+            result = request_queue.get_request_result(request_id)
+            if not result or "error" in result:
+                yield {"event": "error", "error": (result or {}).get("error", "An error occurred while processing your request. Please try again.")}
+            return
+
+def render_train_stream(stream_id, events, journey_year, form_values):
+    train_count = 0
+    trains = {}
+    finished = False
+    try:
+        for event in events:
+            if finished:
+                continue
+            if event["event"] == "meta":
+                train_count = event["train_count"]
+                yield sse_event("meta", {"train_count": train_count})
+            elif event["event"] == "train":
+                details = event["details"]
+                trains[event["train"]] = details
+                html = render_template(
+                    'train_card.html',
+                    train=event["train"],
+                    details=details,
+                    train_index=event["index"] + 1,
+                    train_count=train_count
+                )
+                departure = departure_sort_key(details.get('departure_time', ''), journey_year)
+                order = f"{departure:%Y%m%d%H%M}-{event['index']:04d}"
+                yield sse_event("train", {"train": event["train"], "order": order, "html": html})
+            elif event["event"] == "done":
+                finished = True
+                if event["all_seats_422"] and trains:
+                    yield stream_failure(stream_id, all_seats_422_message(trains))
+                else:
+                    yield sse_event("done", {
+                        "train_count": event["train_count"],
+                        "refresh_url": create_refresh_snapshot(trains, form_values)
+                    })
+            elif event["event"] == "error":
+                finished = True
+                yield stream_failure(stream_id, search_error_message(event["error"]))
+            elif event["event"] == "keepalive":
+                yield ": keepalive\n\n"
+    except Exception as e:
+        if not finished:
+            yield stream_failure(stream_id, str(e))
+
 @app.route('/check_seats', methods=['GET', 'POST'])
 def check_seats():
     maintenance_response = check_maintenance()
@@ -510,7 +877,9 @@ def check_seats():
         form_values = {
             'origin': request.form.get('origin', ''),
             'destination': request.form.get('destination', ''),
-            'date': request.form.get('date', '')
+            'date': request.form.get('date', ''),
+            'sweep': 'on' if request.form.get('sweep') else '',
+            'seat_classes': [seat_class for seat_class in request.form.getlist('seat_class') if seat_class in SEAT_CLASSES]
         }
 
         if not form_values['origin'] or not form_values['destination'] or not form_values['date']:
@@ -529,6 +898,28 @@ def check_seats():
             session['error'] = "Invalid date format submitted. Please choose a date again."
             return redirect(url_for('home'))
 
+        if form_values['sweep']:
+            sweep_params = {
+                'origin': form_values['origin'],
+                'destination': form_values['destination'],
+                'dates': get_sweep_dates(formatted_date),
+                'form_values': form_values,
+                'auth_token': request.form.get('auth_token', ''),
+                'device_key': request.form.get('device_key', '')
+            }
+            if CONFIG.get("queue_enabled", True):
+                session['queue_request_id'] = request_queue.add_request(process_sweep_request, sweep_params)
+                return redirect(url_for('queue_wait'))
+
+            sweep_result = process_sweep_request(**sweep_params)
+            if "error" in sweep_result:
+                session['error'] = sweep_result["error"]
+                return redirect(url_for('home'))
+
+            sweep_id = str(uuid.uuid4())
+            SWEEP_RESULTS.set(sweep_id, sweep_result["sweep"])
+            return redirect(url_for('show_sweep', sweep_id=sweep_id))
+
         if CONFIG.get("queue_enabled", True):
             request_id = request_queue.add_request(
                 process_seat_request,
@@ -539,7 +930,9 @@ def check_seats():
                     'form_values': form_values,
                     'auth_token': request.form.get('auth_token', ''),
                     'device_key': request.form.get('device_key', '')
-                }
+                },
+                stream=CONFIG.get("stream_results", False),
+                merge_key=(form_values['origin'], form_values['destination'], formatted_date, tuple(get_seat_classes(form_values)))
             )
             session['queue_request_id'] = request_id
             return redirect(url_for('queue_wait'))
@@ -551,56 +944,33 @@ def check_seats():
                 session['error'] = "AUTH_CREDENTIALS_REQUIRED"
                 return redirect(url_for('home'))
             
+            seat_classes = get_seat_classes(form_values)
             config = {
                 'from_city': form_values['origin'],
                 'to_city': form_values['destination'],
                 'date_of_journey': formatted_date,
-                'seat_class': 'S_CHAIR',
+                'seat_class': seat_classes[0],
+                'seat_classes': seat_classes,
                 'auth_token': auth_token,
-                'device_key': device_key
+                'device_key': device_key,
+                'seat_layout_workers': CONFIG.get("seat_layout_workers", 1)
             }
 
+            if CONFIG.get("stream_results", False) and not SHARED_STATE:
+                stream_id = str(uuid.uuid4())
+                STREAM_JOBS.set(stream_id, {"config": config})
+                return redirect(url_for('show_results_stream', stream_id=stream_id))
+
             result = detailsSeatAvailability(config)
 
             bst_tz = pytz.timezone('Asia/Dhaka')
 
             if "error" in result:
                 if result["error"] == "No trains found for the given criteria.":
-                    session['error'] = "At this moment, no trains are found between your selected origin and destination stations on the selected day. Please retry with a different criteria."
+                    session['error'] = search_error_message(result["error"])
                     return redirect(url_for('home'))
                 elif result["error"] == "422 error occurred for all trains":
-                    details = result.get("details", {})
-                    for train, train_details in details.items():
-                        for seat_type in train_details["seat_data"]:
-                            if seat_type["is_422"] and "error_info" in seat_type:
-                                error_info = seat_type["error_info"]
-                                message = error_info.get("message", "")
-                                error_key = error_info.get("errorKey", "")
-                                if "ticket purchase for this trip will be available" in message or "East Zone" in message or "West Zone" in message:
-                                    time_match = re.search(r'(\d+:\d+\s*[APMapm]+)', message)
-                                    retry_time = time_match.group(1) if time_match else "8:00 AM or 2:00 PM"
-                                    session['error'] = f"Ticket purchasing for the selected criteria is not yet available, so seat info cannot be fetched at this moment. Please try again after {retry_time}. Alternatively, search for a different day."
-                                    return redirect(url_for('home'))
-                                elif "Your purchase process is on-going" in message:
-                                    time_match = re.search(r'(\d+)\s*minute[s]?\s*(\d+)\s*second[s]?', message, re.IGNORECASE)
-                                    minutes = int(time_match.group(1))
-                                    seconds = int(time_match.group(2))
-                                    total_seconds = minutes * 60 + seconds
-                                    retry_time = (datetime.now(bst_tz) + timedelta(seconds=total_seconds)).strftime('%I:%M:%S %p')
-                                    session['error'] = f"Your purchase process for some tickets is ongoing for this account, so seat info cannot be fetched at this moment. Please try again after {retry_time} or retry with a different account."
-                                    return redirect(url_for('home'))
-                                elif "Multiple order attempt detected" in message:
-                                    time_match = re.search(r'(\d+)\s*minute[s]?\s*(\d+)\s*second[s]?', message, re.IGNORECASE)
-                                    minutes = int(time_match.group(1))
-                                    seconds = int(time_match.group(2))
-                                    total_seconds = minutes * 60 + seconds
-                                    retry_time = (datetime.now(bst_tz) + timedelta(seconds=total_seconds)).strftime('%I:%M:%S %p')
-                                    session['error'] = f"You already have an active reservation process in this account, so seat info cannot be fetched at this moment. Please try again after {retry_time} or retry with a different account."
-                                    return redirect(url_for('home'))
-                                elif error_key == "OrderLimitExceeded":
-                                    session['error'] = "Please retry with a different account as you have reached the maximum order limit for all trains between your chosen stations on the selected day, so seat info cannot be fetched at this moment. Alternatively, search for a different day."
-                                    return redirect(url_for('home'))
-                    session['error'] = "An error occurred while fetching seat details. Please retry with a different account for the given criteria."
+                    session['error'] = all_seats_422_message(result.get("details", {}))
                     return redirect(url_for('home'))
 
             for train, details in result.items():
@@ -619,26 +989,6 @@ def check_seats():
                             train_error_message = f"Please retry with a different account as you have reached the maximum order limit for this train on the selected day, so seat info cannot be fetched at this moment."
                         elif train_error_message is None:
                             train_error_message = "Please retry with a different account to get seat info for this train."
-                    seat_type['grouped_seats'] = group_by_prefix(seat_type['available_seats'])
-                    seat_type['grouped_booking_process'] = group_by_prefix(seat_type['booking_process_seats'])
-
-                    issued_seats = []
-                    for type_id in [1, 3]:
-                        if type_id in seat_type['ticket_types']:
-                            issued_seats.extend(seat_type['ticket_types'][type_id].get('seats', []))
-                    issued_seats = sorted(issued_seats, key=sort_seat_number)
-                    grouped_issued = group_by_prefix(issued_seats)
-                    seat_type['grouped_ticket_types'] = {
-                        t: group_by_prefix(info['seats']) for t, info in seat_type.get('ticket_types', {}).items()
-                        if 'seats' in info
-                    }
-
-                    seat_type['ticket_types']['issued_combined'] = {
-                        'label': 'Issued Tickets to Buy',
-                        'seats': issued_seats,
-                        'count': len(issued_seats),
-                        'grouped': grouped_issued
-                    }
                     if train_error_message:
                         seat_type["error_message"] = train_error_message
                 if train_has_422_error and all(st["is_422"] for st in details['seat_data']):
@@ -646,9 +996,7 @@ def check_seats():
                 else:
                     details["all_seats_422"] = False
 
-            result_id = str(uuid.uuid4())
-            RESULT_CACHE[result_id] = result
-            session['result_id'] = result_id
+            session['result_id'] = request_queue.add_result(compact_result(result))
             return redirect(url_for('show_results'))
 
     except Exception as e:
@@ -684,6 +1032,8 @@ def queue_wait():
         request_id=request_id,
         status=status,
         form_values=form_values,
+        stream_results=CONFIG.get("stream_results", False) and not form_values.get('sweep'),
+        status_stream=CONFIG.get("queue_status_stream", True),
         styles_css=STYLES_CSS_CONTENT,
         script_js=SCRIPT_JS_CONTENT
     )
@@ -701,6 +1051,60 @@ def queue_status(request_id):
     
     return jsonify(status)
 
+def queue_status_payload(request_id, status):
+    queued = status["status"] == "queued"
+    payload = {
+        "status": status["status"],
+        "position": status.get("position", 0) if queued else 0,
+        "estimated_time": status.get("estimated_time", 0) if queued else 0
+    }
+    if status["status"] == "failed":
+        result = request_queue.get_request_result(request_id)
+        if result and "error" in result:
+            payload["errorMessage"] = result["error"]
+    return payload
+
+def iter_queue_events(request_id):
+    version = None
+    last_sent = None
+    last_write = last_heartbeat = time.monotonic()
+    while True:
+        status, version = request_queue.wait_for_status_change(request_id, version, STREAM_KEEPALIVE_INTERVAL)
+        if status is None:
+            yield sse_event("status", {"error": "Request not found"})
+            return
+
+        if time.monotonic() - last_heartbeat >= STREAM_KEEPALIVE_INTERVAL:
+            last_heartbeat = time.monotonic()
+            request_queue.update_heartbeat(request_id)
+        snapshot = (status["status"], status.get("position"))
+        if snapshot != last_sent:
+            last_sent = snapshot
+            last_write = time.monotonic()
+            yield sse_event("status", queue_status_payload(request_id, status))
+            if status["status"] in ("completed", "failed"):
+                return
+        elif time.monotonic() - last_write >= STREAM_KEEPALIVE_INTERVAL:
+            last_write = time.monotonic()
+            yield ": keepalive\n\n"
+        time.sleep(QUEUE_EVENT_MIN_INTERVAL)
+
+@app.route('/queue_events/<request_id>')
+def queue_events(request_id):
+    if not CONFIG.get("queue_status_stream", True):
+        abort(404)
+    if not request_queue.get_request_status(request_id):
+        return jsonify({"error": "Request not found"}), 404
+    if not QUEUE_EVENT_SLOTS.acquire(blocking=False):
+        response = jsonify({"error": "Too many open status streams"})
+        response.headers['Retry-After'] = str(STREAM_KEEPALIVE_INTERVAL)
+        return response, 503
+
+    response = Response(iter_queue_events(request_id), mimetype='text/event-stream')
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.call_on_close(QUEUE_EVENT_SLOTS.release)
+    return response
+
 @app.route('/cancel_request/<request_id>', methods=['POST'])
 def cancel_request(request_id):
     try:
@@ -740,13 +1144,12 @@ def show_results():
         return maintenance_response
 
     result_id = session.pop('result_id', None)
-    if not result_id or result_id not in RESULT_CACHE:
+    result = request_queue.get_request_result(result_id) if result_id else None
+    if result is None:
         if session.get('queue_request_id'):
             return redirect(url_for('show_results_with_id', request_id=session['queue_request_id']))
         return redirect(url_for('home'))
 
-    result = RESULT_CACHE.pop(result_id)
-
     form_values = session.get('form_values', {})
     origin = form_values.get('origin', '')
     destination = form_values.get('destination', '')
@@ -763,20 +1166,10 @@ def show_results():
         formatted_date = ''
         journey_year = datetime.now().year
 
-    seat_class = 'S_CHAIR'
+    seat_class = get_seat_classes(form_values)[0]
 
     if result:
-        def parse_departure_time(item):
-            dep_time_str = item[1].get('departure_time', '')
-            if not dep_time_str:
-                return datetime.max
-            full_date_str = f"{dep_time_str} {journey_year}"
-            try:
-                return datetime.strptime(full_date_str, '%d %b, %I:%M %p %Y')
-            except ValueError:
-                return datetime.max
-
-        result = dict(sorted(result.items(), key=parse_departure_time))
+        result = dict(sorted(result.items(), key=lambda item: departure_sort_key(item[1].get('departure_time', ''), journey_year)))
 
     @after_this_request
     def add_headers(response):
@@ -792,6 +1185,7 @@ def show_results():
     return render_template(
         'results.html',
         result=result,
+        refresh_url=create_refresh_snapshot(result, form_values),
         origin=origin,
         destination=destination,
         date=formatted_date,
@@ -821,6 +1215,12 @@ def show_results_with_id(request_id):
         session['error'] = "An error occurred while processing your request. Please try again."
         return redirect(url_for('home'))
     
+    if "sweep" in queue_result:
+        if session.get('queue_request_id') == request_id:
+            session.pop('queue_request_id', None)
+        SWEEP_RESULTS.set(request_id, queue_result["sweep"])
+        return redirect(url_for('show_sweep', sweep_id=request_id))
+    
     result = queue_result.get("result", {})
     form_values = queue_result.get("form_values", {})
     
@@ -842,20 +1242,10 @@ def show_results_with_id(request_id):
         formatted_date = ''
         journey_year = datetime.now().year
 
-    seat_class = 'S_CHAIR'
+    seat_class = get_seat_classes(form_values)[0]
 
     if result:
-        def parse_departure_time(item):
-            dep_time_str = item[1].get('departure_time', '')
-            if not dep_time_str:
-                return datetime.max
-            full_date_str = f"{dep_time_str} {journey_year}"
-            try:
-                return datetime.strptime(full_date_str, '%d %b, %I:%M %p %Y')
-            except ValueError:
-                return datetime.max
-
-        result = dict(sorted(result.items(), key=parse_departure_time))
+        result = dict(sorted(result.items(), key=lambda item: departure_sort_key(item[1].get('departure_time', ''), journey_year)))
 
     banner_image = CONFIG.get("image_link") or DEFAULT_BANNER_IMAGE
     if not banner_image:
@@ -864,6 +1254,7 @@ def show_results_with_id(request_id):
     return render_template(
         'results.html',
         result=result,
+        refresh_url=create_refresh_snapshot(result, form_values),
         origin=origin,
         destination=destination,
         date=formatted_date,
@@ -873,14 +1264,238 @@ def show_results_with_id(request_id):
         banner_image=banner_image
     )
 
+@app.route('/show_results_stream/<stream_id>')
+def show_results_stream(stream_id):
+    maintenance_response = check_maintenance()
+    if maintenance_response:
+        return maintenance_response
+
+    if session.get('queue_request_id') == stream_id:
+        session.pop('queue_request_id', None)
+
+    form_values = session.get('form_values', {})
+    raw_date = form_values.get('date', '')
+    try:
+        formatted_date = datetime.strptime(raw_date, '%d-%b-%Y').strftime('%d-%b-%Y')
+    except ValueError:
+        formatted_date = ''
+
+    banner_image = CONFIG.get("image_link") or DEFAULT_BANNER_IMAGE
+    if not banner_image:
+        banner_image = ""
+
+    return render_template(
+        'results.html',
+        result=None,
+        stream_url=url_for('stream_results', stream_id=stream_id),
+        origin=form_values.get('origin', ''),
+        destination=form_values.get('destination', ''),
+        date=formatted_date,
+        seat_class=get_seat_classes(form_values)[0],
+        styles_css=STYLES_CSS_CONTENT,
+        script_js=SCRIPT_JS_CONTENT,
+        banner_image=banner_image
+    )
+
+@app.route('/sweep/<sweep_id>')
+def show_sweep(sweep_id):
+    maintenance_response = check_maintenance()
+    if maintenance_response:
+        return maintenance_response
+
+    sweep, _ = SWEEP_RESULTS.get(sweep_id)
+    if sweep is None:
+        session['error'] = "Your request has expired or could not be found. Please search again."
+        return redirect(url_for('home'))
+
+    form_values = sweep["form_values"]
+
+    banner_image = CONFIG.get("image_link") or DEFAULT_BANNER_IMAGE
+    if not banner_image:
+        banner_image = ""
+
+    return render_template(
+        'sweep.html',
+        sweep_id=sweep_id,
+        dates=sweep["dates"],
+        summary=sweep["summary"],
+        origin=form_values.get('origin', ''),
+        destination=form_values.get('destination', ''),
+        seat_class=get_seat_classes(form_values)[0],
+        styles_css=STYLES_CSS_CONTENT,
+        script_js=SCRIPT_JS_CONTENT,
+        banner_image=banner_image
+    )
+
+@app.route('/sweep/<sweep_id>/<date>', methods=['GET', 'POST'])
+def show_sweep_date(sweep_id, date):
+    maintenance_response = check_maintenance()
+    if maintenance_response:
+        return maintenance_response
+
+    sweep, _ = SWEEP_RESULTS.get(sweep_id)
+    if sweep is None:
+        session['error'] = "Your request has expired or could not be found. Please search again."
+        return redirect(url_for('home'))
+
+    if request.method == 'GET' or "error" in sweep["summary"].get(date, {"error": True}):
+        return redirect(url_for('show_sweep', sweep_id=sweep_id))
+
+    form_values = dict(sweep["form_values"], date=date)
+    seat_result = process_seat_request(
+        form_values.get('origin', ''),
+        form_values.get('destination', ''),
+        date,
+        form_values,
+        request.form.get('auth_token', ''),
+        request.form.get('device_key', '')
+    )
+    if "error" in seat_result:
+        session['error'] = seat_result["error"]
+        return redirect(url_for('home'))
+    result = seat_result["result"]
+
+    banner_image = CONFIG.get("image_link") or DEFAULT_BANNER_IMAGE
+    if not banner_image:
+        banner_image = ""
+
+    return render_template(
+        'results.html',
+        result=result,
+        refresh_url=create_refresh_snapshot(result, form_values),
+        sweep_url=url_for('show_sweep', sweep_id=sweep_id),
+        origin=form_values.get('origin', ''),
+        destination=form_values.get('destination', ''),
+        date=date,
+        seat_class=get_seat_classes(form_values)[0],
+        styles_css=STYLES_CSS_CONTENT,
+        script_js=SCRIPT_JS_CONTENT,
+        banner_image=banner_image
+    )
+
+@app.route('/stream_results/<stream_id>')
+def stream_results(stream_id):
+    form_values = session.get('form_values', {})
+    journey_year = get_journey_year(form_values.get('date', ''))
+
+    job, _ = STREAM_JOBS.get(stream_id)
+    if job is not None:
+        STREAM_JOBS.invalidate(stream_id)
+        events = iter_annotated_train_results(job["config"])
+    else:
+        events = iter_queued_train_results(stream_id)
+
+    response = Response(stream_with_context(render_train_stream(stream_id, events, journey_year, form_values)), mimetype='text/event-stream')
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/refresh_results/<snapshot_id>', methods=['POST'])
+def refresh_results(snapshot_id):
+    snapshot, _ = REFRESH_SNAPSHOTS.get(snapshot_id)
+    if snapshot is None:
+        return jsonify({"error": "These results have expired. Please perform a new search."}), 404
+
+    payload = request.get_json(silent=True) or {}
+    config = dict(
+        snapshot["search"],
+        seat_class=snapshot["search"]["seat_classes"][0],
+        auth_token=payload.get('auth_token', ''),
+        device_key=payload.get('device_key', ''),
+        seat_layout_workers=CONFIG.get("seat_layout_workers", 1)
+    )
+
+    train_data = snapshot["train_data"]
+    searched_at = snapshot["searched_at"]
+    if train_data is None or time.time() - searched_at >= CONFIG.get("refresh_search_ttl", 60):
+        train_data = None
+        searched_at = time.time()
+
+    try:
+        train_data, result = search_train_results(config, train_data)
+    except Exception as e:
+        if is_auth_error(e):
+            STREAM_ERRORS.set(snapshot_id, str(e))
+            return jsonify({"error": auth_error_message(str(e)), "redirect": url_for('stream_error', stream_id=snapshot_id)}), 401
+        return jsonify({"error": search_error_message(str(e))}), 502
+
+    if "error" in result:
+        if result["error"] == "422 error occurred for all trains":
+            return jsonify({"error": all_seats_422_message(result.get("details", {}))})
+        return jsonify({"error": search_error_message(result["error"])})
+
+    for details in result.values():
+        annotate_train_details(details, config['from_city'], config['to_city'])
+
+    journey_year = snapshot["journey_year"]
+    ordered = sorted(result.items(), key=lambda item: departure_sort_key(item[1].get('departure_time', ''), journey_year))
+    delta, trains = diff_results(snapshot["trains"], result)
+    if (len(result) > 1) != (len(snapshot["trains"]) > 1):
+        delta["rerender"] = list(result)
+        delta["changed"] = {}
+
+    refreshes = snapshot["refreshes"] + 1
+    rerender = set(delta["rerender"])
+    REFRESH_SNAPSHOTS.set(snapshot_id, dict(snapshot, trains=trains, train_data=train_data, searched_at=searched_at, refreshes=refreshes))
+
+    return jsonify({
+        "order": [train for train, _ in ordered],
+        "removed": delta["removed"],
+        "rerender": {
+            train: render_template(
+                'train_card.html',
+                train=train,
+                details=details,
+                train_index=f"r{refreshes}-{position}",
+                train_count=len(ordered)
+            )
+            for position, (train, details) in enumerate(ordered, start=1) if train in rerender
+        },
+        "changed": delta["changed"],
+        "refreshed_at": datetime.now(pytz.timezone('Asia/Dhaka')).strftime('%I:%M:%S %p')
+    })
+
+@app.route('/stream_error/<stream_id>')
+def stream_error(stream_id):
+    message, _ = STREAM_ERRORS.get(stream_id)
+    STREAM_ERRORS.invalidate(stream_id)
+    session['error'] = message or "Your request has expired or could not be found. Please search again."
+    return redirect(url_for('home'))
+
 @app.route('/queue_stats')
 def queue_stats():
     try:
         stats = request_queue.get_queue_stats()
+        stats["upstream_connections"] = get_connection_stats()
+        stats["seat_layout_cache"] = get_seat_layout_cache_stats()
+        stats["coalescing"] = get_coalescing_stats()
+        stats["circuit_breaker"] = get_circuit_breaker_stats()
+        stats["rate_limiter"] = get_rate_limiter_stats()
         return jsonify(stats)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def queue_depth_metrics():
+    stats = request_queue.get_queue_stats()
+    return {("queued",): stats["queued"], ("processing",): stats["processing"]}
+
+REGISTRY.gauge(
+    "railway_queue_requests",
+    "Requests currently waiting or being processed in the request queue.",
+    ("status",),
+    callback=queue_depth_metrics
+)
+REGISTRY.gauge(
+    "railway_upstream_circuit_open",
+    "1 while the upstream circuit breaker is open, otherwise 0.",
+    callback=lambda: int(get_circuit_breaker_stats()["state"] == "open")
+)
+
+@app.route('/metrics')
+def metrics():
+    if not CONFIG.get("metrics_enabled", True):
+        abort(404)
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/queue_cleanup', methods=['POST'])
 def queue_cleanup():
     try:
@@ -897,13 +1512,6 @@ def page_not_found(e):
         return maintenance_response
     return render_template('404.html', styles_css=STYLES_CSS_CONTENT, script_js=SCRIPT_JS_CONTENT), 404
 
-def group_by_prefix(seats):
-    groups = {}
-    for seat in seats:
-        prefix = seat.split('-')[0]
-        groups.setdefault(prefix, []).append(seat)
-    return {prefix: {"seats": seats, "count": len(seats)} for prefix, seats in groups.items()}
-
 if __name__ == "__main__":
     app.run(host='0.0.0.0', port=int(os.environ.get("PORT", 5001)), debug=False)
 else:
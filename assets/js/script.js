@@ -637,8 +637,8 @@ function start404Countdown() {
     }
 }
 
-function initializeCollapsibleSections() {
-    const toggles = document.querySelectorAll('.collapsible-toggle');
+function initializeCollapsibleSections(root = document) {
+    const toggles = root.querySelectorAll('.collapsible-toggle');
 
     function recalculateParentHeights(element) {
         let parent = element.closest('.train-details-content');
@@ -661,7 +661,7 @@ function initializeCollapsibleSections() {
             });
         });
 
-        document.querySelectorAll('.train-details-content').forEach(element => {
+        root.querySelectorAll('.train-details-content').forEach(element => {
             resizeObserver.observe(element);
         });
     }
@@ -800,6 +800,281 @@ function initializeCollapsibleSections() {
     });
 }
 
+function initializeResultStream() {
+    const container = document.getElementById('trainResults');
+    const streamStatus = document.getElementById('streamStatus');
+    if (!container || !container.dataset.streamUrl || container.dataset.streamStarted) return;
+    container.dataset.streamStarted = 'true';
+
+    const source = new EventSource(container.dataset.streamUrl);
+    let trainCount = 0;
+
+    function updateStreamStatus() {
+        const loaded = container.children.length;
+        streamStatus.innerHTML = `<span class="spinner"></span> Loaded ${loaded} of ${trainCount} train${trainCount !== 1 ? 's' : ''}...`;
+    }
+
+    source.addEventListener('meta', event => {
+        trainCount = JSON.parse(event.data).train_count;
+        updateStreamStatus();
+    });
+
+    source.addEventListener('train', event => {
+        const data = JSON.parse(event.data);
+        const template = document.createElement('template');
+        template.innerHTML = data.html.trim();
+        const card = template.content.firstElementChild;
+        card.dataset.train = data.train;
+        card.dataset.order = data.order;
+
+        const cards = Array.from(container.children);
+        const existing = cards.find(child => child.dataset.train === data.train);
+        if (existing) existing.remove();
+        const nextCard = cards.find(child => child !== existing && child.dataset.order > data.order);
+        container.insertBefore(card, nextCard || null);
+
+        initializeCollapsibleSections(card);
+        updateStreamStatus();
+    });
+
+    source.addEventListener('done', event => {
+        source.close();
+        streamStatus.remove();
+        const refreshUrl = JSON.parse(event.data).refresh_url;
+        const refreshBtn = document.getElementById('refreshSeatsBtn');
+        if (refreshBtn && refreshUrl) {
+            refreshBtn.dataset.refreshUrl = refreshUrl;
+            refreshBtn.style.display = '';
+        }
+        if (!container.children.length) {
+            container.innerHTML = '<p class="error"><i class="fas fa-exclamation-triangle"></i> No trains available for the selected criteria.</p>';
+        }
+    });
+
+    source.addEventListener('failure', event => {
+        source.close();
+        window.location.href = JSON.parse(event.data).redirect;
+    });
+
+    source.onerror = () => {
+        if (source.readyState === EventSource.CONNECTING) return;
+        source.close();
+        streamStatus.innerHTML = '<i class="fas fa-exclamation-circle"></i> Connection lost while loading seat info. Please search again.';
+        streamStatus.style.color = '#e74c3c';
+    };
+}
+
+const SEAT_STATUS_LABELS = {
+    available: '<span class="status status-available"><i class="fas fa-check-circle"></i> Available</span>',
+    booking_process: '<span class="status status-in-process"><i class="fas fa-spinner"></i> In Booking</span>'
+};
+
+function ticketWord(count) {
+    return count === 1 ? 'ticket' : 'tickets';
+}
+
+function initializeSweepDates() {
+    document.querySelectorAll('.sweep-date-form').forEach(form => {
+        form.addEventListener('submit', () => {
+            form.elements.auth_token.value = localStorage.getItem('railway_auth_token') || '';
+            form.elements.device_key.value = localStorage.getItem('railway_device_key') || '';
+            const submitButton = form.querySelector('button');
+            submitButton.disabled = true;
+            submitButton.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Loading Seat Info...';
+        });
+    });
+}
+
+function initializeResultRefresh() {
+    const refreshBtn = document.getElementById('refreshSeatsBtn');
+    if (!refreshBtn) return;
+    refreshBtn.addEventListener('click', () => refreshResults(refreshBtn));
+}
+
+async function refreshResults(refreshBtn) {
+    const refreshUrl = refreshBtn.dataset.refreshUrl;
+    if (!refreshUrl || refreshBtn.disabled) return;
+
+    refreshBtn.disabled = true;
+    refreshBtn.innerHTML = '<i class="fas fa-sync-alt fa-spin"></i> Refreshing...';
+    try {
+        const response = await fetch(refreshUrl, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                auth_token: localStorage.getItem('railway_auth_token') || '',
+                device_key: localStorage.getItem('railway_device_key') || ''
+            })
+        });
+        const data = await response.json();
+        if (data.redirect) {
+            window.location.href = data.redirect;
+            return;
+        }
+        if (data.error) {
+            showFlyout(data.error, 'error', 5000);
+            return;
+        }
+        applyResultDelta(data);
+        showFlyout(`Seat info refreshed at ${data.refreshed_at}`, 'success', 3000);
+    } catch (error) {
+        showFlyout('Could not refresh seat info. Please try again.', 'error', 5000);
+    } finally {
+        refreshBtn.disabled = false;
+        refreshBtn.innerHTML = '<i class="fas fa-sync-alt"></i> Refresh Seats';
+    }
+}
+
+function findTrainCard(container, train) {
+    return Array.from(container.children).find(card => card.dataset.train === train);
+}
+
+function applyResultDelta(data) {
+    const container = document.getElementById('trainResults');
+    if (!container) return;
+
+    data.removed.forEach(train => {
+        const card = findTrainCard(container, train);
+        if (card) card.remove();
+    });
+
+    Object.entries(data.rerender).forEach(([train, html]) => {
+        const template = document.createElement('template');
+        template.innerHTML = html.trim();
+        const card = template.content.firstElementChild;
+        const existing = findTrainCard(container, train);
+        if (existing) {
+            existing.replaceWith(card);
+        } else {
+            container.appendChild(card);
+        }
+        initializeCollapsibleSections(card);
+    });
+
+    const currentOrder = Array.from(container.children).map(card => card.dataset.train);
+    if (currentOrder.join('\n') !== data.order.join('\n')) {
+        data.order.forEach(train => {
+            const card = findTrainCard(container, train);
+            if (card) container.appendChild(card);
+        });
+    }
+
+    Object.entries(data.changed).forEach(([train, seatTypes]) => {
+        const card = findTrainCard(container, train);
+        if (!card) return;
+        card.querySelectorAll('.seat-type-section').forEach(section => {
+            const changes = seatTypes[section.dataset.seatIndex];
+            if (changes) applySeatTypeChanges(section, changes);
+        });
+    });
+}
+
+function readSeatList(section, status) {
+    const seats = [];
+    section.querySelectorAll(`tr[data-status="${status}"]`).forEach(row => {
+        row.cells[2].textContent.split(',').forEach(seat => {
+            seat = seat.trim();
+            if (seat) seats.push(seat);
+        });
+    });
+    return seats;
+}
+
+function buildSeatRows(status, seats, labelHtml) {
+    const groups = new Map();
+    seats.forEach(seat => {
+        const coach = seat.split('-')[0];
+        if (!groups.has(coach)) groups.set(coach, []);
+        groups.get(coach).push(seat);
+    });
+
+    return Array.from(groups, ([coach, coachSeats]) => {
+        const row = document.createElement('tr');
+        row.dataset.status = status;
+        const labelCell = document.createElement('td');
+        labelCell.innerHTML = labelHtml;
+        const coachCell = document.createElement('td');
+        coachCell.textContent = `${coach} (${coachSeats.length} ${ticketWord(coachSeats.length)})`;
+        const seatsCell = document.createElement('td');
+        seatsCell.textContent = coachSeats.join(', ');
+        row.append(labelCell, coachCell, seatsCell);
+        return row;
+    });
+}
+
+function applySeatTypeChanges(section, changes) {
+    const seatLists = {};
+    ['available', 'booking_process', 'issued'].forEach(status => {
+        seatLists[status] = readSeatList(section, status);
+    });
+
+    Object.entries(changes).forEach(([status, change]) => {
+        let seats = seatLists[status];
+        if (change.removed) {
+            const removed = new Set(change.removed);
+            seats = seats.filter(seat => !removed.has(seat));
+        }
+        (change.added || []).forEach(([seat, after]) => {
+            seats.splice(after === null ? 0 : seats.indexOf(after) + 1, 0, seat);
+        });
+        seatLists[status] = seats;
+    });
+
+    if (changes.available || changes.booking_process) {
+        const seatRows = section.querySelector('tbody[data-seat-rows]');
+        const seatCounts = section.querySelector('p[data-seat-counts]');
+        if (seatRows) {
+            seatRows.replaceChildren(
+                ...buildSeatRows('available', seatLists.available, SEAT_STATUS_LABELS.available),
+                ...buildSeatRows('booking_process', seatLists.booking_process, SEAT_STATUS_LABELS.booking_process)
+            );
+        }
+        if (seatCounts) {
+            const available = seatLists.available.length;
+            const booking = seatLists.booking_process.length;
+            seatCounts.innerHTML = `
+                <span class="status status-available">
+                    <i class="fas fa-check-circle"></i> Available: ${available} ${ticketWord(available)}
+                </span>
+                <span class="status status-in-process">
+                    <i class="fas fa-spinner"></i> In Booking: ${booking} ${ticketWord(booking)}
+                </span>`;
+        }
+    }
+
+    if (changes.issued) {
+        const issuedRows = section.querySelector('tbody[data-issued-rows]');
+        const issuedCount = section.querySelector('h3[data-issued-count]');
+        if (issuedRows) {
+            const previousRows = issuedRows.querySelectorAll('tr[data-status="issued"]');
+            const label = document.createElement('span');
+            label.textContent = previousRows.length ? previousRows[0].cells[0].textContent.trim() : 'Issued Tickets to Buy';
+            previousRows.forEach(row => row.remove());
+            issuedRows.prepend(...buildSeatRows('issued', seatLists.issued, label.innerHTML));
+        }
+        if (issuedCount) {
+            const count = seatLists.issued.length;
+            issuedCount.innerHTML = `<i class="fas fa-ticket-alt"></i> ${count} Ticket${count === 1 ? '' : 's'} Issued for Purchase`;
+        }
+    }
+
+    section.querySelectorAll('.collapsible-content').forEach(content => {
+        if (content.style.maxHeight && content.style.maxHeight !== '0px' && content.style.maxHeight !== 'none') {
+            content.style.maxHeight = content.scrollHeight + 'px';
+        }
+    });
+    const trainDetails = section.closest('.train-details-content');
+    if (trainDetails && trainDetails.style.maxHeight && trainDetails.style.maxHeight !== '0px' && trainDetails.style.maxHeight !== 'none') {
+        trainDetails.style.maxHeight = trainDetails.scrollHeight + 'px';
+    }
+
+    section.classList.remove('seat-type-updated');
+    void section.offsetWidth;
+    section.classList.add('seat-type-updated');
+}
+
 function resetSubmitButton() {
     const submitButton = document.querySelector('#seatForm .btn-primary');
     if (submitButton) {
@@ -1143,6 +1418,7 @@ document.addEventListener('DOMContentLoaded', function () {
     
     const seatForm = document.getElementById("seatForm");
     if (seatForm) seatForm.addEventListener("submit", validateForm);
+    initializeSweepDates();
 
     Promise.all([loadStations(), loadBannerImage()]).then(() => {
         document.querySelectorAll('a[class^="btn-"], button[class^="btn-"]').forEach(el => {
@@ -1202,6 +1478,8 @@ document.addEventListener('DOMContentLoaded', function () {
 
         start404Countdown();
         initializeCollapsibleSections();
+        initializeResultStream();
+        initializeResultRefresh();
 
         const configData = JSON.parse(document.getElementById('app-config').textContent);
         const forceBanner = configData.force_banner || 0;
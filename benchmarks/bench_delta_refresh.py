@@ -0,0 +1,92 @@
+import argparse, copy, json, random, time
+
+import synthetic
+import detailsSeatAvailability as dsa
+from seat_delta import snapshot_result, diff_results
+from app import app, render_template, annotate_train_details
+
+def build_result(train_data, layouts):
+    parsed = [dsa.parse_seat_layout(layouts[trip_id]) for trip_id, _ in dsa.seat_layout_jobs(train_data)]
+    result = dsa.build_result(train_data, parsed)
+    for details in result.values():
+        annotate_train_details(details, "Dhaka", "Chattogram")
+    return result
+
+def change_seats(layouts, ratio, seed):
+    rng = random.Random(seed)
+    changed = copy.deepcopy(layouts)
+    flipped = 0
+    for layout in changed.values():
+        for floor in layout["data"]["seatLayout"]:
+            for row in floor["layout"]:
+                for seat in row:
+                    if seat["seat_number"] and seat["seat_availability"] and rng.random() < ratio:
+                        seat["seat_availability"] = (seat["seat_availability"] + 1) % 3
+                        flipped += 1
+    return changed, flipped
+
+def render_full(result):
+    return render_template(
+        'results.html',
+        result=result,
+        refresh_url="/refresh_results/benchmark",
+        origin="Dhaka",
+        destination="Chattogram",
+        date="15-Oct-2025",
+        seat_class="S_CHAIR",
+        styles_css="",
+        script_js="",
+        banner_image=""
+    )
+
+def render_delta(snapshot, result):
+    delta, _ = diff_results(snapshot, result)
+    return json.dumps({
+        "order": list(result),
+        "removed": delta["removed"],
+        "rerender": {
+            train: render_template('train_card.html', train=train, details=result[train], train_index=index, train_count=len(result))
+            for index, train in enumerate(delta["rerender"], start=1)
+        },
+        "changed": delta["changed"],
+        "refreshed_at": "12:00:00 PM"
+    })
+
+def timed(func, repeat):
+    best = None
+    output = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare a full results page reload with a delta refresh response.")
+    parser.add_argument("--trains", type=int, default=15)
+    parser.add_argument("--seat-types", type=int, default=4)
+    parser.add_argument("--seats-per-coach", type=int, default=80)
+    parser.add_argument("--change-ratio", type=float, default=0.03)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    trains, layouts = synthetic.make_search(trains=args.trains, seat_types=args.seat_types, seats_per_coach=args.seats_per_coach)
+    train_data = trains["data"]["trains"]
+    changed_layouts, flipped = change_seats(layouts, args.change_ratio, seed=1)
+
+    before = build_result(train_data, layouts)
+    after = build_result(train_data, changed_layouts)
+    snapshot = snapshot_result(before)
+
+    with app.test_request_context():
+        full_time, page = timed(lambda: render_full(after), args.repeat)
+        delta_time, delta = timed(lambda: render_delta(snapshot, after), args.repeat)
+
+    print(f"{args.trains} trains x {args.seat_types} seat types, {flipped} seats changed ({args.change_ratio:.0%})")
+    print(f"{'response':<16} {'KiB':>9} {'ms':>9}")
+    print(f"{'full page':<16} {len(page.encode('utf-8')) / 1024:>9.1f} {full_time * 1000:>9.2f}")
+    print(f"{'delta':<16} {len(delta.encode('utf-8')) / 1024:>9.1f} {delta_time * 1000:>9.2f}")
+
+if __name__ == "__main__":
+    main()
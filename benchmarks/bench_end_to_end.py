@@ -0,0 +1,158 @@
+import argparse, json, logging, os, threading, time
+from datetime import datetime, timedelta
+
+import pytz
+
+from upstream_stub import add_stub_arguments, stub_from_args
+
+PHASES = ("check_seats", "queue", "show_results", "total")
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+def summarize(values):
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99)
+    }
+
+def journey_dates(days=10):
+    today = datetime.now(pytz.timezone('Asia/Dhaka')).replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+    return [(today + timedelta(days=offset)).strftime('%d-%b-%Y') for offset in range(1, days + 1)]
+
+def run_search(client, form, poll_interval, timings, outcomes, lock):
+    started = time.perf_counter()
+    response = client.post('/check_seats', data=form)
+    submitted = time.perf_counter()
+    with client.session_transaction() as session:
+        request_id = session.get('queue_request_id')
+    if response.status_code != 302 or not request_id:
+        with lock:
+            outcomes["rejected"] += 1
+        return
+
+    status = None
+    last_heartbeat = submitted
+    while True:
+        status = client.get(f'/queue_status/{request_id}').get_json() or {}
+        if status.get("status") in ("completed", "failed") or "error" in status:
+            break
+        if time.perf_counter() - last_heartbeat > 5:
+            client.post(f'/queue_heartbeat/{request_id}')
+            last_heartbeat = time.perf_counter()
+        time.sleep(poll_interval)
+    completed = time.perf_counter()
+
+    page = client.get(f'/show_results/{request_id}')
+    rendered = time.perf_counter()
+
+    ok = status.get("status") == "completed" and page.status_code == 200
+    with lock:
+        outcomes["ok" if ok else "failed"] += 1
+        if ok:
+            timings["check_seats"].append(submitted - started)
+            timings["queue"].append(completed - submitted)
+            timings["show_results"].append(rendered - completed)
+            timings["total"].append(rendered - started)
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive /check_seats -> /queue_status -> /show_results/<id> against a local upstream stub.")
+    add_stub_arguments(parser)
+    parser.add_argument("--searches", type=int, default=40)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--max-concurrent", type=int, default=2, help="queue max_concurrent")
+    parser.add_argument("--cooldown", type=float, default=0.0, help="queue cooldown_period in seconds")
+    parser.add_argument("--merge-limit", type=int, default=1, help="queue merge_limit; 1 runs every search on its own")
+    parser.add_argument("--dates", type=int, default=10, help="distinct journey dates the searches spread over")
+    parser.add_argument("--seat-layout-workers", type=int, default=4)
+    parser.add_argument("--layout-cache-ttl", type=float, default=0)
+    parser.add_argument("--poll-interval", type=float, default=0.05)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    stub = stub_from_args(args)
+    os.environ["RAILWAY_API_BASE_URL"] = stub.start()
+
+    import app as app_module
+    import detailsSeatAvailability as dsa
+    from request_queue import RequestQueue
+
+    dsa.API_BASE_URL = os.environ["RAILWAY_API_BASE_URL"]
+    app_module.logger.setLevel(logging.WARNING)
+    app_module.CONFIG.update({
+        "queue_enabled": True,
+        "stream_results": False,
+        "seat_layout_workers": args.seat_layout_workers
+    })
+    dsa.configure_rate_limiter()
+    dsa.configure_seat_layout_cache(ttl=args.layout_cache_ttl)
+    app_module.request_queue = RequestQueue(
+        max_concurrent=args.max_concurrent,
+        cooldown_period=args.cooldown,
+        circuit_breaker=dsa.UPSTREAM_BREAKER,
+        merge_limit=args.merge_limit
+    )
+    app_module.request_queue.register_handler(app_module.process_seat_request, app_module.process_seat_requests)
+
+    dates = journey_dates(args.dates)
+    pending = list(range(args.searches))
+    timings = {phase: [] for phase in PHASES}
+    outcomes = {"ok": 0, "failed": 0, "rejected": 0}
+    lock = threading.Lock()
+
+    def client_loop():
+        client = app_module.app.test_client()
+        while True:
+            with lock:
+                if not pending:
+                    return
+                index = pending.pop()
+            form = {
+                "origin": "Dhaka",
+                "destination": "Chattogram",
+                "date": dates[index % len(dates)],
+                "auth_token": "benchmark",
+                "device_key": "benchmark"
+            }
+            run_search(client, form, args.poll_interval, timings, outcomes, lock)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client_loop) for _ in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stub.stop()
+
+    report = {
+        "searches": args.searches,
+        "clients": args.clients,
+        "merged": app_module.request_queue.get_queue_stats()["merged_requests"],
+        "elapsed": elapsed,
+        "throughput": outcomes["ok"] / elapsed if elapsed else 0.0,
+        "outcomes": outcomes,
+        "phases": {phase: summarize(values) for phase, values in timings.items()},
+        "upstream": stub.get_stats()
+    }
+
+    print(f"{args.searches} searches from {args.clients} clients in {elapsed:.2f}s: {report['throughput']:.2f} searches/s "
+          f"(ok {outcomes['ok']}, failed {outcomes['failed']}, rejected {outcomes['rejected']}, merged {report['merged']})")
+    print(f"{'phase':<14} {'count':>6} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for phase, stats in report["phases"].items():
+        print(f"{phase:<14} {stats['count']:>6} {stats['mean'] * 1000:>9.1f} {stats['p50'] * 1000:>9.1f} {stats['p95'] * 1000:>9.1f} {stats['p99'] * 1000:>9.1f}")
+    print(f"upstream calls: {json.dumps(report['upstream'])}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2)
+
+if __name__ == "__main__":
+    main()
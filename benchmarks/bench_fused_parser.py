@@ -0,0 +1,121 @@
+import argparse, time, tracemalloc
+
+import synthetic
+import detailsSeatAvailability as dsa
+from detailsSeatAvailability import SEAT_AVAILABILITY, analyze_seat_layout, group_by_prefix, parse_seat_layout
+
+def legacy_parse(data):
+    seat_layout = data.get("data", {}).get("seatLayout", [])
+    seats = [(seat["seat_number"], seat["seat_availability"], seat["ticket_type"])
+             for layout in seat_layout
+             for row in layout["layout"]
+             for seat in row]
+    available_seats = [num for num, avail, _ in seats if avail == SEAT_AVAILABILITY['AVAILABLE']]
+    booking_process_seats = [num for num, avail, ttype in seats
+                             if avail == SEAT_AVAILABILITY['IN_PROCESS'] and ttype in {1, 2, 3}]
+    seat_type = {
+        "available_seats": sorted(available_seats, key=dsa.sort_seat_number),
+        "booking_process_seats": sorted(booking_process_seats, key=dsa.sort_seat_number),
+        "ticket_types": analyze_seat_layout(data)
+    }
+
+    seat_type['grouped_seats'] = group_by_prefix(seat_type['available_seats'])
+    seat_type['grouped_booking_process'] = group_by_prefix(seat_type['booking_process_seats'])
+    issued_seats = []
+    for type_id in [1, 3]:
+        if type_id in seat_type['ticket_types']:
+            issued_seats.extend(seat_type['ticket_types'][type_id].get('seats', []))
+    issued_seats = sorted(issued_seats, key=dsa.sort_seat_number)
+    grouped_issued = group_by_prefix(issued_seats)
+    seat_type['grouped_ticket_types'] = {
+        t: group_by_prefix(info['seats']) for t, info in seat_type.get('ticket_types', {}).items()
+        if 'seats' in info
+    }
+    seat_type['ticket_types']['issued_combined'] = {
+        'label': 'Issued Tickets to Buy',
+        'seats': issued_seats,
+        'count': len(issued_seats),
+        'grouped': grouped_issued
+    }
+    return seat_type
+
+def fused_parse(data):
+    available_seats, booking_process_seats, _, _, _, _, ticket_types, views = parse_seat_layout(data)
+    seat_type = {
+        "available_seats": available_seats,
+        "booking_process_seats": booking_process_seats,
+        "ticket_types": ticket_types
+    }
+    seat_type.update(views)
+    return seat_type
+
+class CountingFloor(dict):
+    counts = None
+
+    def __getitem__(self, key):
+        if key == "layout":
+            self.counts["layout_walks"] += 1
+        return super().__getitem__(key)
+
+def count_calls(func, layouts):
+    counts = {"sort_keys": 0, "groupings": 0, "layout_walks": 0}
+    CountingFloor.counts = counts
+    layouts = [{"data": {"seatLayout": [CountingFloor(floor) for floor in data["data"]["seatLayout"]]}} for data in layouts]
+    original_key, original_group = dsa.sort_seat_number, dsa.group_by_prefix
+
+    def counting_key(seat):
+        counts["sort_keys"] += 1
+        return original_key(seat)
+
+    def counting_group(seats):
+        counts["groupings"] += 1
+        return original_group(seats)
+
+    dsa.sort_seat_number, dsa.group_by_prefix = counting_key, counting_group
+    globals()["group_by_prefix"] = counting_group
+    try:
+        for data in layouts:
+            func(data)
+    finally:
+        dsa.sort_seat_number, dsa.group_by_prefix = original_key, original_group
+        globals()["group_by_prefix"] = original_group
+    return counts
+
+def measure(func, layouts, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for data in layouts:
+            func(data)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    for data in layouts:
+        func(data)
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+    return best, peak, blocks
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the legacy multi-pass seat parsing with the fused parser.")
+    parser.add_argument("--layouts", type=int, default=60)
+    parser.add_argument("--seats-per-coach", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    layouts = [synthetic.make_layout(seats_per_coach=args.seats_per_coach, seed=seed) for seed in range(args.layouts)]
+    for data in layouts:
+        assert legacy_parse(data) == fused_parse(data), "fused parser output differs from legacy output"
+
+    seats = sum(len(row) for data in layouts for floor in data["data"]["seatLayout"] for row in floor["layout"])
+    print(f"{args.layouts} layouts, {seats} seat cells")
+    print(f"{'parser':<8} {'time (ms)':>10} {'peak KiB':>10} {'live blocks':>12} {'coach walks':>12} {'sort keys':>10} {'groupings':>10}")
+    for name, func in (("legacy", legacy_parse), ("fused", fused_parse)):
+        elapsed, peak, blocks = measure(func, layouts, args.repeat)
+        counts = count_calls(func, layouts)
+        print(f"{name:<8} {elapsed * 1000:>10.1f} {peak / 1024:>10.0f} {blocks:>12} {counts['layout_walks']:>12} {counts['sort_keys']:>10} {counts['groupings']:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import argparse, json, os, platform, random, statistics, subprocess, sys, time
+from datetime import datetime
+
+import synthetic
+import detailsSeatAvailability as dsa
+
+def realistic_layouts(count, seed):
+    rng = random.Random(seed)
+    return [
+        synthetic.make_layout(
+            seats_per_coach=rng.randint(40, 110),
+            seed=seed + i,
+            three_part_ratio=0.1,
+            unknown_coaches=True
+        )
+        for i in range(count)
+    ]
+
+def layout_seat_numbers(layout):
+    return [seat["seat_number"] for floor in layout["data"]["seatLayout"] for row in floor["layout"] for seat in row if seat["seat_number"]]
+
+def build_cases(args):
+    layouts = realistic_layouts(args.layouts, args.seed)
+    seat_lists = [layout_seat_numbers(layout) for layout in layouts]
+    for seats in seat_lists:
+        random.Random(args.seed).shuffle(seats)
+    parsed = [dsa.parse_seat_layout(layout) for layout in layouts]
+    sorted_lists = [dsa.sort_seats(seats) for seats in seat_lists]
+
+    trains, search_layouts = synthetic.make_search(trains=args.trains, seat_types=args.seat_types, seats_per_coach=args.seats_per_coach)
+    train_data = trains["data"]["trains"]
+    search_parsed = [dsa.parse_seat_layout(search_layouts[trip_id]) for trip_id, _ in dsa.seat_layout_jobs(train_data)]
+
+    def post_process():
+        from app import annotate_train_details
+        from seat_results import compact_result
+        result = dsa.build_result(train_data, [dsa.copy_layout(layout) for layout in search_parsed])
+        for details in result.values():
+            annotate_train_details(details, "Dhaka", "Chattogram")
+        return compact_result(result)
+
+    return {
+        "sort_seat_number": (len(seat_lists), lambda: [sorted(seats, key=dsa.sort_seat_number) for seats in seat_lists]),
+        "sort_seats": (len(seat_lists), lambda: [dsa.sort_seats(seats) for seats in seat_lists]),
+        "analyze_seat_layout": (len(layouts), lambda: [dsa.analyze_seat_layout(layout) for layout in layouts]),
+        "parse_seat_layout": (len(layouts), lambda: [dsa.parse_seat_layout(layout) for layout in layouts]),
+        "copy_layout": (len(parsed), lambda: [dsa.copy_layout(layout) for layout in parsed]),
+        "group_by_prefix": (len(sorted_lists), lambda: [dsa.group_by_prefix(seats) for seats in sorted_lists]),
+        "process_seat_request_post": (1, post_process)
+    }
+
+def measure(func, items, repeat, min_time):
+    func()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - start >= min_time:
+            break
+        number *= 2
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / (number * items))
+    return {"min": min(samples), "median": statistics.median(samples), "items": items, "loops": number}
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline, threshold):
+    regressions = []
+    print(f"{'case':<28} {'baseline us':>12} {'current us':>11} {'change':>8}")
+    for name, stats in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            print(f"{name:<28} {'-':>12} {stats['min'] * 1e6:>11.1f} {'new':>8}")
+            continue
+        change = stats["min"] / previous["min"] - 1
+        flag = " REGRESSION" if change > threshold else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:<28} {previous['min'] * 1e6:>12.1f} {stats['min'] * 1e6:>11.1f} {change:>+8.1%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the CPU-side seat parsing, sorting and grouping hot paths.")
+    parser.add_argument("--layouts", type=int, default=20)
+    parser.add_argument("--trains", type=int, default=15)
+    parser.add_argument("--seat-types", type=int, default=4)
+    parser.add_argument("--seats-per-coach", type=int, default=80)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum seconds per timed round")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--case", action="append", help="only run the named case (repeatable)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    cases = build_cases(args)
+    if args.case:
+        unknown = set(args.case) - set(cases)
+        if unknown:
+            parser.error(f"unknown case(s): {', '.join(sorted(unknown))}; choose from {', '.join(cases)}")
+        cases = {name: cases[name] for name in args.case}
+
+    results = {}
+    print(f"{'case':<28} {'min us/item':>12} {'median us/item':>15} {'loops':>6}")
+    for name, (items, func) in cases.items():
+        stats = measure(func, items, args.repeat, args.min_time)
+        results[name] = stats
+        print(f"{name:<28} {stats['min'] * 1e6:>12.1f} {stats['median'] * 1e6:>15.1f} {stats['loops']:>6}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "params": {key: value for key, value in vars(args).items() if key not in ("output", "compare")}
+        },
+        "unit": "seconds per item",
+        "results": results
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        print(f"\nagainst {args.compare} (revision {baseline.get('meta', {}).get('revision')})")
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import argparse, json, os, resource, subprocess, sys, tempfile, time
+
+import synthetic
+from detailsSeatAvailability import parse_seat_layout, parse_seat_layout_stream
+
+def max_rss_kib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def run_worker(mode, paths):
+    baseline = max_rss_kib()
+    start = time.perf_counter()
+    results = []
+    for path in paths:
+        with open(path, 'rb') as payload:
+            if mode == "json":
+                layout = parse_seat_layout(json.loads(payload.read().decode('utf-8')))
+            else:
+                layout = parse_seat_layout_stream(payload)
+        results.append(layout[2])
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"baseline": baseline, "peak": max_rss_kib(), "elapsed": elapsed, "available": sum(results)}))
+
+def write_payloads(directory, count, seats_per_coach):
+    paths = []
+    for seed in range(count):
+        path = os.path.join(directory, f"seat_layout_{seed}.json")
+        with open(path, 'w', encoding='utf-8') as payload:
+            json.dump(synthetic.make_layout(seats_per_coach=seats_per_coach, seed=seed, detailed=True), payload)
+        paths.append(path)
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare peak RSS of json.loads parsing and streaming parsing of seat-layout payloads.")
+    parser.add_argument("--payload-dir", help="directory of recorded seat-layout responses (*.json); synthetic payloads are generated when omitted")
+    parser.add_argument("--payloads", type=int, default=20)
+    parser.add_argument("--seats-per-coach", type=int, default=120)
+    parser.add_argument("--worker", choices=["json", "stream"], help=argparse.SUPPRESS)
+    parser.add_argument("paths", nargs="*", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.paths)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.payload_dir:
+            paths = sorted(os.path.join(args.payload_dir, name) for name in os.listdir(args.payload_dir) if name.endswith(".json"))
+        else:
+            paths = write_payloads(directory, args.payloads, args.seats_per_coach)
+
+        largest = max(os.path.getsize(path) for path in paths)
+        print(f"{len(paths)} payloads, largest {largest / 1024:.0f} KiB")
+        print(f"{'mode':<8} {'peak RSS MiB':>13} {'above baseline MiB':>19} {'time (s)':>9}")
+        outputs = {}
+        for mode in ("json", "stream"):
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", mode] + paths,
+                                    capture_output=True, text=True, check=True).stdout
+            outputs[mode] = stats = json.loads(output)
+            print(f"{mode:<8} {stats['peak'] / 1024:>13.1f} {(stats['peak'] - stats['baseline']) / 1024:>19.1f} {stats['elapsed']:>9.2f}")
+        assert outputs["json"]["available"] == outputs["stream"]["available"], "streaming parse disagrees with json parse"
+
+if __name__ == "__main__":
+    main()
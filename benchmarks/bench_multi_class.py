@@ -0,0 +1,80 @@
+import argparse, random, time
+
+import synthetic
+import detailsSeatAvailability as dsa
+from upstream_stub import UpstreamStub, SEARCH, SEAT_LAYOUT
+
+def make_trains(trains, seat_classes, classes_per_train, seed=0):
+    rng = random.Random(seed)
+    train_list = []
+    for t in range(trains):
+        types = [{"type": seat_class, "trip_id": f"{t}-{seat_class}", "trip_route_id": str(t)}
+                 for seat_class in rng.sample(seat_classes, min(classes_per_train, len(seat_classes)))]
+        train_list.append({
+            "trip_number": f"TRAIN {700 + t}",
+            "departure_date_time": f"15 Oct, 0{1 + t % 9}:00 am",
+            "arrival_date_time": f"15 Oct, 1{t % 9}:30 pm",
+            "seat_types": types
+        })
+    return train_list
+
+def make_stub(train_list, latency, seats_per_coach):
+    layout = synthetic.make_layout(seats_per_coach=seats_per_coach)
+    layouts = {seat_type["trip_id"]: layout for train in train_list for seat_type in train["seat_types"]}
+    return UpstreamStub({"data": {"trains": train_list}}, layouts, latency={SEARCH: latency, SEAT_LAYOUT: latency})
+
+def upstream_calls(stub):
+    stats = stub.get_stats()
+    return {endpoint: sum(stats.get(endpoint, {}).values()) for endpoint in (SEARCH, SEAT_LAYOUT)}
+
+def run(stub, config):
+    stub.reset_stats()
+    start = time.perf_counter()
+    result = dsa.main(config)
+    return time.perf_counter() - start, result, upstream_calls(stub)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare one multi-class search with separate per-class searches against a local stub upstream.")
+    parser.add_argument("--trains", type=int, default=12)
+    parser.add_argument("--classes", type=int, default=4)
+    parser.add_argument("--classes-per-train", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.1, help="stub latency per upstream call in seconds")
+    parser.add_argument("--seats-per-coach", type=int, default=60)
+    parser.add_argument("--workers", type=int, default=4, help="seat_layout_workers")
+    args = parser.parse_args()
+
+    seat_classes = dsa.SEAT_CLASSES[:args.classes]
+    train_list = make_trains(args.trains, seat_classes, args.classes_per_train)
+    stub = make_stub(train_list, args.latency, args.seats_per_coach)
+    dsa.API_BASE_URL = stub.start()
+
+    config = {
+        "from_city": "Dhaka",
+        "to_city": "Chattogram",
+        "date_of_journey": "15-Oct-2025",
+        "auth_token": "benchmark",
+        "device_key": "benchmark",
+        "seat_layout_workers": args.workers
+    }
+
+    print(f"{args.trains} trains, {len(seat_classes)} classes ({args.classes_per_train} per train), {args.latency * 1000:.0f} ms per upstream call")
+    print(f"{'mode':<12} {'seconds':>8} {'searches':>9} {'layouts':>8} {'seat types':>11}")
+
+    separate_time = 0
+    separate_calls = {SEARCH: 0, SEAT_LAYOUT: 0}
+    seat_types = 0
+    for seat_class in seat_classes:
+        elapsed, result, calls = run(stub, dict(config, seat_classes=[seat_class]))
+        separate_time += elapsed
+        seat_types += sum(len(details["seat_data"]) for details in result.values())
+        for endpoint in separate_calls:
+            separate_calls[endpoint] += calls[endpoint]
+    print(f"{'separate':<12} {separate_time:>8.2f} {separate_calls[SEARCH]:>9} {separate_calls[SEAT_LAYOUT]:>8} {seat_types:>11}")
+
+    elapsed, result, calls = run(stub, dict(config, seat_classes=seat_classes))
+    seat_types = sum(len(details["seat_data"]) for details in result.values())
+    print(f"{'combined':<12} {elapsed:>8.2f} {calls[SEARCH]:>9} {calls[SEAT_LAYOUT]:>8} {seat_types:>11}")
+    stub.stop()
+
+if __name__ == "__main__":
+    main()
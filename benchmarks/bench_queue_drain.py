@@ -0,0 +1,65 @@
+import argparse, random, statistics, time
+
+import synthetic
+from request_queue import RequestQueue
+
+def upstream_call(latency):
+    time.sleep(latency)
+    return {"ok": True}
+
+def wait_for(request_queue, request_ids):
+    pending = set(request_ids)
+    while pending:
+        pending = {request_id for request_id in pending if request_queue.get_request_status(request_id)["status"] not in ("completed", "failed")}
+        time.sleep(0.005)
+
+def drain(workers, requests, latency, cooldown):
+    request_queue = RequestQueue(max_concurrent=workers, cooldown_period=cooldown, cleanup_interval=3600, heartbeat_timeout=3600)
+    wait_for(request_queue, [request_queue.add_request(upstream_call, {"latency": latency}) for _ in range(workers)])
+
+    start = time.perf_counter()
+    request_ids = [request_queue.add_request(upstream_call, {"latency": latency}) for _ in range(requests)]
+    estimate = request_queue.get_request_status(request_ids[-1])["estimated_time"]
+    wait_for(request_queue, request_ids)
+    elapsed = time.perf_counter() - start
+
+    stats = request_queue.get_queue_stats()
+    return elapsed, estimate, stats["avg_processing_time"]
+
+def pickup_latency(samples, seed):
+    request_queue = RequestQueue(max_concurrent=1, cooldown_period=0, cleanup_interval=3600, heartbeat_timeout=3600)
+    rng = random.Random(seed)
+    latencies = []
+    for _ in range(samples):
+        time.sleep(rng.uniform(0, 0.5))
+        started = []
+        enqueued = time.perf_counter()
+        request_id = request_queue.add_request(lambda: started.append(time.perf_counter()), {})
+        wait_for(request_queue, [request_id])
+        latencies.append(started[0] - enqueued)
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description="Drain a burst of queued requests with different RequestQueue worker pool sizes.")
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--workers", type=int, action="append", help="pool sizes to try (repeatable, default 1, 2, 4, 8)")
+    parser.add_argument("--latency", type=float, default=0.25, help="seconds each simulated search takes")
+    parser.add_argument("--cooldown", type=float, default=0.5, help="per-worker cooldown_period in seconds")
+    parser.add_argument("--pickup-samples", type=int, default=30, help="requests sent one at a time to an idle queue")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    latencies = pickup_latency(args.pickup_samples, args.seed)
+    print(f"enqueue-to-start on an idle queue: median {statistics.median(latencies) * 1000:.2f} ms, max {max(latencies) * 1000:.2f} ms "
+          f"over {len(latencies)} requests\n")
+
+    print(f"{args.requests} requests of {args.latency * 1000:.0f} ms, {args.cooldown * 1000:.0f} ms cooldown per worker")
+    print(f"{'workers':>7} {'drain s':>8} {'speedup':>8} {'estimate s':>11} {'avg processing s':>17}")
+    baseline = None
+    for workers in args.workers or [1, 2, 4, 8]:
+        elapsed, estimate, avg_processing = drain(workers, args.requests, args.latency, args.cooldown)
+        baseline = baseline or elapsed
+        print(f"{workers:>7} {elapsed:>8.2f} {baseline / elapsed:>7.1f}x {estimate:>11} {avg_processing:>17.2f}")
+
+if __name__ == "__main__":
+    main()
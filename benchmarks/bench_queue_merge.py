@@ -0,0 +1,62 @@
+import argparse, json, logging, os, time
+
+from upstream_stub import add_stub_arguments, stub_from_args
+
+def search_params(index, routes):
+    return {
+        "origin": "Dhaka",
+        "destination": "Chattogram",
+        "formatted_date": f"{index % routes + 1:02d}-Nov-2026",
+        "form_values": {"seat_classes": ["S_CHAIR"]},
+        "auth_token": f"user-{index}",
+        "device_key": f"user-{index}"
+    }
+
+def drain(request_queue, search, searches, routes):
+    start = time.perf_counter()
+    request_ids = [request_queue.add_request(search, search_params(index, routes), merge_key=(index % routes,)) for index in range(searches)]
+    pending = set(request_ids)
+    while pending:
+        pending = {request_id for request_id in pending if request_queue.get_request_status(request_id)["status"] not in ("completed", "failed")}
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+
+    results = [request_queue.get_request_result(request_id) for request_id in request_ids]
+    failed = sum(1 for result in results if "success" not in result)
+    return elapsed, failed, request_queue.get_queue_stats()["merged_requests"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Drain queued searches with and without merging requests for the same route and date.")
+    add_stub_arguments(parser)
+    parser.add_argument("--searches", type=int, default=32)
+    parser.add_argument("--routes", type=int, action="append", help="distinct route/date keys the searches spread over (repeatable, default 32, 8, 2, 1)")
+    parser.add_argument("--merge-limit", type=int, default=8)
+    parser.add_argument("--seat-layout-workers", type=int, default=4)
+    args = parser.parse_args()
+
+    stub = stub_from_args(args)
+    os.environ["RAILWAY_API_BASE_URL"] = stub.start()
+
+    import app as app_module
+    import detailsSeatAvailability as dsa
+    from request_queue import RequestQueue
+
+    dsa.API_BASE_URL = os.environ["RAILWAY_API_BASE_URL"]
+    app_module.logger.setLevel(logging.WARNING)
+    app_module.CONFIG["seat_layout_workers"] = args.seat_layout_workers
+    dsa.configure_rate_limiter()
+    dsa.configure_seat_layout_cache(ttl=0)
+
+    print(f"{args.searches} searches, one queue worker, merge_limit {args.merge_limit}")
+    print(f"{'routes':>6} {'merge':>6} {'drain s':>8} {'searches/s':>11} {'merged':>7} {'failed':>7}  upstream calls")
+    for routes in args.routes or [32, 8, 2, 1]:
+        for merge_limit in (1, args.merge_limit):
+            stub.reset_stats()
+            request_queue = RequestQueue(max_concurrent=1, cooldown_period=0, cleanup_interval=3600, heartbeat_timeout=3600, merge_limit=merge_limit)
+            request_queue.register_handler(app_module.process_seat_request, app_module.process_seat_requests)
+            elapsed, failed, merged = drain(request_queue, app_module.process_seat_request, args.searches, routes)
+            print(f"{routes:>6} {merge_limit:>6} {elapsed:>8.2f} {args.searches / elapsed:>11.2f} {merged:>7} {failed:>7}  {json.dumps(stub.get_stats())}")
+    stub.stop()
+
+if __name__ == "__main__":
+    main()
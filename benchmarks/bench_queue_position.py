@@ -0,0 +1,83 @@
+import argparse, os, random, tempfile, threading, time
+from collections import OrderedDict
+from datetime import datetime
+
+import synthetic
+from request_queue import RequestQueue
+from queue_backend import SQLiteQueueBackend
+
+def scan_position(queue_order, cancelled, request_id):
+    if request_id not in queue_order:
+        return 0
+
+    position = 1
+    target_time = queue_order[request_id]
+    for rid, timestamp in queue_order.items():
+        if timestamp < target_time and rid not in cancelled:
+            position += 1
+        elif rid == request_id:
+            break
+    return position
+
+def fill_queue(requests, cancel_fraction, seed, backend=None):
+    release = threading.Event()
+    request_queue = RequestQueue(max_concurrent=1, cooldown_period=0, cleanup_interval=3600, heartbeat_timeout=3600, backend=backend)
+    request_queue.add_request(release.wait, {})
+    while request_queue.get_queue_stats()["processing"] == 0:
+        time.sleep(0.01)
+
+    request_ids = [request_queue.add_request(release.wait, {}) for _ in range(requests)]
+    rng = random.Random(seed)
+    cancelled = set(rng.sample(request_ids, int(requests * cancel_fraction)))
+    cancel_times = []
+    for request_id in cancelled:
+        start = time.perf_counter()
+        request_queue.cancel_request(request_id)
+        cancel_times.append(time.perf_counter() - start)
+    return request_queue, release, request_ids, cancelled, cancel_times
+
+def scan_state(request_ids, cancelled):
+    start = datetime.now()
+    queue_order = OrderedDict((request_id, start.replace(microsecond=i % 1000000)) for i, request_id in enumerate(request_ids))
+    for request_id in cancelled:
+        del queue_order[request_id]
+    return queue_order
+
+def best_of(repeat, func, request_ids):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for request_id in request_ids:
+            func(request_id)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Time one polling round of queue position lookups: every waiting browser asks for its position once.")
+    parser.add_argument("--requests", type=int, action="append", help="queued requests (repeatable, default 500, 1000, 5000)")
+    parser.add_argument("--cancel-fraction", type=float, default=0.2, help="share of requests cancelled before polling")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    args = parser.parse_args()
+
+    print(f"{'queued':>7} {'live':>6} {'scan ms/round':>14} {'indexed ms/round':>17} {'speedup':>8} {'cancel ms total':>16}")
+    for requests in args.requests or [500, 1000, 5000]:
+        backend = None
+        if args.backend == "sqlite":
+            backend = SQLiteQueueBackend(os.path.join(tempfile.mkdtemp(), "queue.sqlite3"))
+        request_queue, release, request_ids, cancelled, cancel_times = fill_queue(requests, args.cancel_fraction, args.seed, backend)
+        live = [request_id for request_id in request_ids if request_id not in cancelled]
+        queue_order = scan_state(request_ids, cancelled)
+
+        for expected, request_id in enumerate(live, start=1):
+            status = request_queue.get_request_status(request_id)
+            assert status["position"] == expected == scan_position(queue_order, cancelled, request_id), request_id
+
+        scan = best_of(args.repeat, lambda request_id: scan_position(queue_order, cancelled, request_id), live)
+        indexed = best_of(args.repeat, request_queue.get_request_status, live)
+        print(f"{requests:>7} {len(live):>6} {scan * 1000:>14.1f} {indexed * 1000:>17.1f} {scan / indexed:>7.0f}x {sum(cancel_times) * 1000:>16.1f}")
+        release.set()
+
+if __name__ == "__main__":
+    main()
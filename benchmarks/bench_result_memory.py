@@ -0,0 +1,44 @@
+import argparse, gc, json, tracemalloc
+
+import synthetic
+import detailsSeatAvailability as dsa
+from seat_results import compact_result, get_vocabulary_size
+
+def build_result(trains_payload, layout_payloads):
+    train_data = json.loads(trains_payload)["data"]["trains"]
+    layouts = [dsa.parse_seat_layout(json.loads(layout_payloads[trip_id])) for trip_id, _ in dsa.seat_layout_jobs(train_data)]
+    return dsa.build_result(train_data, layouts)
+
+def retained_bytes(store, trains_payload, layout_payloads, results):
+    gc.collect()
+    tracemalloc.start()
+    stored = [store(build_result(trains_payload, layout_payloads)) for _ in range(results)]
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del stored
+    return current, peak
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare memory retained by stored search results as dicts and as compact objects.")
+    parser.add_argument("--trains", type=int, default=15)
+    parser.add_argument("--seat-types", type=int, default=4)
+    parser.add_argument("--seats-per-coach", type=int, default=80)
+    parser.add_argument("--results", type=int, default=20)
+    args = parser.parse_args()
+
+    trains, layouts = synthetic.make_search(trains=args.trains, seat_types=args.seat_types, seats_per_coach=args.seats_per_coach)
+    trains_payload = json.dumps(trains)
+    layout_payloads = {trip_id: json.dumps(layout) for trip_id, layout in layouts.items()}
+
+    print(f"{args.results} stored results, {args.trains} trains x {args.seat_types} seat types each")
+    print(f"{'representation':<16} {'retained KiB':>13} {'KiB/result':>11} {'peak KiB':>10}")
+    baseline = None
+    for name, store in (("dict", lambda result: result), ("compact", compact_result)):
+        current, peak = retained_bytes(store, trains_payload, layout_payloads, args.results)
+        baseline = baseline or current
+        print(f"{name:<16} {current / 1024:>13.0f} {current / 1024 / args.results:>11.1f} {peak / 1024:>10.0f}")
+    print(f"seat vocabulary: {get_vocabulary_size()} interned seat numbers shared by all results")
+
+if __name__ == "__main__":
+    main()
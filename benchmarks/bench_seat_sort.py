@@ -0,0 +1,49 @@
+import argparse, random, time
+
+import synthetic
+import detailsSeatAvailability as dsa
+from detailsSeatAvailability import sort_seat_number, sort_seats
+
+def layout_seats(count, seed):
+    rng = random.Random(seed)
+    lists = []
+    for i in range(count):
+        data = synthetic.make_layout(seats_per_coach=rng.randint(40, 110), seed=seed + i)
+        seats = [seat["seat_number"] for floor in data["data"]["seatLayout"] for row in floor["layout"] for seat in row]
+        lists.append(seats)
+    return lists
+
+def best_of(repeat, func, lists):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for seats in lists:
+            func(seats)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Time sort_seats against sorted(key=sort_seat_number).")
+    parser.add_argument("--layouts", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    lists = layout_seats(args.layouts, args.seed)
+    seats = sum(len(s) for s in lists)
+    legacy = best_of(args.repeat, lambda s: sorted(s, key=sort_seat_number), lists)
+    dsa._SEAT_KEY_CACHE.clear()
+    start = time.perf_counter()
+    for s in lists:
+        sort_seats(s)
+    cold = time.perf_counter() - start
+    warm = best_of(args.repeat, sort_seats, lists)
+
+    print(f"{args.layouts} seat lists, {seats} seats, {len(dsa._SEAT_KEY_CACHE)} distinct seat numbers")
+    print(f"{'method':<32} {'time (ms)':>10} {'speedup':>8}")
+    print(f"{'sorted(key=sort_seat_number)':<32} {legacy * 1000:>10.1f} {1:>8.2f}")
+    print(f"{'sort_seats (cold key cache)':<32} {cold * 1000:>10.1f} {legacy / cold:>8.2f}")
+    print(f"{'sort_seats (warm key cache)':<32} {warm * 1000:>10.1f} {legacy / warm:>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import random, sys, os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detailsSeatAvailability import BANGLA_COACH_ORDER
+
+UNKNOWN_COACHES = ["EXTRA", "PWR", "ZZ"]
+
+def make_seat(seat_number, rng, detailed=False):
+    seat = {
+        "seat_number": seat_number,
+        "seat_availability": rng.choices([0, 1, 2], weights=[70, 20, 10])[0],
+        "ticket_type": rng.choices([1, 2, 3, 4, 5], weights=[50, 15, 20, 10, 5])[0]
+    }
+    if detailed:
+        seat.update({
+            "seat_id": rng.randint(10000000, 99999999),
+            "seat_type": "S_CHAIR",
+            "fare": round(rng.uniform(200, 1500), 2),
+            "vat_amount": round(rng.uniform(0, 100), 2),
+            "is_window": rng.random() < 0.4,
+            "display_name": seat_number.replace("-", " "),
+            "meta": {"row": rng.randint(1, 20), "column": rng.randint(1, 5)}
+        })
+    return seat
+
+def make_layout(coaches=None, seats_per_coach=80, seats_per_row=5, seed=0, three_part_ratio=0.1, unknown_coaches=True, detailed=False):
+    rng = random.Random(seed)
+    coaches = list(coaches or BANGLA_COACH_ORDER)
+    if unknown_coaches:
+        coaches += UNKNOWN_COACHES
+
+    floors = []
+    for coach in coaches:
+        three_part = rng.random() < three_part_ratio
+        seats = []
+        for number in range(1, seats_per_coach + 1):
+            if three_part:
+                seat_number = f"{coach}-{rng.choice('AB')}-{number}"
+            else:
+                seat_number = f"{coach}-{number}"
+            seats.append(make_seat(seat_number, rng, detailed))
+        if rng.random() < 0.2:
+            seats.append(make_seat(f"{coach}-X{rng.randint(1, 9)}", rng, detailed))
+        rows = [seats[i:i + seats_per_row] for i in range(0, len(seats), seats_per_row)]
+        for row in rows:
+            if rng.random() < 0.1:
+                row.append({"seat_number": "", "seat_availability": 0, "ticket_type": 0})
+        rng.shuffle(rows)
+        floors.append({"floor_name": coach, "layout": rows})
+
+    rng.shuffle(floors)
+    return {"data": {"seatLayout": floors}}
+
+def make_search(trains=15, seat_types=4, **layout_kwargs):
+    layouts = {}
+    train_list = []
+    for t in range(trains):
+        types = []
+        for s in range(seat_types):
+            trip_id = f"{t}-{s}"
+            layouts[trip_id] = make_layout(seed=t * 100 + s, **layout_kwargs)
+            types.append({"type": f"TYPE_{s}", "trip_id": trip_id, "trip_route_id": str(t)})
+        train_list.append({
+            "trip_number": f"TRAIN {700 + t}",
+            "departure_date_time": f"{10 + t % 15} Oct, 0{1 + t % 9}:00 am",
+            "arrival_date_time": f"{10 + t % 15} Oct, 1{t % 9}:30 pm",
+            "seat_types": types
+        })
+    return {"data": {"trains": train_list}}, layouts
@@ -0,0 +1,214 @@
+import argparse, json, os, random, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import synthetic
+
+SEARCH = "search"
+SEAT_LAYOUT = "seat_layout"
+ENDPOINTS = {
+    "/app/bookings/search-trips-v2": SEARCH,
+    "/app/bookings/seat-layout": SEAT_LAYOUT
+}
+
+FAULT_BODIES = {
+    401: {"error": {"messages": ["Invalid User Access Token!"]}},
+    403: {"error": {"messages": ["Forbidden"]}},
+    422: {"error": {"messages": {"message": "You have reached the maximum order limit for this trip.", "errorKey": "OrderLimitExceeded"}}},
+    500: {"error": {"messages": ["Internal Server Error"]}},
+    502: {"error": {"messages": ["Bad Gateway"]}},
+    503: {"error": {"messages": ["Service Unavailable"]}}
+}
+
+class UpstreamStub:
+    def __init__(self, search_payload, layouts, latency=None, jitter=0.0, faults=None, seed=0):
+        self.search_payload = search_payload
+        self.layouts = {trip_id: self._encode(layout) for trip_id, layout in layouts.items()}
+        self.latency = {SEARCH: 0.0, SEAT_LAYOUT: 0.0, **(latency or {})}
+        self.jitter = jitter
+        self.faults = faults or {}
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.server = None
+
+    @classmethod
+    def synthetic(cls, trains=15, seat_types=4, seats_per_coach=80, detailed=False, **kwargs):
+        search_payload, layouts = synthetic.make_search(trains=trains, seat_types=seat_types, seats_per_coach=seats_per_coach, detailed=detailed)
+        return cls(search_payload, layouts, **kwargs)
+
+    @classmethod
+    def from_directory(cls, path, **kwargs):
+        with open(os.path.join(path, "search.json"), encoding='utf-8') as payload:
+            search_payload = json.load(payload)
+        layouts = {}
+        layout_dir = os.path.join(path, "seat_layout")
+        for name in os.listdir(layout_dir):
+            if name.endswith(".json"):
+                with open(os.path.join(layout_dir, name), encoding='utf-8') as payload:
+                    layouts[name[:-len(".json")]] = json.load(payload)
+        return cls(search_payload, layouts, **kwargs)
+
+    def save(self, path):
+        os.makedirs(os.path.join(path, "seat_layout"), exist_ok=True)
+        with open(os.path.join(path, "search.json"), 'w', encoding='utf-8') as payload:
+            json.dump(self.search_payload, payload)
+        for trip_id, body in self.layouts.items():
+            with open(os.path.join(path, "seat_layout", f"{trip_id}.json"), 'wb') as payload:
+                payload.write(body)
+
+    @staticmethod
+    def _encode(payload):
+        return json.dumps(payload).encode('utf-8')
+
+    def search_body(self, seat_class):
+        trains = self.search_payload.get("data", {}).get("trains", [])
+        matching = [train for train in trains if any(seat_type["type"] == seat_class for seat_type in train["seat_types"])]
+        if matching or not seat_class:
+            return self._encode({"data": {"trains": matching}})
+        return self._encode(self.search_payload)
+
+    def _pick_fault(self, endpoint):
+        faults = self.faults.get(endpoint, {})
+        if not faults:
+            return None
+        with self.lock:
+            roll = self.rng.random()
+        for status, probability in faults.items():
+            if roll < probability:
+                return status
+            roll -= probability
+        return None
+
+    def _delay(self, endpoint):
+        delay = self.latency.get(endpoint, 0.0)
+        if self.jitter:
+            with self.lock:
+                delay += self.rng.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _count(self, endpoint, status):
+        with self.lock:
+            self.counts[(endpoint, status)] = self.counts.get((endpoint, status), 0) + 1
+
+    def handle(self, path, query):
+        endpoint = ENDPOINTS.get(path)
+        if endpoint is None:
+            return 404, b'{}'
+
+        self._delay(endpoint)
+        status = self._pick_fault(endpoint)
+        if status is not None:
+            body = self._encode(FAULT_BODIES.get(status, {"error": {"messages": ["Injected fault"]}}))
+        elif endpoint == SEARCH:
+            status, body = 200, self.search_body(query.get("seat_class", [""])[0])
+        else:
+            body = self.layouts.get(query.get("trip_id", [""])[0])
+            status = 200 if body is not None else 404
+            body = body if body is not None else b'{}'
+        self._count(endpoint, status)
+        return status, body
+
+    def get_stats(self):
+        with self.lock:
+            stats = {}
+            for (endpoint, status), count in sorted(self.counts.items()):
+                stats.setdefault(endpoint, {})[str(status)] = count
+            return stats
+
+    def reset_stats(self):
+        with self.lock:
+            self.counts.clear()
+
+    def start(self, host="127.0.0.1", port=0):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                status, body = stub.handle(url.path.replace("/v1.0", "", 1), parse_qs(url.query))
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="upstream-stub", daemon=True).start()
+        return self.base_url
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1.0"
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+def parse_faults(specs):
+    faults = {}
+    for spec in specs or []:
+        endpoint, _, rule = spec.partition(":")
+        status, _, probability = rule.partition("=")
+        if endpoint not in (SEARCH, SEAT_LAYOUT) or not status or not probability:
+            raise argparse.ArgumentTypeError(f"Invalid fault '{spec}', expected search:403=0.1 or seat_layout:422=0.05")
+        faults.setdefault(endpoint, {})[int(status)] = float(probability)
+    return faults
+
+def add_stub_arguments(parser):
+    parser.add_argument("--fixtures", help="directory with search.json and seat_layout/<trip_id>.json to replay")
+    parser.add_argument("--trains", type=int, default=15)
+    parser.add_argument("--seat-types", type=int, default=4)
+    parser.add_argument("--seats-per-coach", type=int, default=80)
+    parser.add_argument("--detailed", action="store_true", help="include the full per-seat fields the live API sends")
+    parser.add_argument("--search-latency", type=float, default=0.3, help="seconds per search-trips-v2 call")
+    parser.add_argument("--layout-latency", type=float, default=0.15, help="seconds per seat-layout call")
+    parser.add_argument("--jitter", type=float, default=0.05, help="extra uniform random latency in seconds")
+    parser.add_argument("--fault", action="append", default=[], help="inject a status, e.g. seat_layout:422=0.05 or search:503=0.1")
+    parser.add_argument("--seed", type=int, default=0)
+
+def stub_from_args(args):
+    kwargs = {
+        "latency": {SEARCH: args.search_latency, SEAT_LAYOUT: args.layout_latency},
+        "jitter": args.jitter,
+        "faults": parse_faults(args.fault),
+        "seed": args.seed
+    }
+    if args.fixtures:
+        return UpstreamStub.from_directory(args.fixtures, **kwargs)
+    return UpstreamStub.synthetic(trains=args.trains, seat_types=args.seat_types, seats_per_coach=args.seats_per_coach, detailed=args.detailed, **kwargs)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve search-trips-v2 and seat-layout fixtures locally in place of the railway API.")
+    add_stub_arguments(parser)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--save", help="write the fixtures to this directory and exit")
+    args = parser.parse_args()
+
+    stub = stub_from_args(args)
+    if args.save:
+        stub.save(args.save)
+        print(f"Saved {len(stub.layouts)} seat layouts to {args.save}")
+        return
+
+    base_url = stub.start(args.host, args.port)
+    print(f"Upstream stub listening on {base_url} (set RAILWAY_API_BASE_URL to use it)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.stop()
+
+if __name__ == "__main__":
+    main()
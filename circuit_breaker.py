@@ -0,0 +1,125 @@
+import threading, time, random
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, recovery_timeout=30, max_recovery_timeout=300, half_open_max_calls=1):
+        self.failure_threshold = failure_threshold
+        self.base_recovery_timeout = recovery_timeout
+        self.max_recovery_timeout = max_recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.lock = threading.Lock()
+
+        self._state = CLOSED
+        self.recovery_timeout = recovery_timeout
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.half_open_calls = 0
+        self.last_failure_reason = None
+
+        self.total_failures = 0
+        self.total_successes = 0
+        self.rejected_calls = 0
+        self.times_opened = 0
+
+    def configure(self, failure_threshold=None, recovery_timeout=None, max_recovery_timeout=None, half_open_max_calls=None):
+        with self.lock:
+            if failure_threshold is not None:
+                self.failure_threshold = failure_threshold
+            if recovery_timeout is not None:
+                self.base_recovery_timeout = recovery_timeout
+                self.recovery_timeout = recovery_timeout
+            if max_recovery_timeout is not None:
+                self.max_recovery_timeout = max_recovery_timeout
+            if half_open_max_calls is not None:
+                self.half_open_max_calls = half_open_max_calls
+
+    def _refresh_state(self):
+        if self._state == OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+            self._state = HALF_OPEN
+            self.half_open_calls = 0
+
+    @property
+    def state(self):
+        with self.lock:
+            self._refresh_state()
+            return self._state
+
+    def allow_request(self):
+        with self.lock:
+            self._refresh_state()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self.half_open_calls < self.half_open_max_calls:
+                self.half_open_calls += 1
+                return True
+            self.rejected_calls += 1
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.total_successes += 1
+            self.consecutive_failures = 0
+            if self._state != CLOSED:
+                self._state = CLOSED
+                self.recovery_timeout = self.base_recovery_timeout
+                self.opened_at = None
+
+    def release_request(self):
+        with self.lock:
+            if self._state == HALF_OPEN and self.half_open_calls > 0:
+                self.half_open_calls -= 1
+
+    def record_failure(self, reason=None):
+        with self.lock:
+            self.total_failures += 1
+            self.consecutive_failures += 1
+            if reason is not None:
+                self.last_failure_reason = reason
+
+            if self._state == HALF_OPEN:
+                self.recovery_timeout = min(self.recovery_timeout * 2, self.max_recovery_timeout)
+                self._open()
+            elif self._state == CLOSED and self.consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        self._state = OPEN
+        self.opened_at = time.monotonic()
+        self.half_open_calls = 0
+        self.times_opened += 1
+
+    def retry_after(self):
+        with self.lock:
+            if self._state != OPEN:
+                return 0
+            return max(0, self.recovery_timeout - (time.monotonic() - self.opened_at))
+
+    def get_stats(self):
+        retry_after = self.retry_after()
+        with self.lock:
+            self._refresh_state()
+            return {
+                "state": self._state,
+                "consecutive_failures": self.consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "recovery_timeout": self.recovery_timeout,
+                "retry_after": round(retry_after, 1),
+                "last_failure_reason": self.last_failure_reason,
+                "total_failures": self.total_failures,
+                "total_successes": self.total_successes,
+                "rejected_calls": self.rejected_calls,
+                "times_opened": self.times_opened
+            }
+
+class BackoffPolicy:
+    def __init__(self, base_delay=0.5, max_delay=8, multiplier=2):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+
+    def delay(self, attempt):
+        ceiling = min(self.max_delay, self.base_delay * (self.multiplier ** max(0, attempt - 1)))
+        return random.uniform(ceiling / 2, ceiling)
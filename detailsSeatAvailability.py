@@ -1,15 +1,51 @@
-from typing import Dict, List, Tuple
-import requests, os
+from typing import Dict, Iterator, List, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_EXCEPTION
+import requests, os, asyncio, threading, weakref, time, contextlib, aiohttp, ijson
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as UrllibHTTPError
 from colorama import Fore, init
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from ttl_cache import TTLCache, FRESH, STALE
+from single_flight import SingleFlight
+from circuit_breaker import CircuitBreaker, BackoffPolicy
+from rate_limiter import RateLimiter, MemoryTokenBucketBackend, SQLiteTokenBucketBackend, SEARCH_BUCKET, SEAT_LAYOUT_BUCKET
+from metrics import REGISTRY, PHASE_SECONDS, status_class
 
 load_dotenv('/etc/secrets/.env')
 
 init(autoreset=True)
 
-API_BASE_URL = 'https://railspaapi.shohoz.com/v1.0'
+API_BASE_URL = os.getenv('RAILWAY_API_BASE_URL', 'https://railspaapi.shohoz.com/v1.0')
 SEAT_AVAILABILITY = {'AVAILABLE': 1, 'IN_PROCESS': 2}
+SEAT_LAYOUT_WORKERS = 1
+SWEEP_DATE_WORKERS = 3
+SEAT_CLASSES = ["S_CHAIR", "SHOVAN", "SNIGDHA", "F_SEAT", "F_CHAIR", "AC_S", "F_BERTH", "AC_B", "SHULOV", "AC_CHAIR"]
+HTTP_CONNECT_TIMEOUT = 5
+HTTP_READ_TIMEOUT = 20
+HTTP_POOL_CONNECTIONS = 4
+HTTP_POOL_MAXSIZE = 20
+STREAM_SEAT_LAYOUTS = False
+SEAT_LAYOUT_FLOOR_PREFIX = "data.seatLayout.item"
+SEAT_LAYOUT_CACHE = TTLCache(ttl=0)
+
+UPSTREAM_UNAVAILABLE_MESSAGE = "We're unable to connect to the Bangladesh Railway website right now. Please try again in a few minutes."
+HIGH_TRAFFIC_MESSAGE = "Currently we are experiencing high traffic. Please try again after some time."
+AUTH_ERRORS = ("AUTH_TOKEN_EXPIRED", "AUTH_DEVICE_KEY_EXPIRED")
+
+UPSTREAM_BREAKER = CircuitBreaker()
+UPSTREAM_BACKOFF = BackoffPolicy()
+UPSTREAM_LIMITER = RateLimiter()
+UPSTREAM_REQUEST_SECONDS = REGISTRY.histogram(
+    "railway_upstream_request_duration_seconds",
+    "Latency of calls to the railway API until response headers arrive.",
+    ("endpoint", "status_class")
+)
+UPSTREAM_REJECTED = REGISTRY.counter(
+    "railway_upstream_rejected_total",
+    "Upstream calls refused locally before being sent.",
+    ("endpoint", "reason")
+)
 
 BANGLA_COACH_ORDER = [
     "KA", "KHA", "GA", "GHA", "UMA", "CHA", "SCHA", "JA", "JHA", "NEO",
@@ -34,6 +70,40 @@ def sort_seat_number(seat: str) -> tuple:
             return (coach_order, coach_fallback, 0, parts[1])
     return (len(BANGLA_COACH_ORDER) + 1, seat, 0, '')
 
+SEAT_KEY_CACHE_LIMIT = 20000
+_SEAT_KEY_CACHE = {}
+
+def seat_sort_key(seat: str) -> tuple:
+    key = _SEAT_KEY_CACHE.get(seat)
+    if key is None:
+        key = sort_seat_number(seat)
+        if len(_SEAT_KEY_CACHE) < SEAT_KEY_CACHE_LIMIT:
+            _SEAT_KEY_CACHE[seat] = key
+    return key
+
+def sort_seats(seats: List[str]) -> List[str]:
+    buckets = {}
+    for seat in seats:
+        coach_order = seat_sort_key(seat)[0]
+        bucket = buckets.get(coach_order)
+        if bucket is None:
+            buckets[coach_order] = [seat]
+        else:
+            bucket.append(seat)
+
+    if len(buckets) == 1:
+        ordered = next(iter(buckets.values()))
+        ordered.sort(key=seat_sort_key)
+        return ordered
+
+    ordered = []
+    for coach_order in sorted(buckets):
+        bucket = buckets[coach_order]
+        if len(bucket) > 1:
+            bucket.sort(key=seat_sort_key)
+        ordered.extend(bucket)
+    return ordered
+
 def analyze_seat_layout(data: Dict) -> Dict:
     layout = data.get("data", {}).get("seatLayout", [])
     if not layout:
@@ -50,7 +120,7 @@ def analyze_seat_layout(data: Dict) -> Dict:
                      (2, "Soon-to-be-Issued Tickets to Buy"),
                      (4, "Reserved Tickets Under Authority")]:
         if seats[t]:
-            sorted_seats = sorted(seats[t], key=sort_seat_number)
+            sorted_seats = sort_seats(seats[t])
             ticket_types[t] = {
                 "label": label,
                 "seats": sorted_seats,
@@ -63,7 +133,264 @@ def analyze_seat_layout(data: Dict) -> Dict:
 
     return ticket_types
 
-def get_seat_layout(trip_id: str, trip_route_id: str, auth_token: str, device_key: str) -> Tuple[List[str], List[str], int, int, bool, dict, dict]:
+_HTTP_SESSION = None
+_HTTP_SESSION_LOCK = threading.Lock()
+_RETIRED_CONNECTION_STATS = {"requests": 0, "new_connections": 0}
+
+def configure_http(connect_timeout: float = HTTP_CONNECT_TIMEOUT, read_timeout: float = HTTP_READ_TIMEOUT,
+                   pool_connections: int = HTTP_POOL_CONNECTIONS, pool_maxsize: int = HTTP_POOL_MAXSIZE,
+                   stream_seat_layouts: bool = STREAM_SEAT_LAYOUTS) -> None:
+    global HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, STREAM_SEAT_LAYOUTS, _HTTP_SESSION
+    with _HTTP_SESSION_LOCK:
+        STREAM_SEAT_LAYOUTS = stream_seat_layouts
+        HTTP_CONNECT_TIMEOUT = connect_timeout
+        HTTP_READ_TIMEOUT = read_timeout
+        HTTP_POOL_CONNECTIONS = pool_connections
+        HTTP_POOL_MAXSIZE = pool_maxsize
+        if _HTTP_SESSION is not None:
+            _retire_session_stats(_HTTP_SESSION)
+            _HTTP_SESSION.close()
+            _HTTP_SESSION = None
+
+def get_http_session() -> requests.Session:
+    global _HTTP_SESSION
+    with _HTTP_SESSION_LOCK:
+        if _HTTP_SESSION is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _HTTP_SESSION = session
+        return _HTTP_SESSION
+
+def http_timeout() -> Tuple[float, float]:
+    return (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+def _session_connection_stats(session: requests.Session) -> Dict[str, int]:
+    stats = {"requests": 0, "new_connections": 0}
+    for adapter in set(session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                stats["requests"] += pool.num_requests
+                stats["new_connections"] += pool.num_connections
+    return stats
+
+def _retire_session_stats(session: requests.Session) -> None:
+    for key, value in _session_connection_stats(session).items():
+        _RETIRED_CONNECTION_STATS[key] += value
+
+def configure_circuit_breaker(failure_threshold: int = 5, recovery_timeout: float = 30, max_recovery_timeout: float = 300,
+                              backoff_base_delay: float = 0.5, backoff_max_delay: float = 8) -> None:
+    UPSTREAM_BREAKER.configure(failure_threshold=failure_threshold, recovery_timeout=recovery_timeout,
+                               max_recovery_timeout=max_recovery_timeout)
+    UPSTREAM_BACKOFF.base_delay = backoff_base_delay
+    UPSTREAM_BACKOFF.max_delay = backoff_max_delay
+
+def get_circuit_breaker_stats() -> Dict:
+    return UPSTREAM_BREAKER.get_stats()
+
+def configure_rate_limiter(backend: str = "memory", db_path: str = "", search_rate: float = 0, search_burst: int = 1,
+                           seat_layout_rate: float = 0, seat_layout_burst: int = 1, max_wait: float = 30) -> None:
+    if backend == "sqlite" and db_path:
+        limiter_backend = SQLiteTokenBucketBackend(db_path)
+    else:
+        limiter_backend = MemoryTokenBucketBackend()
+    UPSTREAM_LIMITER.configure(
+        backend=limiter_backend,
+        buckets={
+            SEARCH_BUCKET: (search_rate, search_burst),
+            SEAT_LAYOUT_BUCKET: (seat_layout_rate, seat_layout_burst)
+        },
+        max_wait=max_wait
+    )
+
+def get_rate_limiter_stats() -> Dict:
+    return UPSTREAM_LIMITER.get_stats()
+
+def breaker_open_message() -> str:
+    if UPSTREAM_BREAKER.last_failure_reason == HIGH_TRAFFIC_MESSAGE:
+        return HIGH_TRAFFIC_MESSAGE
+    return UPSTREAM_UNAVAILABLE_MESSAGE
+
+def record_upstream_status(status_code: int) -> None:
+    if status_code >= 500:
+        UPSTREAM_BREAKER.record_failure(UPSTREAM_UNAVAILABLE_MESSAGE)
+    elif status_code == 403:
+        UPSTREAM_BREAKER.record_failure(HIGH_TRAFFIC_MESSAGE)
+    else:
+        UPSTREAM_BREAKER.record_success()
+
+def upstream_get(url: str, bucket: str, **kwargs) -> requests.Response:
+    if not UPSTREAM_BREAKER.allow_request():
+        UPSTREAM_REJECTED.inc(bucket, "circuit_open")
+        raise Exception(breaker_open_message())
+    try:
+        acquired = UPSTREAM_LIMITER.acquire(bucket)
+    except BaseException:
+        UPSTREAM_BREAKER.release_request()
+        raise
+    if not acquired:
+        UPSTREAM_BREAKER.release_request()
+        UPSTREAM_REJECTED.inc(bucket, "rate_limited")
+        raise Exception(HIGH_TRAFFIC_MESSAGE)
+    start = time.perf_counter()
+    try:
+        response = get_http_session().get(url, **kwargs)
+    except requests.RequestException:
+        UPSTREAM_REQUEST_SECONDS.observe(time.perf_counter() - start, bucket, status_class(None))
+        UPSTREAM_BREAKER.record_failure(UPSTREAM_UNAVAILABLE_MESSAGE)
+        raise
+    except BaseException:
+        UPSTREAM_BREAKER.release_request()
+        raise
+    UPSTREAM_REQUEST_SECONDS.observe(time.perf_counter() - start, bucket, status_class(response.status_code))
+    record_upstream_status(response.status_code)
+    return response
+
+def get_connection_stats() -> Dict[str, int]:
+    with _HTTP_SESSION_LOCK:
+        stats = dict(_RETIRED_CONNECTION_STATS)
+        if _HTTP_SESSION is not None:
+            for key, value in _session_connection_stats(_HTTP_SESSION).items():
+                stats[key] += value
+    stats["reused_connections"] = max(0, stats["requests"] - stats["new_connections"])
+    return stats
+
+def is_auth_error(error: Exception) -> bool:
+    return str(error) in AUTH_ERRORS
+
+TRAIN_SEARCH_FLIGHTS = SingleFlight(share_error=lambda error: not is_auth_error(error))
+SEAT_LAYOUT_FLIGHTS = SingleFlight(share_result=lambda layout: not layout[4], share_error=lambda error: not is_auth_error(error))
+
+def get_coalescing_stats() -> Dict:
+    return {
+        "train_search": TRAIN_SEARCH_FLIGHTS.get_stats(),
+        "seat_layout": SEAT_LAYOUT_FLIGHTS.get_stats()
+    }
+
+def train_search_key(config: Dict) -> Tuple[str, str, str, str]:
+    return (config["from_city"], config["to_city"], config["date_of_journey"], config.get("seat_class", "S_CHAIR"))
+
+def get_auth_error(error_data: Dict) -> str:
+    error_messages = error_data.get("error", {}).get("messages", [])
+    if isinstance(error_messages, list):
+        for msg in error_messages:
+            if "You are not authorized for this request" in msg or "Please login first" in msg:
+                return "AUTH_DEVICE_KEY_EXPIRED"
+            elif "Invalid User Access Token!" in msg:
+                return "AUTH_TOKEN_EXPIRED"
+    return "AUTH_TOKEN_EXPIRED"
+
+def parse_422_error(error_data: Dict) -> Dict:
+    error_messages = error_data.get("error", {}).get("messages", [])
+    error_dict = {"is_422": True}
+    if isinstance(error_messages, list) and error_messages:
+        error_dict["message"] = error_messages[0]
+    elif isinstance(error_messages, dict):
+        error_dict["message"] = error_messages.get("message", "")
+        error_dict["errorKey"] = error_messages.get("errorKey", "")
+    return error_dict
+
+TICKET_TYPE_LABELS = [(1, "Issued Tickets to Buy"),
+                      (3, "Issued Tickets to Buy"),
+                      (2, "Soon-to-be-Issued Tickets to Buy"),
+                      (4, "Reserved Tickets Under Authority")]
+
+def group_by_prefix(seats: List[str]) -> Dict:
+    groups = {}
+    for seat in seats:
+        prefix = seat.split('-')[0]
+        groups.setdefault(prefix, []).append(seat)
+    return {prefix: {"seats": seats, "count": len(seats)} for prefix, seats in groups.items()}
+
+def empty_seat_views() -> Dict:
+    return {"grouped_seats": {}, "grouped_booking_process": {}, "grouped_ticket_types": {}}
+
+class SeatLayoutParser:
+    def __init__(self):
+        self.has_layout = False
+        self.available_seats = []
+        self.booking_process_seats = []
+        self.seats_by_type = {1: [], 2: [], 3: [], 4: []}
+
+    def add_floor(self, floor: Dict) -> None:
+        available = SEAT_AVAILABILITY['AVAILABLE']
+        in_process = SEAT_AVAILABILITY['IN_PROCESS']
+        available_seats = self.available_seats
+        booking_process_seats = self.booking_process_seats
+        seats_by_type = self.seats_by_type
+
+        self.has_layout = True
+        for row in floor["layout"]:
+            for seat in row:
+                seat_number = seat["seat_number"]
+                seat_availability = seat["seat_availability"]
+                ticket_type = seat["ticket_type"]
+                if seat_availability == available:
+                    available_seats.append(seat_number)
+                elif seat_availability == in_process and ticket_type in (1, 2, 3):
+                    booking_process_seats.append(seat_number)
+                if seat_number and ticket_type in seats_by_type:
+                    seats_by_type[ticket_type].append(seat_number)
+
+    def result(self) -> Tuple[List[str], List[str], int, int, bool, dict, dict, dict]:
+        available_seats = sort_seats(self.available_seats)
+        booking_process_seats = sort_seats(self.booking_process_seats)
+        views = {
+            "grouped_seats": group_by_prefix(available_seats),
+            "grouped_booking_process": group_by_prefix(booking_process_seats),
+            "grouped_ticket_types": {}
+        }
+
+        ticket_types = {}
+        if self.has_layout:
+            for t, label in TICKET_TYPE_LABELS:
+                if self.seats_by_type[t]:
+                    sorted_seats = sort_seats(self.seats_by_type[t])
+                    ticket_types[t] = {
+                        "label": label,
+                        "seats": sorted_seats,
+                        "count": len(sorted_seats)
+                    }
+                    views["grouped_ticket_types"][t] = group_by_prefix(sorted_seats)
+
+            issued_seats = sort_seats(ticket_types.get(1, {}).get("seats", []) + ticket_types.get(3, {}).get("seats", []))
+            ticket_types["issued_total"] = {
+                "count": len(issued_seats)
+            }
+            ticket_types["issued_combined"] = {
+                "label": "Issued Tickets to Buy",
+                "seats": issued_seats,
+                "count": len(issued_seats),
+                "grouped": group_by_prefix(issued_seats)
+            }
+
+        return (available_seats, booking_process_seats, len(available_seats), len(booking_process_seats), False, {}, ticket_types, views)
+
+def parse_seat_layout(data: Dict) -> Tuple[List[str], List[str], int, int, bool, dict, dict, dict]:
+    with PHASE_SECONDS.time("parse_seat_layout"):
+        parser = SeatLayoutParser()
+        for floor in data.get("data", {}).get("seatLayout", []):
+            parser.add_floor(floor)
+        return parser.result()
+
+def parse_seat_layout_stream(stream) -> Tuple[List[str], List[str], int, int, bool, dict, dict, dict]:
+    with PHASE_SECONDS.time("parse_seat_layout"):
+        parser = SeatLayoutParser()
+        for floor in ijson.items(stream, SEAT_LAYOUT_FLOOR_PREFIX, use_float=True):
+            parser.add_floor(floor)
+        return parser.result()
+
+async def parse_seat_layout_stream_async(stream) -> Tuple[List[str], List[str], int, int, bool, dict, dict, dict]:
+    with PHASE_SECONDS.time("parse_seat_layout"):
+        parser = SeatLayoutParser()
+        async for floor in ijson.items(stream, SEAT_LAYOUT_FLOOR_PREFIX, use_float=True):
+            parser.add_floor(floor)
+        return parser.result()
+
+def fetch_seat_layout(trip_id: str, trip_route_id: str, auth_token: str, device_key: str) -> Tuple[List[str], List[str], int, int, bool, dict, dict, dict]:
     url = f"{API_BASE_URL}/app/bookings/seat-layout"
     headers = {
         "Authorization": f"Bearer {auth_token}",
@@ -74,48 +401,34 @@ def get_seat_layout(trip_id: str, trip_route_id: str, auth_token: str, device_ke
     retry_count = 0
 
     while retry_count < max_retries:
+        response = None
         try:
-            response = requests.get(url, headers=headers, params=params)
+            stream = STREAM_SEAT_LAYOUTS
+            response = upstream_get(url, SEAT_LAYOUT_BUCKET, headers=headers, params=params, timeout=http_timeout(), stream=stream)
             
             if response.status_code == 401:
                 try:
                     error_data = response.json()
-                    error_messages = error_data.get("error", {}).get("messages", [])
-                    if isinstance(error_messages, list):
-                        for msg in error_messages:
-                            if "You are not authorized for this request" in msg or "Please login first" in msg:
-                                raise Exception("AUTH_DEVICE_KEY_EXPIRED")
-                            elif "Invalid User Access Token!" in msg:
-                                raise Exception("AUTH_TOKEN_EXPIRED")
-                    raise Exception("AUTH_TOKEN_EXPIRED")
                 except ValueError:
                     raise Exception("AUTH_TOKEN_EXPIRED")
+                raise Exception(get_auth_error(error_data))
             
             if response.status_code >= 500:
                 retry_count += 1
                 if retry_count == max_retries:
-                    raise Exception("We're unable to connect to the Bangladesh Railway website right now. Please try again in a few minutes.")
+                    raise Exception(UPSTREAM_UNAVAILABLE_MESSAGE)
+                time.sleep(UPSTREAM_BACKOFF.delay(retry_count))
                 continue
             
             response.raise_for_status()
-            data = response.json()
-            seat_layout = data.get("data", {}).get("seatLayout", [])
-
-            seats = [(seat["seat_number"], seat["seat_availability"], seat["ticket_type"])
-                     for layout in seat_layout
-                     for row in layout["layout"]
-                     for seat in row]
-
-            available_seats = [num for num, avail, _ in seats if avail == SEAT_AVAILABILITY['AVAILABLE']]
-            booking_process_seats = [num for num, avail, ttype in seats 
-                                    if avail == SEAT_AVAILABILITY['IN_PROCESS'] and ttype in {1, 2, 3}]
-
-            available_seats_sorted = sorted(available_seats, key=sort_seat_number)
-            booking_process_seats_sorted = sorted(booking_process_seats, key=sort_seat_number)
-
-            ticket_types = analyze_seat_layout(data)
+            if not stream:
+                return parse_seat_layout(response.json())
 
-            return (available_seats_sorted, booking_process_seats_sorted, len(available_seats), len(booking_process_seats), False, {}, ticket_types)
+            response.raw.decode_content = True
+            try:
+                return parse_seat_layout_stream(response.raw)
+            except (ijson.JSONError, UrllibHTTPError):
+                return [], [], 0, 0, False, {}, {}, {}
 
         except requests.RequestException as e:
             status_code = e.response.status_code if e.response is not None else None
@@ -123,30 +436,62 @@ def get_seat_layout(trip_id: str, trip_route_id: str, auth_token: str, device_ke
             if status_code == 401:
                 try:
                     error_data = e.response.json()
-                    error_messages = error_data.get("error", {}).get("messages", [])
-                    if isinstance(error_messages, list):
-                        for msg in error_messages:
-                            if "You are not authorized for this request" in msg or "Please login first" in msg:
-                                raise Exception("AUTH_DEVICE_KEY_EXPIRED")
-                            elif "Invalid User Access Token!" in msg:
-                                raise Exception("AUTH_TOKEN_EXPIRED")
-                    raise Exception("AUTH_TOKEN_EXPIRED")
                 except ValueError:
                     raise Exception("AUTH_TOKEN_EXPIRED")
+                raise Exception(get_auth_error(error_data))
             
             if status_code == 422:
-                error_data = e.response.json()
-                error_messages = error_data.get("error", {}).get("messages", [])
-                error_dict = {"is_422": True}
-                if isinstance(error_messages, list) and error_messages:
-                    error_dict["message"] = error_messages[0]
-                elif isinstance(error_messages, dict):
-                    error_dict["message"] = error_messages.get("message", "")
-                    error_dict["errorKey"] = error_messages.get("errorKey", "")
-                return [], [], 0, 0, True, error_dict, {}
-            return [], [], 0, 0, False, {}, {}
+                return [], [], 0, 0, True, parse_422_error(e.response.json()), {}, {}
+            return [], [], 0, 0, False, {}, {}, {}
+        finally:
+            if response is not None:
+                response.close()
 
-def fetch_train_details(config: Dict, auth_token: str, device_key: str) -> List[Dict]:
+_CACHE_REFRESH_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="seat-layout-refresh")
+
+def configure_seat_layout_cache(ttl: float = 0, stale_ttl: float = 0, max_entries: int = 512) -> None:
+    global SEAT_LAYOUT_CACHE
+    SEAT_LAYOUT_CACHE = TTLCache(max_entries=max_entries, ttl=ttl, stale_ttl=stale_ttl)
+
+def get_seat_layout_cache_stats() -> Dict:
+    return SEAT_LAYOUT_CACHE.get_stats()
+
+def is_cacheable_layout(layout: tuple) -> bool:
+    available_seats, booking_process_seats, available_count, booking_process_count, is_422, error_info, ticket_types, views = layout
+    return not is_422 and bool(ticket_types or available_count or booking_process_count)
+
+def copy_layout(layout: tuple) -> tuple:
+    available_seats, booking_process_seats, available_count, booking_process_count, is_422, error_info, ticket_types, views = layout
+    return (list(available_seats), list(booking_process_seats), available_count, booking_process_count, is_422, dict(error_info), dict(ticket_types), dict(views))
+
+def _refresh_seat_layout(cache: TTLCache, key: Tuple[str, str], auth_token: str, device_key: str) -> None:
+    try:
+        layout = fetch_seat_layout(key[0], key[1], auth_token, device_key)
+        if is_cacheable_layout(layout):
+            cache.set(key, layout)
+    except Exception:
+        cache.invalidate(key)
+    finally:
+        cache.end_refresh(key)
+
+def get_seat_layout(trip_id: str, trip_route_id: str, auth_token: str, device_key: str) -> Tuple[List[str], List[str], int, int, bool, dict, dict, dict]:
+    with PHASE_SECONDS.time("get_seat_layout"):
+        cache = SEAT_LAYOUT_CACHE
+        key = (trip_id, trip_route_id)
+        layout, state = cache.get(key)
+
+        if state == STALE and cache.begin_refresh(key):
+            _CACHE_REFRESH_EXECUTOR.submit(_refresh_seat_layout, cache, key, auth_token, device_key)
+        if state in (FRESH, STALE):
+            return copy_layout(layout)
+
+        layout = SEAT_LAYOUT_FLIGHTS.do(key, lambda: fetch_seat_layout(trip_id, trip_route_id, auth_token, device_key))
+        if is_cacheable_layout(layout):
+            cache.set(key, layout)
+            return copy_layout(layout)
+        return layout
+
+def request_train_details(config: Dict, auth_token: str, device_key: str) -> List[Dict]:
     url = f"{API_BASE_URL}/app/bookings/search-trips-v2"
     headers = {
         "Authorization": f"Bearer {auth_token}",
@@ -163,29 +508,23 @@ def fetch_train_details(config: Dict, auth_token: str, device_key: str) -> List[
 
     while retry_count < max_retries:
         try:
-            response = requests.get(url, params=params, headers=headers)
+            response = upstream_get(url, SEARCH_BUCKET, params=params, headers=headers, timeout=http_timeout())
             
             if response.status_code == 401:
                 try:
                     error_data = response.json()
-                    error_messages = error_data.get("error", {}).get("messages", [])
-                    if isinstance(error_messages, list):
-                        for msg in error_messages:
-                            if "You are not authorized for this request" in msg or "Please login first" in msg:
-                                raise Exception("AUTH_DEVICE_KEY_EXPIRED")
-                            elif "Invalid User Access Token!" in msg:
-                                raise Exception("AUTH_TOKEN_EXPIRED")
-                    raise Exception("AUTH_TOKEN_EXPIRED")
                 except ValueError:
                     raise Exception("AUTH_TOKEN_EXPIRED")
+                raise Exception(get_auth_error(error_data))
             
             if response.status_code == 403:
-                raise Exception("Currently we are experiencing high traffic. Please try again after some time.")
+                raise Exception(HIGH_TRAFFIC_MESSAGE)
                 
             if response.status_code >= 500:
                 retry_count += 1
                 if retry_count == max_retries:
-                    raise Exception("We're unable to connect to the Bangladesh Railway website right now. Please try again in a few minutes.")
+                    raise Exception(UPSTREAM_UNAVAILABLE_MESSAGE)
+                time.sleep(UPSTREAM_BACKOFF.delay(retry_count))
                 continue
                 
             response.raise_for_status()
@@ -198,66 +537,504 @@ def fetch_train_details(config: Dict, auth_token: str, device_key: str) -> List[
             if status_code == 401:
                 try:
                     error_data = e.response.json()
-                    error_messages = error_data.get("error", {}).get("messages", [])
-                    if isinstance(error_messages, list):
-                        for msg in error_messages:
-                            if "You are not authorized for this request" in msg or "Please login first" in msg:
-                                raise Exception("AUTH_DEVICE_KEY_EXPIRED")
-                            elif "Invalid User Access Token!" in msg:
-                                raise Exception("AUTH_TOKEN_EXPIRED")
-                    raise Exception("AUTH_TOKEN_EXPIRED")
                 except ValueError:
                     raise Exception("AUTH_TOKEN_EXPIRED")
+                raise Exception(get_auth_error(error_data))
                     
             if hasattr(e, 'response') and e.response and e.response.status_code == 403:
-                raise Exception("Currently we are experiencing high traffic. Please try again after some time.")
+                raise Exception(HIGH_TRAFFIC_MESSAGE)
             return []
 
-def main(config: Dict) -> Dict:
+def fetch_train_details(config: Dict, auth_token: str, device_key: str) -> List[Dict]:
+    with PHASE_SECONDS.time("fetch_train_details"):
+        return TRAIN_SEARCH_FLIGHTS.do(train_search_key(config), lambda: request_train_details(config, auth_token, device_key))
+
+def seat_class_configs(config: Dict) -> List[Dict]:
+    seat_classes = config.get("seat_classes") or [config.get("seat_class", "S_CHAIR")]
+    return [dict(config, seat_class=seat_class) for seat_class in dict.fromkeys(seat_classes)]
+
+def merge_train_data(train_lists: List[List[Dict]]) -> List[Dict]:
+    trains = {}
+    seen_layouts = set()
+    for train_data in train_lists:
+        for train in train_data:
+            merged = trains.get(train["trip_number"])
+            if merged is None:
+                merged = trains[train["trip_number"]] = dict(train, seat_types=[])
+            for seat_type in train["seat_types"]:
+                key = (seat_type["trip_id"], seat_type["trip_route_id"])
+                if key not in seen_layouts:
+                    seen_layouts.add(key)
+                    merged["seat_types"].append(seat_type)
+    return list(trains.values())
+
+def search_trains(config: Dict, auth_token: str, device_key: str) -> List[Dict]:
+    configs = seat_class_configs(config)
+    if len(configs) == 1:
+        return fetch_train_details(configs[0], auth_token, device_key)
+
+    with ThreadPoolExecutor(max_workers=len(configs), thread_name_prefix="class-search") as executor:
+        return merge_train_data(list(executor.map(lambda class_config: fetch_train_details(class_config, auth_token, device_key), configs)))
+
+def iter_seat_layouts(jobs: List[Tuple[str, str]], auth_token: str, device_key: str, max_workers: int = SEAT_LAYOUT_WORKERS,
+                      fetch_layout=get_seat_layout) -> Iterator[Tuple[int, tuple]]:
+    if max_workers <= 1 or len(jobs) <= 1:
+        for index, (trip_id, trip_route_id) in enumerate(jobs):
+            yield index, fetch_layout(trip_id, trip_route_id, auth_token, device_key)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(jobs)), thread_name_prefix="seat-layout")
+    try:
+        futures = {
+            executor.submit(fetch_layout, trip_id, trip_route_id, auth_token, device_key): index
+            for index, (trip_id, trip_route_id) in enumerate(jobs)
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def fetch_seat_layouts(jobs: List[Tuple[str, str]], auth_token: str, device_key: str, max_workers: int = SEAT_LAYOUT_WORKERS) -> List[tuple]:
+    results = [None] * len(jobs)
+    for index, layout in iter_seat_layouts(jobs, auth_token, device_key, max_workers):
+        results[index] = layout
+    return results
+
+def seat_layout_jobs(train_data: List[Dict]) -> List[Tuple[str, str]]:
+    return [(seat_type["trip_id"], seat_type["trip_route_id"])
+            for train in train_data
+            for seat_type in train["seat_types"]]
+
+def build_train_result(train: Dict, layouts: List[tuple]) -> Dict:
+    seat_data = []
+    for seat_type, layout in zip(train["seat_types"], layouts):
+        available_seats, booking_process_seats, available_count, booking_process_count, is_422, error_info, ticket_types, views = layout
+
+        seat_info = {
+            "type": seat_type["type"],
+            "available_count": available_count,
+            "booking_process_count": booking_process_count,
+            "available_seats": available_seats,
+            "booking_process_seats": booking_process_seats,
+            "is_422": is_422,
+            "ticket_types": ticket_types
+        }
+        seat_info.update(views or empty_seat_views())
+        if is_422 and error_info:
+            seat_info["error_info"] = error_info
+
+        seat_data.append(seat_info)
+
+    return {
+        "departure_time": train['departure_date_time'],
+        "arrival_time": train['arrival_date_time'],
+        "seat_data": seat_data
+    }
+
+def build_result(train_data: List[Dict], layouts: List[tuple]) -> Dict:
+    result = {}
+    all_failed_with_422 = True
+    offset = 0
+
+    for train in train_data:
+        seat_count = len(train["seat_types"])
+        details = build_train_result(train, layouts[offset:offset + seat_count])
+        offset += seat_count
+
+        if any(not seat_info["is_422"] for seat_info in details["seat_data"]):
+            all_failed_with_422 = False
+        result[train['trip_number']] = details
+
+    if all_failed_with_422 and train_data:
+        return {"error": "422 error occurred for all trains", "details": result}
+
+    return result
+
+def iter_train_results(config: Dict) -> Iterator[Dict]:
+    auth_token = config.get("auth_token", "")
+    device_key = config.get("device_key", "")
+
+    if not auth_token or not device_key:
+        yield {"event": "error", "error": "AUTH_CREDENTIALS_REQUIRED"}
+        return
+
+    train_data = search_trains(config, auth_token, device_key)
+
+    if not train_data:
+        yield {"event": "error", "error": "No trains found for the given criteria."}
+        return
+
+    yield {"event": "meta", "train_count": len(train_data)}
+
+    jobs = seat_layout_jobs(train_data)
+    layouts = [None] * len(jobs)
+    job_trains = []
+    offsets = []
+    for index, train in enumerate(train_data):
+        offsets.append(len(job_trains))
+        job_trains.extend([index] * len(train["seat_types"]))
+    remaining = [len(train["seat_types"]) for train in train_data]
+    all_failed_with_422 = True
+
+    def train_event(index):
+        train = train_data[index]
+        details = build_train_result(train, layouts[offsets[index]:offsets[index] + len(train["seat_types"])])
+        return {"event": "train", "index": index, "train": train["trip_number"], "details": details}
+
+    for index, count in enumerate(remaining):
+        if count == 0:
+            yield train_event(index)
+
+    for job_index, layout in iter_seat_layouts(jobs, auth_token, device_key, config.get("seat_layout_workers", SEAT_LAYOUT_WORKERS)):
+        layouts[job_index] = layout
+        index = job_trains[job_index]
+        remaining[index] -= 1
+        if remaining[index] == 0:
+            event = train_event(index)
+            if any(not seat_info["is_422"] for seat_info in event["details"]["seat_data"]):
+                all_failed_with_422 = False
+            yield event
+
+    yield {"event": "done", "train_count": len(train_data), "all_seats_422": all_failed_with_422}
+
+def search_train_results(config: Dict, train_data: List[Dict] = None) -> Tuple[List[Dict], Dict]:
     auth_token = config.get("auth_token", "")
     device_key = config.get("device_key", "")
     
     if not auth_token or not device_key:
-        return {"error": "AUTH_CREDENTIALS_REQUIRED"}
+        return [], {"error": "AUTH_CREDENTIALS_REQUIRED"}
     
-    result = {}
-    train_data = fetch_train_details(config, auth_token, device_key)
-    all_failed_with_422 = True
+    if train_data is None:
+        train_data = search_trains(config, auth_token, device_key)
 
     if not train_data:
-        return {"error": "No trains found for the given criteria."}
+        return [], {"error": "No trains found for the given criteria."}
+
+    layouts = fetch_seat_layouts(seat_layout_jobs(train_data), auth_token, device_key, config.get("seat_layout_workers", SEAT_LAYOUT_WORKERS))
+    return train_data, build_result(train_data, layouts)
 
+def search_shared(config: Dict, accounts: List[Tuple[str, str]]) -> Tuple[int, List[Dict], List[tuple], Dict[int, Exception]]:
+    auth_errors = {}
+    for index, (auth_token, device_key) in enumerate(accounts):
+        try:
+            train_data = search_trains(config, auth_token, device_key)
+            layouts = fetch_seat_layouts(seat_layout_jobs(train_data), auth_token, device_key, config.get("seat_layout_workers", SEAT_LAYOUT_WORKERS))
+            return index, train_data, layouts, auth_errors
+        except Exception as e:
+            if not is_auth_error(e):
+                raise
+            auth_errors[index] = e
+    return None, [], [], auth_errors
+
+def account_layouts(config: Dict, train_data: List[Dict], layouts: List[tuple], auth_token: str, device_key: str,
+                    max_workers: int = SEAT_LAYOUT_WORKERS) -> List[tuple]:
+    request_train_details(seat_class_configs(config)[0], auth_token, device_key)
+
+    jobs = seat_layout_jobs(train_data)
+    own = [copy_layout(layout) for layout in layouts]
+    trains = {}
+    offset = 0
     for train in train_data:
-        seat_data = []
-        for seat_type in train["seat_types"]:
-            available_seats, booking_process_seats, available_count, booking_process_count, is_422, error_info, ticket_types = get_seat_layout(
-                seat_type["trip_id"], seat_type["trip_route_id"], auth_token, device_key
-            )
-
-            seat_info = {
-                "type": seat_type["type"],
-                "available_count": available_count,
-                "booking_process_count": booking_process_count,
-                "available_seats": available_seats,
-                "booking_process_seats": booking_process_seats,
-                "is_422": is_422,
-                "ticket_types": ticket_types
-            }
-            if is_422 and error_info:
-                seat_info["error_info"] = error_info
+        if train["seat_types"]:
+            trains[offset] = range(offset, offset + len(train["seat_types"]))
+        offset += len(train["seat_types"])
 
-            seat_data.append(seat_info)
+    probes = list(trains)
+    refetch = {index for index, layout in enumerate(layouts) if layout[4]}
+    for position, layout in iter_seat_layouts([jobs[index] for index in probes], auth_token, device_key, max_workers, fetch_seat_layout):
+        if layout[4]:
+            refetch.update(trains[probes[position]])
+        if layout[4] or is_cacheable_layout(layout):
+            own[probes[position]] = layout
+    refetch = sorted(refetch.difference(probes))
+    for position, layout in iter_seat_layouts([jobs[index] for index in refetch], auth_token, device_key, max_workers, fetch_seat_layout):
+        own[refetch[position]] = layout
+    return own
 
-            if not is_422:
-                all_failed_with_422 = False
+def train_results(train_data: List[Dict], layouts: List[tuple]) -> Dict:
+    if not train_data:
+        return {"error": "No trains found for the given criteria."}
+    return build_result(train_data, layouts)
 
-        result[train['trip_number']] = {
-            "departure_time": train['departure_date_time'],
-            "arrival_time": train['arrival_date_time'],
-            "seat_data": seat_data
-        }
+def iter_layout_results(train_data: List[Dict], layouts: List[tuple]) -> Iterator[Dict]:
+    if not train_data:
+        yield {"event": "error", "error": "No trains found for the given criteria."}
+        return
 
-    if all_failed_with_422 and train_data:
-        return {"error": "422 error occurred for all trains", "details": result}
+    yield {"event": "meta", "train_count": len(train_data)}
+    all_failed_with_422 = True
+    offset = 0
+    for index, train in enumerate(train_data):
+        seat_count = len(train["seat_types"])
+        details = build_train_result(train, layouts[offset:offset + seat_count])
+        offset += seat_count
+        if any(not seat_info["is_422"] for seat_info in details["seat_data"]):
+            all_failed_with_422 = False
+        yield {"event": "train", "index": index, "train": train["trip_number"], "details": details}
+
+    yield {"event": "done", "train_count": len(train_data), "all_seats_422": all_failed_with_422}
+
+def main(config: Dict) -> Dict:
+    return search_train_results(config)[1]
+
+def search_dates(config: Dict, dates: List[str], max_workers: int = SWEEP_DATE_WORKERS) -> Dict[str, Dict]:
+    def search(date_of_journey):
+        try:
+            result = search_train_results(dict(config, date_of_journey=date_of_journey))[1]
+            if "error" in result:
+                return result
+            return {train: summarize_train_result(details) for train, details in result.items()}
+        except Exception as e:
+            if is_auth_error(e) or str(e) in (HIGH_TRAFFIC_MESSAGE, UPSTREAM_UNAVAILABLE_MESSAGE):
+                raise
+            return {"error": str(e)}
+
+    if max_workers <= 1 or len(dates) <= 1:
+        return {date_of_journey: search(date_of_journey) for date_of_journey in dates}
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(dates)), thread_name_prefix="date-sweep") as executor:
+        futures = [executor.submit(search, date_of_journey) for date_of_journey in dates]
+        done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in pending:
+            future.cancel()
+        for future in futures:
+            if future in done and future.exception() is not None:
+                raise future.exception()
+        return {date_of_journey: future.result() for date_of_journey, future in zip(dates, futures)}
+
+def summarize_train_result(details: Dict) -> Dict:
+    seat_types = []
+    for seat_info in details["seat_data"]:
+        ticket_types = seat_info["ticket_types"] or {}
+        seat_types.append({
+            "type": seat_info["type"],
+            "available": seat_info["available_count"],
+            "booking_process": seat_info["booking_process_count"],
+            "issued": ticket_types.get("issued_total", {}).get("count", 0),
+            "is_422": seat_info["is_422"]
+        })
+
+    return {
+        "departure_time": details["departure_time"],
+        "arrival_time": details["arrival_time"],
+        "available": sum(seat_type["available"] for seat_type in seat_types),
+        "seat_types": seat_types
+    }
+
+_ASYNC_LOOP = None
+_ASYNC_LOOP_LOCK = threading.Lock()
+_ASYNC_SESSIONS = weakref.WeakKeyDictionary()
+
+def get_async_loop() -> asyncio.AbstractEventLoop:
+    global _ASYNC_LOOP
+    with _ASYNC_LOOP_LOCK:
+        if _ASYNC_LOOP is None or _ASYNC_LOOP.is_closed():
+            _ASYNC_LOOP = asyncio.new_event_loop()
+            loop_thread = threading.Thread(target=_ASYNC_LOOP.run_forever, name="railway-api-loop")
+            loop_thread.daemon = True
+            loop_thread.start()
+        return _ASYNC_LOOP
+
+def run_async(coro):
+    return asyncio.run_coroutine_threadsafe(coro, get_async_loop()).result()
+
+async def get_async_session() -> aiohttp.ClientSession:
+    loop = asyncio.get_running_loop()
+    session = _ASYNC_SESSIONS.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=HTTP_POOL_MAXSIZE),
+            timeout=aiohttp.ClientTimeout(sock_connect=HTTP_CONNECT_TIMEOUT, sock_read=HTTP_READ_TIMEOUT)
+        )
+        _ASYNC_SESSIONS[loop] = session
+    return session
+
+@contextlib.asynccontextmanager
+async def upstream_get_async(session: aiohttp.ClientSession, url: str, bucket: str, **kwargs):
+    if not UPSTREAM_BREAKER.allow_request():
+        UPSTREAM_REJECTED.inc(bucket, "circuit_open")
+        raise Exception(breaker_open_message())
+    try:
+        acquired = await UPSTREAM_LIMITER.acquire_async(bucket)
+    except BaseException:
+        UPSTREAM_BREAKER.release_request()
+        raise
+    if not acquired:
+        UPSTREAM_BREAKER.release_request()
+        UPSTREAM_REJECTED.inc(bucket, "rate_limited")
+        raise Exception(HIGH_TRAFFIC_MESSAGE)
+    start = time.perf_counter()
+    try:
+        response = await session.get(url, **kwargs)
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        UPSTREAM_REQUEST_SECONDS.observe(time.perf_counter() - start, bucket, status_class(None))
+        UPSTREAM_BREAKER.record_failure(UPSTREAM_UNAVAILABLE_MESSAGE)
+        raise
+    except BaseException:
+        UPSTREAM_BREAKER.release_request()
+        raise
+    UPSTREAM_REQUEST_SECONDS.observe(time.perf_counter() - start, bucket, status_class(response.status))
+    record_upstream_status(response.status)
+    try:
+        yield response
+    finally:
+        response.release()
+
+async def close_async_session():
+    session = _ASYNC_SESSIONS.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+async def fetch_seat_layout_async(trip_id: str, trip_route_id: str, auth_token: str, device_key: str) -> Tuple[List[str], List[str], int, int, bool, dict, dict, dict]:
+    url = f"{API_BASE_URL}/app/bookings/seat-layout"
+    headers = {
+        "Authorization": f"Bearer {auth_token}",
+        "x-device-key": device_key
+    }
+    params = {"trip_id": trip_id, "trip_route_id": trip_route_id}
+    max_retries = 2
+    retry_count = 0
+    session = await get_async_session()
+
+    while retry_count < max_retries:
+        try:
+            async with upstream_get_async(session, url, SEAT_LAYOUT_BUCKET, headers=headers, params=params) as response:
+                if response.status == 401:
+                    try:
+                        error_data = await response.json(content_type=None)
+                    except ValueError:
+                        raise Exception("AUTH_TOKEN_EXPIRED")
+                    raise Exception(get_auth_error(error_data))
+
+                if response.status >= 500:
+                    retry_count += 1
+                    if retry_count == max_retries:
+                        raise Exception(UPSTREAM_UNAVAILABLE_MESSAGE)
+                    await asyncio.sleep(UPSTREAM_BACKOFF.delay(retry_count))
+                    continue
+
+                if response.status == 422:
+                    return [], [], 0, 0, True, parse_422_error(await response.json(content_type=None)), {}, {}
+
+                if response.status >= 400:
+                    return [], [], 0, 0, False, {}, {}, {}
+
+                if STREAM_SEAT_LAYOUTS:
+                    return await parse_seat_layout_stream_async(response.content)
+                return parse_seat_layout(await response.json(content_type=None))
+
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, ijson.JSONError):
+            return [], [], 0, 0, False, {}, {}, {}
+
+async def _refresh_seat_layout_async(cache: TTLCache, key: Tuple[str, str], auth_token: str, device_key: str) -> None:
+    try:
+        layout = await fetch_seat_layout_async(key[0], key[1], auth_token, device_key)
+        if is_cacheable_layout(layout):
+            cache.set(key, layout)
+    except Exception:
+        cache.invalidate(key)
+    finally:
+        cache.end_refresh(key)
+
+async def get_seat_layout_async(trip_id: str, trip_route_id: str, auth_token: str, device_key: str) -> Tuple[List[str], List[str], int, int, bool, dict, dict, dict]:
+    with PHASE_SECONDS.time("get_seat_layout"):
+        cache = SEAT_LAYOUT_CACHE
+        key = (trip_id, trip_route_id)
+        layout, state = cache.get(key)
+
+        if state == STALE and cache.begin_refresh(key):
+            asyncio.ensure_future(_refresh_seat_layout_async(cache, key, auth_token, device_key))
+        if state in (FRESH, STALE):
+            return copy_layout(layout)
+
+        layout = await SEAT_LAYOUT_FLIGHTS.do_async(key, lambda: fetch_seat_layout_async(trip_id, trip_route_id, auth_token, device_key))
+        if is_cacheable_layout(layout):
+            cache.set(key, layout)
+            return copy_layout(layout)
+        return layout
+
+async def request_train_details_async(config: Dict, auth_token: str, device_key: str) -> List[Dict]:
+    url = f"{API_BASE_URL}/app/bookings/search-trips-v2"
+    headers = {
+        "Authorization": f"Bearer {auth_token}",
+        "x-device-key": device_key
+    }
+    params = {
+        "from_city": config["from_city"],
+        "to_city": config["to_city"],
+        "date_of_journey": config["date_of_journey"],
+        "seat_class": config.get("seat_class", "S_CHAIR")
+    }
+    max_retries = 2
+    retry_count = 0
+    session = await get_async_session()
+
+    while retry_count < max_retries:
+        try:
+            async with upstream_get_async(session, url, SEARCH_BUCKET, params=params, headers=headers) as response:
+                if response.status == 401:
+                    try:
+                        error_data = await response.json(content_type=None)
+                    except ValueError:
+                        raise Exception("AUTH_TOKEN_EXPIRED")
+                    raise Exception(get_auth_error(error_data))
+
+                if response.status == 403:
+                    raise Exception(HIGH_TRAFFIC_MESSAGE)
+
+                if response.status >= 500:
+                    retry_count += 1
+                    if retry_count == max_retries:
+                        raise Exception(UPSTREAM_UNAVAILABLE_MESSAGE)
+                    await asyncio.sleep(UPSTREAM_BACKOFF.delay(retry_count))
+                    continue
+
+                if response.status >= 400:
+                    return []
+
+                train_data = (await response.json(content_type=None)).get("data", {}).get("trains", [])
+                return train_data
+
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            return []
+
+async def fetch_train_details_async(config: Dict, auth_token: str, device_key: str) -> List[Dict]:
+    with PHASE_SECONDS.time("fetch_train_details"):
+        return await TRAIN_SEARCH_FLIGHTS.do_async(train_search_key(config), lambda: request_train_details_async(config, auth_token, device_key))
+
+async def search_trains_async(config: Dict, auth_token: str, device_key: str) -> List[Dict]:
+    configs = seat_class_configs(config)
+    if len(configs) == 1:
+        return await fetch_train_details_async(configs[0], auth_token, device_key)
+
+    return merge_train_data(await asyncio.gather(*(fetch_train_details_async(class_config, auth_token, device_key) for class_config in configs)))
+
+async def fetch_seat_layouts_async(jobs: List[Tuple[str, str]], auth_token: str, device_key: str, max_workers: int = SEAT_LAYOUT_WORKERS) -> List[tuple]:
+    semaphore = asyncio.Semaphore(max(1, max_workers))
+
+    async def fetch(trip_id, trip_route_id):
+        async with semaphore:
+            return await get_seat_layout_async(trip_id, trip_route_id, auth_token, device_key)
+
+    tasks = [asyncio.ensure_future(fetch(trip_id, trip_route_id)) for trip_id, trip_route_id in jobs]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+async def main_async(config: Dict) -> Dict:
+    auth_token = config.get("auth_token", "")
+    device_key = config.get("device_key", "")
+    
+    if not auth_token or not device_key:
+        return {"error": "AUTH_CREDENTIALS_REQUIRED"}
+    
+    train_data = await search_trains_async(config, auth_token, device_key)
+
+    if not train_data:
+        return {"error": "No trains found for the given criteria."}
 
-    return result
\ No newline at end of file
+    layouts = await fetch_seat_layouts_async(seat_layout_jobs(train_data), auth_token, device_key, config.get("seat_layout_workers", SEAT_LAYOUT_WORKERS))
+    return build_result(train_data, layouts)
@@ -0,0 +1,72 @@
+class PositionIndex:
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.tree = [0] * (capacity + 1)
+        self.keys = [None] * capacity
+        self.slots = {}
+        self.next_slot = 0
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __contains__(self, key):
+        return key in self.slots
+
+    def __iter__(self):
+        return (key for key in self.keys[:self.next_slot] if key is not None)
+
+    def add(self, key):
+        if key in self.slots:
+            return
+        if self.next_slot == self.capacity:
+            self._rebuild()
+        slot = self.next_slot
+        self.next_slot += 1
+        self.keys[slot] = key
+        self.slots[key] = slot
+        self._update(slot, 1)
+
+    def remove(self, key):
+        slot = self.slots.pop(key, None)
+        if slot is None:
+            return False
+        self.keys[slot] = None
+        self._update(slot, -1)
+        return True
+
+    def position(self, key):
+        slot = self.slots.get(key)
+        if slot is None:
+            return 0
+        return self._prefix_sum(slot)
+
+    def _update(self, slot, delta):
+        i = slot + 1
+        while i <= self.capacity:
+            self.tree[i] += delta
+            i += i & -i
+
+    def _prefix_sum(self, slot):
+        total = 0
+        i = slot + 1
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def _rebuild(self):
+        live = [key for key in self.keys[:self.next_slot] if key is not None]
+        if len(live) * 2 > self.capacity:
+            self.capacity *= 2
+
+        self.tree = [0] * (self.capacity + 1)
+        self.keys = live + [None] * (self.capacity - len(live))
+        self.slots = {key: slot for slot, key in enumerate(live)}
+        self.next_slot = len(live)
+
+        for i in range(1, self.capacity + 1):
+            if i <= len(live):
+                self.tree[i] += 1
+            parent = i + (i & -i)
+            if parent <= self.capacity:
+                self.tree[parent] += self.tree[i]
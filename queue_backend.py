@@ -0,0 +1,490 @@
+import os, sqlite3, time
+from collections import deque
+from datetime import datetime
+from position_index import PositionIndex
+from shared_state import dumps, loads, private_database
+
+QUEUED = "queued"
+PROCESSING = "processing"
+COMPLETED = "completed"
+FAILED = "failed"
+INTERRUPTED_MESSAGE = "Your search was interrupted. Please try again."
+
+def handler_name(func):
+    return f"{func.__module__}.{func.__qualname__}"
+
+class MemoryQueueBackend:
+    poll_interval = None
+
+    def __init__(self, batch_cleanup_threshold=10):
+        self.pending = deque()
+        self.positions = PositionIndex()
+        self.cancelled = set()
+        self.jobs = {}
+        self.results = {}
+        self.progress = {}
+        self.groups = {}
+        self.version = 0
+        self.batch_cleanup_threshold = batch_cleanup_threshold
+
+    def register_handler(self, func):
+        pass
+
+    def _handler_filter(self):
+        names = list(self.handlers)
+        return f"handler IN ({','.join('?' * len(names))})", names
+
+    def status_version(self):
+        return self.version
+
+    def _changed(self):
+        self.version += 1
+
+    def add(self, request_id, request_func, params, stream=False, merge_key=None):
+        now = time.time()
+        self.pending.append(request_id)
+        self.positions.add(request_id)
+        self.jobs[request_id] = {
+            "handler": request_func,
+            "params": params,
+            "status": QUEUED,
+            "created_at": datetime.fromtimestamp(now),
+            "enqueued_at": now,
+            "last_heartbeat": now
+        }
+        if merge_key is not None:
+            group = (request_func, merge_key)
+            self.jobs[request_id]["group"] = group
+            self.groups.setdefault(group, deque()).append(request_id)
+        if stream:
+            self.progress[request_id] = []
+        return len(self.positions)
+
+    def add_result(self, request_id, result):
+        now = time.time()
+        self.jobs[request_id] = {"status": COMPLETED, "created_at": datetime.fromtimestamp(now), "last_heartbeat": now}
+        self.results[request_id] = result
+
+    def get_status(self, request_id):
+        job = self.jobs.get(request_id)
+        if job is None:
+            return None
+        status = {"status": job["status"], "created_at": job["created_at"], "last_heartbeat": job["last_heartbeat"]}
+        if job["status"] == QUEUED:
+            status["position"] = self.positions.position(request_id)
+        return status
+
+    def touch(self, request_id):
+        job = self.jobs.get(request_id)
+        if job is None:
+            return False
+        job["last_heartbeat"] = time.time()
+        return True
+
+    def has_pending(self):
+        return bool(self.pending)
+
+    def claim(self, limit=1):
+        while self.pending:
+            request_id = self.pending.popleft()
+            if request_id in self.cancelled:
+                self.cancelled.discard(request_id)
+                continue
+
+            job = self.jobs.get(request_id)
+            if job is not None and job["status"] == QUEUED:
+                claimed = [self._take(request_id, job)]
+                if limit > 1 and "group" in job:
+                    claimed.extend(self._take_group(job["group"], limit - 1))
+                self._changed()
+                return claimed
+        return []
+
+    def _take(self, request_id, job):
+        job["status"] = PROCESSING
+        self.positions.remove(request_id)
+        return request_id, job.pop("handler"), job.pop("params"), job["enqueued_at"], request_id in self.progress
+
+    def _take_group(self, group, limit):
+        waiting = self.groups.get(group)
+        claimed = []
+        while waiting and len(claimed) < limit:
+            request_id = waiting.popleft()
+            job = self.jobs.get(request_id)
+            if job is not None and job["status"] == QUEUED:
+                claimed.append(self._take(request_id, job))
+        if not waiting:
+            self.groups.pop(group, None)
+        return claimed
+
+    def is_active(self, request_id):
+        return request_id in self.jobs
+
+    def finish(self, request_id, status, result):
+        job = self.jobs.get(request_id)
+        if job is None:
+            return False
+        job["status"] = status
+        self.results[request_id] = result
+        self._changed()
+        return True
+
+    def pop_result(self, request_id):
+        if request_id not in self.results:
+            return None
+        result = self.results.pop(request_id)
+        self.jobs.pop(request_id, None)
+        self.progress.pop(request_id, None)
+        return result
+
+    def cancel(self, request_id):
+        status = self.get_status(request_id)
+        self.results.pop(request_id, None)
+        self.progress.pop(request_id, None)
+        if status is None:
+            return None
+
+        del self.jobs[request_id]
+        if status["status"] == QUEUED:
+            self.positions.remove(request_id)
+            self.cancelled.add(request_id)
+            if len(self.cancelled) >= max(self.batch_cleanup_threshold, len(self.pending) // 2):
+                self.compact()
+        self._changed()
+        return status
+
+    def renew_claims(self):
+        pass
+
+    def expire_claims(self):
+        return 0
+
+    def compact(self):
+        removed_count = len(self.cancelled)
+        self.pending = deque(request_id for request_id in self.pending if request_id in self.positions)
+        self.cancelled.clear()
+        for group, waiting in list(self.groups.items()):
+            waiting = deque(request_id for request_id in waiting if request_id in self.positions)
+            if waiting:
+                self.groups[group] = waiting
+            else:
+                del self.groups[group]
+
+        if removed_count > 0:
+            print(f"Batch cleanup: Removed {removed_count} cancelled requests from queue")
+
+    def append_progress(self, request_id, event):
+        if request_id in self.progress:
+            self.progress[request_id].append(event)
+
+    def read_progress(self, request_id, cursor=0):
+        job = self.jobs.get(request_id)
+        events = self.progress.get(request_id)
+        if job is None or events is None:
+            return None, []
+        return job["status"], events[cursor:]
+
+    def stale_requests(self, cutoff):
+        return [request_id for request_id, job in self.jobs.items() if job["status"] == QUEUED and job["last_heartbeat"] < cutoff]
+
+    def expire_finished(self, cutoff):
+        cutoff_time = datetime.fromtimestamp(cutoff)
+        expired_ids = [request_id for request_id, job in self.jobs.items()
+                       if job["status"] in (COMPLETED, FAILED) and job["created_at"] < cutoff_time]
+        for request_id in expired_ids:
+            del self.jobs[request_id]
+            self.results.pop(request_id, None)
+            self.progress.pop(request_id, None)
+
+    def counts(self):
+        return {
+            "queued": len(self.positions),
+            "processing": sum(1 for job in self.jobs.values() if job["status"] == PROCESSING),
+            "queue_size": len(self.pending),
+            "cancelled_pending": len(self.cancelled)
+        }
+
+class SQLiteQueueBackend:
+    def __init__(self, path, poll_interval=0.5, lease_timeout=120):
+        self.path = private_database(path)
+        self.poll_interval = poll_interval
+        self.lease_timeout = lease_timeout
+        self.handlers = {}
+        self.params_path = private_database(path + ".params")
+        self.owner = os.getpid()
+        self.positions = {}
+        self.positions_version = None
+        self.connection = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("ATTACH DATABASE ? AS private", (self.params_path,))
+        self.connection.execute("PRAGMA private.journal_mode=WAL")
+        self.connection.execute("PRAGMA private.secure_delete=ON")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS private.queue_params (request_id TEXT PRIMARY KEY, params TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS queue_jobs (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                request_id TEXT NOT NULL UNIQUE,
+                handler TEXT,
+                params BLOB,
+                stream INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_heartbeat REAL NOT NULL,
+                result BLOB,
+                merge_key TEXT,
+                claimed_at REAL,
+                claimed_by INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS queue_jobs_status ON queue_jobs (status, seq);
+            CREATE TABLE IF NOT EXISTS queue_progress (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                request_id TEXT NOT NULL,
+                event BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS queue_progress_request ON queue_progress (request_id, seq);
+            CREATE TABLE IF NOT EXISTS queue_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            INSERT OR IGNORE INTO queue_meta (name, value) VALUES ('status_version', 0);
+        """)
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(queue_jobs)")}
+        for column, column_type in (("merge_key", "TEXT"), ("claimed_at", "REAL"), ("claimed_by", "INTEGER")):
+            if column not in columns:
+                self.connection.execute(f"ALTER TABLE queue_jobs ADD COLUMN {column} {column_type}")
+        self.connection.execute("DROP INDEX IF EXISTS queue_jobs_owner")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS queue_jobs_merge ON queue_jobs (merge_key, status, seq)")
+        self._write(self._upgrade)
+
+    def _upgrade(self, connection):
+        if connection.execute("SELECT 1 FROM queue_meta WHERE name = 'format'").fetchone() is None:
+            connection.execute("DELETE FROM queue_progress")
+            connection.execute("DELETE FROM queue_jobs")
+            connection.execute("INSERT INTO queue_meta (name, value) VALUES ('format', 1)")
+
+    def register_handler(self, func):
+        self.handlers[handler_name(func)] = func
+
+    def _write(self, statements, changed=False):
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            result = statements(connection)
+            if changed:
+                connection.execute("UPDATE queue_meta SET value = value + 1 WHERE name = 'status_version'")
+            connection.execute("COMMIT")
+            return result
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _handler_filter(self):
+        names = list(self.handlers)
+        return f"handler IN ({','.join('?' * len(names))})", names
+
+    def status_version(self):
+        return self.connection.execute("SELECT value FROM queue_meta WHERE name = 'status_version'").fetchone()[0]
+
+    def add(self, request_id, request_func, params, stream=False, merge_key=None):
+        self.register_handler(request_func)
+        now = time.time()
+
+        payload = dumps(params)
+
+        def insert(connection):
+            connection.execute("INSERT INTO private.queue_params (request_id, params) VALUES (?, ?)", (request_id, payload))
+            cursor = connection.execute(
+                "INSERT INTO queue_jobs (request_id, handler, stream, status, created_at, last_heartbeat, merge_key) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (request_id, handler_name(request_func), int(stream), QUEUED, now, now, None if merge_key is None else repr(merge_key))
+            )
+            return connection.execute("SELECT COUNT(*) FROM queue_jobs WHERE status = ? AND seq <= ?", (QUEUED, cursor.lastrowid)).fetchone()[0]
+
+        return self._write(insert)
+
+    def add_result(self, request_id, result):
+        now = time.time()
+        self._write(lambda connection: connection.execute(
+            "INSERT INTO queue_jobs (request_id, status, created_at, last_heartbeat, result) VALUES (?, ?, ?, ?, ?)",
+            (request_id, COMPLETED, now, now, dumps(result))
+        ))
+
+    def get_status(self, request_id):
+        return self._status(request_id, self.status_version())
+
+    def _status(self, request_id, version=None):
+        row = self.connection.execute(
+            "SELECT seq, status, created_at, last_heartbeat FROM queue_jobs WHERE request_id = ?", (request_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        seq, state, created_at, last_heartbeat = row
+        status = {"status": state, "created_at": datetime.fromtimestamp(created_at), "last_heartbeat": last_heartbeat}
+        if state == QUEUED:
+            status["position"] = self._position(request_id, seq, version)
+        return status
+
+    def _position(self, request_id, seq, version):
+        if version is None:
+            return self.connection.execute(
+                "SELECT COUNT(*) FROM queue_jobs WHERE status = ? AND seq <= ?", (QUEUED, seq)
+            ).fetchone()[0]
+        if version != self.positions_version:
+            queued = self.connection.execute("SELECT request_id FROM queue_jobs WHERE status = ? ORDER BY seq", (QUEUED,))
+            self.positions = {queued_id: position for position, (queued_id,) in enumerate(queued, start=1)}
+            self.positions_version = version
+        position = self.positions.get(request_id)
+        if position is None:
+            position = self.positions[request_id] = self._position(request_id, seq, None)
+        return position
+
+    def touch(self, request_id):
+        cursor = self.connection.execute("UPDATE queue_jobs SET last_heartbeat = ? WHERE request_id = ?", (time.time(), request_id))
+        return cursor.rowcount > 0
+
+    def has_pending(self):
+        if not self.handlers:
+            return False
+        condition, names = self._handler_filter()
+        return self.connection.execute(
+            f"SELECT 1 FROM queue_jobs WHERE status = ? AND {condition} LIMIT 1", (QUEUED, *names)
+        ).fetchone() is not None
+
+    def claim(self, limit=1):
+        if not self.handlers:
+            return []
+        condition, names = self._handler_filter()
+
+        def take(connection):
+            row = connection.execute(
+                f"SELECT seq, request_id, handler, stream, created_at, merge_key FROM queue_jobs WHERE status = ? AND {condition} ORDER BY seq LIMIT 1",
+                (QUEUED, *names)
+            ).fetchone()
+            if row is None:
+                return []
+            rows = [row[:5]]
+            seq, handler, merge_key = row[0], row[2], row[5]
+            if limit > 1 and merge_key is not None:
+                rows.extend(connection.execute(
+                    "SELECT seq, request_id, handler, stream, created_at FROM queue_jobs "
+                    "WHERE merge_key = ? AND status = ? AND handler = ? AND seq > ? ORDER BY seq LIMIT ?",
+                    (merge_key, QUEUED, handler, seq, limit - 1)
+                ).fetchall())
+            now = time.time()
+            connection.executemany(
+                "UPDATE queue_jobs SET status = ?, claimed_at = ?, claimed_by = ? WHERE seq = ?",
+                [(PROCESSING, now, self.owner, row[0]) for row in rows]
+            )
+            claimed = []
+            for seq, request_id, handler, stream, created_at in rows:
+                params = connection.execute("SELECT params FROM private.queue_params WHERE request_id = ?", (request_id,)).fetchone()
+                connection.execute("DELETE FROM private.queue_params WHERE request_id = ?", (request_id,))
+                if params is None:
+                    connection.execute(
+                        "UPDATE queue_jobs SET status = ?, result = ? WHERE seq = ?", (FAILED, dumps({"error": INTERRUPTED_MESSAGE}), seq)
+                    )
+                    continue
+                claimed.append((request_id, self.handlers[handler], loads(params[0]), created_at, bool(stream)))
+            connection.execute("UPDATE queue_meta SET value = value + 1 WHERE name = 'status_version'")
+            return claimed
+
+        return self._write(take)
+
+    def is_active(self, request_id):
+        return self.connection.execute("SELECT 1 FROM queue_jobs WHERE request_id = ?", (request_id,)).fetchone() is not None
+
+    def finish(self, request_id, status, result):
+        payload = dumps(result)
+        return self._write(lambda connection: connection.execute(
+            "UPDATE queue_jobs SET status = ?, result = ? WHERE request_id = ?", (status, payload, request_id)
+        ).rowcount > 0, changed=True)
+
+    def pop_result(self, request_id):
+        def take(connection):
+            row = connection.execute(
+                "SELECT result FROM queue_jobs WHERE request_id = ? AND status IN (?, ?)", (request_id, COMPLETED, FAILED)
+            ).fetchone()
+            if row is None or row[0] is None:
+                return None
+            connection.execute("DELETE FROM queue_jobs WHERE request_id = ?", (request_id,))
+            connection.execute("DELETE FROM queue_progress WHERE request_id = ?", (request_id,))
+            return loads(row[0])
+
+        return self._write(take)
+
+    def cancel(self, request_id):
+        def remove(connection):
+            status = self._status(request_id)
+            connection.execute("DELETE FROM private.queue_params WHERE request_id = ?", (request_id,))
+            connection.execute("DELETE FROM queue_progress WHERE request_id = ?", (request_id,))
+            if status is not None:
+                connection.execute("DELETE FROM queue_jobs WHERE request_id = ?", (request_id,))
+            return status
+
+        return self._write(remove, changed=True)
+
+    def renew_claims(self):
+        def renew(connection):
+            connection.execute(
+                "UPDATE queue_jobs SET claimed_at = ? WHERE status = ? AND claimed_by = ?", (time.time(), PROCESSING, self.owner)
+            )
+            connection.execute(
+                "DELETE FROM private.queue_params WHERE request_id NOT IN (SELECT request_id FROM queue_jobs WHERE status = ?)", (QUEUED,)
+            )
+
+        self._write(renew)
+        self.connection.execute("PRAGMA private.wal_checkpoint(TRUNCATE)")
+
+    def expire_claims(self):
+        payload = dumps({"error": INTERRUPTED_MESSAGE})
+
+        def expire(connection):
+            expired = connection.execute(
+                "UPDATE queue_jobs SET status = ?, result = ? WHERE status = ? AND claimed_at < ?",
+                (FAILED, payload, PROCESSING, time.time() - self.lease_timeout)
+            ).rowcount
+            if expired:
+                connection.execute("UPDATE queue_meta SET value = value + 1 WHERE name = 'status_version'")
+            return expired
+
+        return self._write(expire)
+
+    def compact(self):
+        pass
+
+    def append_progress(self, request_id, event):
+        payload = dumps(event)
+        self._write(lambda connection: connection.execute(
+            "INSERT INTO queue_progress (request_id, event) SELECT request_id, ? FROM queue_jobs WHERE request_id = ? AND stream = 1",
+            (payload, request_id)
+        ))
+
+    def read_progress(self, request_id, cursor=0):
+        row = self.connection.execute("SELECT status, stream FROM queue_jobs WHERE request_id = ?", (request_id,)).fetchone()
+        if row is None or not row[1]:
+            return None, []
+        events = self.connection.execute(
+            "SELECT event FROM queue_progress WHERE request_id = ? ORDER BY seq LIMIT -1 OFFSET ?", (request_id, cursor)
+        ).fetchall()
+        return row[0], [loads(event) for event, in events]
+
+    def stale_requests(self, cutoff):
+        return [request_id for request_id, in self.connection.execute(
+            "SELECT request_id FROM queue_jobs WHERE status = ? AND last_heartbeat < ?", (QUEUED, cutoff)
+        )]
+
+    def expire_finished(self, cutoff):
+        def expire(connection):
+            connection.execute(
+                "DELETE FROM queue_progress WHERE request_id IN (SELECT request_id FROM queue_jobs WHERE status IN (?, ?) AND created_at < ?)",
+                (COMPLETED, FAILED, cutoff)
+            )
+            connection.execute("DELETE FROM queue_jobs WHERE status IN (?, ?) AND created_at < ?", (COMPLETED, FAILED, cutoff))
+
+        self._write(expire)
+
+    def counts(self):
+        counts = dict(self.connection.execute("SELECT status, COUNT(*) FROM queue_jobs GROUP BY status").fetchall())
+        return {
+            "queued": counts.get(QUEUED, 0),
+            "processing": counts.get(PROCESSING, 0),
+            "queue_size": counts.get(QUEUED, 0),
+            "cancelled_pending": 0
+        }
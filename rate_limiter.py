@@ -0,0 +1,132 @@
+import threading, time, sqlite3, asyncio
+
+from shared_state import private_database
+
+SEARCH_BUCKET = "search"
+SEAT_LAYOUT_BUCKET = "seat_layout"
+
+def _take_token(tokens, updated_at, now, rate, capacity, max_wait):
+    tokens = min(capacity, tokens + max(0, now - updated_at) * rate)
+    wait = max(0, (1 - tokens) / rate)
+    if wait > max_wait:
+        return None, tokens
+    return wait, tokens - 1
+
+class MemoryTokenBucketBackend:
+    def __init__(self):
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def take(self, name, rate, capacity, max_wait):
+        with self.lock:
+            now = time.time()
+            tokens, updated_at = self.buckets.get(name, (capacity, now))
+            wait, tokens = _take_token(tokens, updated_at, now, rate, capacity, max_wait)
+            self.buckets[name] = (tokens, now)
+            return wait
+
+class SQLiteTokenBucketBackend:
+    def __init__(self, path):
+        self.path = private_database(path)
+        self.local = threading.local()
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS token_buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def _connection(self):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            self.local.connection = connection
+        return connection
+
+    def take(self, name, rate, capacity, max_wait):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = connection.execute("SELECT tokens, updated_at FROM token_buckets WHERE name = ?", (name,)).fetchone()
+            tokens, updated_at = row if row else (capacity, now)
+            wait, tokens = _take_token(tokens, updated_at, now, rate, capacity, max_wait)
+            connection.execute(
+                "INSERT OR REPLACE INTO token_buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                (name, tokens, now)
+            )
+            connection.execute("COMMIT")
+            return wait
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+class RateLimiter:
+    def __init__(self, backend=None, buckets=None, max_wait=30):
+        self.backend = backend or MemoryTokenBucketBackend()
+        self.buckets = dict(buckets or {})
+        self.max_wait = max_wait
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def configure(self, backend=None, buckets=None, max_wait=None):
+        with self.lock:
+            if backend is not None:
+                self.backend = backend
+            if buckets is not None:
+                self.buckets = dict(buckets)
+            if max_wait is not None:
+                self.max_wait = max_wait
+
+    def reserve(self, name):
+        rate, capacity = self.buckets.get(name, (0, 0))
+        if rate <= 0:
+            return 0
+
+        try:
+            wait = self.backend.take(name, rate, max(1, capacity), self.max_wait)
+        except sqlite3.Error as e:
+            print(f"Rate limiter backend error, allowing request: {e}")
+            wait = 0
+
+        with self.lock:
+            stats = self.stats.setdefault(name, {"acquired": 0, "delayed": 0, "rejected": 0, "total_wait": 0.0})
+            if wait is None:
+                stats["rejected"] += 1
+            else:
+                stats["acquired"] += 1
+                if wait > 0:
+                    stats["delayed"] += 1
+                    stats["total_wait"] += wait
+        return wait
+
+    def acquire(self, name):
+        wait = self.reserve(name)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    async def acquire_async(self, name):
+        wait = self.reserve(name)
+        if wait is None:
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "backend": type(self.backend).__name__,
+                "max_wait": self.max_wait,
+                "buckets": {
+                    name: {
+                        "rate": rate,
+                        "burst": capacity,
+                        **{key: round(value, 2) if isinstance(value, float) else value
+                           for key, value in self.stats.get(name, {"acquired": 0, "delayed": 0, "rejected": 0, "total_wait": 0.0}).items()}
+                    }
+                    for name, (rate, capacity) in self.buckets.items()
+                }
+            }
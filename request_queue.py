@@ -1,23 +1,46 @@
-import threading, time, uuid, queue, random
+import threading, time, uuid, random
 from typing import Dict, Any, Optional, Callable
 from datetime import datetime, timedelta
-from collections import deque, OrderedDict
+from collections import deque
+from circuit_breaker import BackoffPolicy, OPEN
+from metrics import REGISTRY
+from queue_backend import MemoryQueueBackend
+
+QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "railway_queue_wait_seconds",
+    "Time a request spends queued before a worker picks it up."
+)
+QUEUE_PROCESSING_SECONDS = REGISTRY.histogram(
+    "railway_queue_processing_seconds",
+    "Time a worker spends on a request, including retries.",
+    ("status",)
+)
+QUEUE_REQUESTS = REGISTRY.counter(
+    "railway_queue_requests_total",
+    "Queued requests by final status.",
+    ("status",)
+)
+QUEUE_MERGED_REQUESTS = REGISTRY.counter(
+    "railway_queue_merged_requests_total",
+    "Queued requests claimed together with an earlier request for the same search."
+)
 
 class RequestQueue:
-    def __init__(self, max_concurrent=1, cooldown_period=3, batch_cleanup_threshold=10, cleanup_interval=30, heartbeat_timeout=60):
-        self.queue = queue.Queue()
-        self.results = {}
-        self.statuses = {}
+    def __init__(self, max_concurrent=1, cooldown_period=3, batch_cleanup_threshold=10, cleanup_interval=30, heartbeat_timeout=60,
+                 circuit_breaker=None, retry_backoff=None, backend=None, merge_limit=1):
+        self.backend = backend or MemoryQueueBackend(batch_cleanup_threshold=batch_cleanup_threshold)
         self.max_concurrent = max_concurrent
+        self.merge_limit = max(1, merge_limit)
+        self.merged_requests = 0
+        self.group_handlers = {}
         self.cooldown_period = cooldown_period
         self.active_requests = 0
         self.lock = threading.Lock()
+        self.work_available = threading.Condition(self.lock)
+        self.status_changed = threading.Condition(self.lock)
+        self.progress_available = threading.Condition(self.lock)
         self.last_request_time = None
         
-        self.queue_order = OrderedDict()
-        self.cancelled_requests = set()
-        
-        self.requests = {}
         self.processing_history = deque(maxlen=50)
         self.abandonment_history = deque(maxlen=100)
         self.avg_processing_time = 8.0
@@ -25,55 +48,55 @@ class RequestQueue:
         self.last_cleanup = time.time()
         self.batch_cleanup_threshold = batch_cleanup_threshold
         self.heartbeat_timeout = heartbeat_timeout
+        self.circuit_breaker = circuit_breaker
+        self.retry_backoff = retry_backoff or BackoffPolicy(base_delay=5, max_delay=30)
+        self.storage_backoff = BackoffPolicy(base_delay=0.1, max_delay=5)
         
-        self.worker_thread = threading.Thread(target=self._process_queue)
-        self.worker_thread.daemon = True
-        self.worker_thread.start()
+        self.worker_threads = []
+        for index in range(max(1, max_concurrent)):
+            worker_thread = threading.Thread(target=self._process_queue, name=f"request-queue-worker-{index}")
+            worker_thread.daemon = True
+            worker_thread.start()
+            self.worker_threads.append(worker_thread)
         
         self.enhanced_cleanup_thread = threading.Thread(target=self._enhanced_cleanup_loop)
         self.enhanced_cleanup_thread.daemon = True
         self.enhanced_cleanup_thread.start()
     
-    def add_request(self, request_func, params):
+    def register_handler(self, request_func, group_func=None):
+        with self.lock:
+            self.backend.register_handler(request_func)
+            if group_func is not None:
+                self.group_handlers[request_func] = group_func
+            self.work_available.notify_all()
+    
+    def add_request(self, request_func, params, stream=False, merge_key=None):
         request_id = str(uuid.uuid4())
-        current_time = datetime.now()
+        if self.merge_limit <= 1 or request_func not in self.group_handlers:
+            merge_key = None
         
         with self.lock:
-            self.queue.put((request_id, request_func, params))
-            queue_size = self.queue.qsize()
-            
-            self.queue_order[request_id] = current_time
-            
-            self.requests[request_id] = {
-                'request_func': request_func,
-                'params': params,
-                'timestamp': time.time(),
-                'last_heartbeat': time.time()
-            }
-            
-            self.statuses[request_id] = {
-                "status": "queued",
-                "position": queue_size,
-                "created_at": current_time,
-                "estimated_time": self._enhanced_estimate_wait_time(queue_size),
-                "last_heartbeat": time.time()
-            }
+            self.backend.add(request_id, request_func, params, stream, merge_key)
+            self.work_available.notify_all()
+        return request_id
+    
+    def add_result(self, result):
+        request_id = str(uuid.uuid4())
+        with self.lock:
+            self.backend.add_result(request_id, result)
         return request_id
     
     def _enhanced_estimate_wait_time(self, position):
-        base_time = self.avg_processing_time + (self.cooldown_period / self.max_concurrent)
+        workers = len(self.worker_threads)
+        cycle_time = max(self.avg_processing_time, self.cooldown_period)
         
         predicted_abandonments = self._predict_abandonments(position)
         effective_position = max(1, position - predicted_abandonments)
         
-        batch = (effective_position // self.max_concurrent)
-        position_in_batch = effective_position % self.max_concurrent
-        
-        if position_in_batch == 0:
-            position_in_batch = self.max_concurrent
-            batch -= 1
-            
-        wait_time = (batch * self.cooldown_period) + (position_in_batch * base_time)
+        rounds_ahead = (effective_position - 1) // workers
+        wait_time = rounds_ahead * cycle_time + self.avg_processing_time
+        if self.active_requests >= workers:
+            wait_time += cycle_time / 2
         return max(1, int(wait_time))
     
     def _predict_abandonments(self, current_position):
@@ -91,226 +114,224 @@ class RequestQueue:
     
     def update_heartbeat(self, request_id):
         with self.lock:
-            current_time = time.time()
-            if request_id in self.statuses:
-                self.statuses[request_id]["last_heartbeat"] = current_time
-            if request_id in self.requests:
-                self.requests[request_id]["last_heartbeat"] = current_time
-                return True
-        return False
+            return self.backend.touch(request_id)
     
     def get_request_status(self, request_id):
         with self.lock:
-            if request_id in self.statuses:
-                status_data = self.statuses[request_id].copy()
-                
-                if status_data["status"] == "queued":
-                    position = self._get_fast_position(request_id)
-                    status_data["position"] = position
-                    status_data["estimated_time"] = self._enhanced_estimate_wait_time(position)
-                elif status_data["status"] == "processing":
-                    status_data["position"] = 0
-                    status_data["estimated_time"] = 0
-                return status_data
-            return None
+            return self._status_snapshot(request_id)
     
-    def _get_fast_position(self, request_id):
-        if request_id not in self.queue_order:
-            return 0
-        
-        position = 1
-        target_time = self.queue_order[request_id]
-        
-        for rid, timestamp in self.queue_order.items():
-            if timestamp < target_time and rid not in self.cancelled_requests:
-                position += 1
-            elif rid == request_id:
-                break
+    def wait_for_status_change(self, request_id, version=None, timeout=None):
+        with self.lock:
+            if version is not None and version == self.backend.status_version():
+                poll_interval = self.backend.poll_interval
+                if poll_interval is not None:
+                    timeout = poll_interval if timeout is None else min(timeout, poll_interval)
+                self.status_changed.wait(timeout)
+            return self._status_snapshot(request_id), self.backend.status_version()
+    
+    def _status_snapshot(self, request_id):
+        status_data = self.backend.get_status(request_id)
+        if status_data is None:
+            return None
         
-        return position
+        if status_data["status"] == "queued":
+            status_data["estimated_time"] = self._enhanced_estimate_wait_time(status_data["position"])
+        else:
+            status_data["position"] = 0
+            status_data["estimated_time"] = 0
+        return status_data
+    
+    def _publish_status_change(self):
+        self.status_changed.notify_all()
+        self.progress_available.notify_all()
     
     def get_request_result(self, request_id):
         with self.lock:
-            if request_id in self.results:
-                result = self.results[request_id]
-                del self.results[request_id]
-                del self.statuses[request_id]
-                return result
-            return None
+            return self.backend.pop_result(request_id)
+    
+    def publish_progress(self, request_id, event):
+        with self.lock:
+            self.backend.append_progress(request_id, event)
+            self.progress_available.notify_all()
+    
+    def get_progress(self, request_id, cursor=0):
+        with self.lock:
+            return self.backend.read_progress(request_id, cursor)
+
+    def wait_for_progress(self, request_id, cursor=0, timeout=None):
+        with self.lock:
+            status, events = self.backend.read_progress(request_id, cursor)
+            if status in ("queued", "processing") and not events:
+                poll_interval = self.backend.poll_interval
+                if poll_interval is not None:
+                    timeout = poll_interval if timeout is None else min(timeout, poll_interval)
+                self.progress_available.wait(timeout)
+                status, events = self.backend.read_progress(request_id, cursor)
+            return status, events
     
     def cancel_request(self, request_id):
         with self.lock:
-            removed = False
-            
-            if request_id in self.statuses:
-                self.cancelled_requests.add(request_id)
-                status = self.statuses[request_id]
-                
-                if status["status"] == "queued":
-                    abandonment_data = {
-                        'position': status.get("position", 0),
-                        'wait_time': time.time() - status["created_at"].timestamp(),
-                        'timestamp': time.time()
-                    }
-                    self.abandonment_history.append(abandonment_data)
-                
-                del self.statuses[request_id]
-                removed = True
-            
-            if request_id in self.results:
-                del self.results[request_id]
-            
-            if request_id in self.requests:
-                del self.requests[request_id]
-            
-            if request_id in self.queue_order:
-                del self.queue_order[request_id]
-            
-            if len(self.cancelled_requests) >= self.batch_cleanup_threshold:
-                self._batch_remove_cancelled()
+            status = self.backend.cancel(request_id)
+            if status is None:
+                return False
             
-            return removed
-    
-    def _batch_remove_cancelled(self):
-        if not self.cancelled_requests:
-            return
-        
-        temp_queue = queue.Queue()
-        removed_count = 0
-        
-        while not self.queue.empty():
-            try:
-                item = self.queue.get_nowait()
-                if item[0] not in self.cancelled_requests:
-                    temp_queue.put(item)
-                else:
-                    removed_count += 1
-            except queue.Empty:
-                break
-        
-        self.queue = temp_queue
-        self.cancelled_requests.clear()
-        
-        if removed_count > 0:
-            print(f"Batch cleanup: Removed {removed_count} cancelled requests from queue")
+            if status["status"] == "queued":
+                self.abandonment_history.append({
+                    'position': status.get("position", 0),
+                    'wait_time': time.time() - status["created_at"].timestamp(),
+                    'timestamp': time.time()
+                })
+            self._publish_status_change()
+            QUEUE_REQUESTS.inc("cancelled")
+            return True
     
     def _process_queue(self):
+        last_start = None
+        failures = 0
         while True:
-            batch = []
             with self.lock:
-                if self.cancelled_requests:
-                    self._batch_remove_cancelled()
-                
-                if self.last_request_time and (datetime.now() - self.last_request_time) < timedelta(seconds=self.cooldown_period):
-                    time_to_wait = (self.last_request_time + timedelta(seconds=self.cooldown_period) - datetime.now()).total_seconds()
-                    if time_to_wait > 0:
-                        self.lock.release()
-                        time.sleep(time_to_wait)
-                        self.lock.acquire()
-                
-                while len(batch) < self.max_concurrent and not self.queue.empty():
-                    item = self.queue.get()
-                    request_id = item[0]
-                    
-                    if request_id in self.cancelled_requests:
-                        self.cancelled_requests.discard(request_id)
-                        continue
-                    
-                    if request_id in self.statuses:
-                        batch.append(item)
-                        self.statuses[request_id]["status"] = "processing"
-                        self.queue_order.pop(request_id, None)
-                
-                if batch:
-                    self.last_request_time = datetime.now()
+                group = None
+                while group is None:
+                    try:
+                        time_to_wait = 0 if last_start is None else last_start + self.cooldown_period - time.monotonic()
+                        if not self.backend.has_pending():
+                            self.work_available.wait(self.backend.poll_interval)
+                        elif time_to_wait > 0:
+                            self.work_available.wait(time_to_wait)
+                        else:
+                            group = self._next_request()
+                        failures = 0
+                    except Exception as e:
+                        failures += 1
+                        print(f"Queue worker: Could not claim a request ({e}), retrying")
+                        self.work_available.wait(self.storage_backoff.delay(failures))
             
-            for request_id, request_func, params in batch:
-                start_time = time.time()
-                
+            last_start = time.monotonic()
+            try:
+                self._run_group(group)
+            finally:
                 with self.lock:
-                    if request_id not in self.statuses or request_id in self.cancelled_requests:
-                        continue
+                    self.active_requests -= 1
+    
+    def _next_request(self):
+        claimed = self.backend.claim(self.merge_limit)
+        if not claimed:
+            return None
+        
+        now = time.time()
+        self.active_requests += 1
+        self.merged_requests += len(claimed) - 1
+        self.last_request_time = datetime.now()
+        self._publish_status_change()
+        for request_id, request_func, params, enqueued_at, stream in claimed:
+            QUEUE_WAIT_SECONDS.observe(now - enqueued_at)
+        if len(claimed) > 1:
+            QUEUE_MERGED_REQUESTS.inc(amount=len(claimed) - 1)
+        return [(request_id, request_func, params, stream) for request_id, request_func, params, enqueued_at, stream in claimed]
+    
+    def _run_group(self, group):
+        start_time = time.time()
+        group = [(request_id, request_func, self._request_params(request_id, params, stream))
+                 for request_id, request_func, params, stream in group]
+        
+        try:
+            max_retries = 3
+            retry_count = 0
+            
+            while retry_count < max_retries:
+                with self.lock:
+                    group = [item for item in group if self.backend.is_active(item[0])]
+                if not group:
+                    return
                 
                 try:
-                    max_retries = 3
-                    retry_count = 0
-                    retry_delay = 5
-                    
-                    while retry_count < max_retries:
-                        with self.lock:
-                            if request_id not in self.statuses or request_id in self.cancelled_requests:
-                                break
-                        
-                        try:
-                            result = request_func(**params)
-                            break
-                        except Exception as e:
-                            if "experiencing high traffic" in str(e) or "403" in str(e):
-                                retry_count += 1
-                                if retry_count < max_retries:
-                                    retry_delay_with_jitter = retry_delay + (retry_count * 2) + (random.random() * 2)
-                                    time.sleep(retry_delay_with_jitter)
-                                    continue
-                            raise
-                    
-                    end_time = time.time()
-                    processing_time = end_time - start_time
-                    self.processing_history.append(processing_time)
-                    
-                    if self.processing_history:
-                        self.avg_processing_time = sum(self.processing_history) / len(self.processing_history)
-                    
-                    with self.lock:
-                        if request_id in self.statuses:
-                            self.results[request_id] = result
-                            self.statuses[request_id]["status"] = "completed"
+                    results = self._call_group(group)
+                    break
                 except Exception as e:
-                    with self.lock:
-                        if request_id in self.statuses:
-                            self.results[request_id] = {"error": str(e)}
-                            self.statuses[request_id]["status"] = "failed"
+                    if "experiencing high traffic" in str(e) or "403" in str(e):
+                        retry_count += 1
+                        if retry_count < max_retries and not self._upstream_unavailable():
+                            time.sleep(self.retry_backoff.delay(retry_count))
+                            continue
+                    raise
             
-            if not batch:
-                time.sleep(1)
-                self._cleanup_old_entries()
+            status = "completed"
+        except Exception as e:
+            status = "failed"
+            results = [{"error": str(e)} for _ in group]
+        
+        processing_time = time.time() - start_time
+        outcomes = [(request_id, status, result, processing_time) for (request_id, _, _), result in zip(group, results)]
+        failures = 0
+        while True:
+            try:
+                self._finish_requests(outcomes)
+                return
+            except Exception as e:
+                failures += 1
+                print(f"Queue worker: Could not store {len(outcomes)} results ({e}), retrying")
+                time.sleep(self.storage_backoff.delay(failures))
+    
+    def _request_params(self, request_id, params, stream):
+        if stream:
+            return dict(params, on_progress=lambda event: self.publish_progress(request_id, event))
+        return params
+    
+    def _call_group(self, group):
+        request_func = group[0][1]
+        if len(group) == 1:
+            return [request_func(**group[0][2])]
+        return self.group_handlers[request_func]([params for _, _, params in group])
+    
+    def _record_processing_time(self, processing_time):
+        self.processing_history.append(processing_time)
+        self.avg_processing_time = sum(self.processing_history) / len(self.processing_history)
+    
+    def _finish_requests(self, outcomes):
+        with self.lock:
+            changed = False
+            for request_id, status, result, processing_time in outcomes:
+                changed = self.backend.finish(request_id, status, result) or changed
+            for request_id, status, result, processing_time in outcomes:
+                if status == "completed":
+                    self._record_processing_time(processing_time)
+            if changed:
+                self._publish_status_change()
+        
+        for request_id, status, result, processing_time in outcomes:
+            QUEUE_PROCESSING_SECONDS.observe(processing_time, status)
+            QUEUE_REQUESTS.inc(status)
+    
+    def _upstream_unavailable(self):
+        return self.circuit_breaker is not None and self.circuit_breaker.state == OPEN
     
     def _cleanup_old_entries(self):
         with self.lock:
-            current_time = datetime.now()
-            expired_ids = []
-            
-            for request_id, status in self.statuses.items():
-                if status["status"] in ["completed", "failed"] and "created_at" in status:
-                    time_diff = current_time - status["created_at"]
-                    if time_diff.total_seconds() > 1800:
-                        expired_ids.append(request_id)
-            
-            for request_id in expired_ids:
-                if request_id in self.results:
-                    del self.results[request_id]
-                if request_id in self.statuses:
-                    del self.statuses[request_id]
-                if request_id in self.queue_order:
-                    del self.queue_order[request_id]
+            self.backend.expire_finished(time.time() - 1800)
     
     def _enhanced_cleanup_loop(self):
         while True:
             time.sleep(self.cleanup_interval)
-            self._enhanced_cleanup()
-            with self.lock:
-                if self.cancelled_requests:
-                    self._batch_remove_cancelled()
+            try:
+                self._renew_claims()
+                self._enhanced_cleanup()
+                self._cleanup_old_entries()
+            except Exception as e:
+                print(f"Enhanced cleanup: Failed ({e}), retrying in {self.cleanup_interval}s")
+    
+    def _renew_claims(self):
+        with self.lock:
+            self.backend.renew_claims()
+            expired = self.backend.expire_claims()
+            if expired:
+                self._publish_status_change()
+        if expired:
+            QUEUE_REQUESTS.inc("interrupted", amount=expired)
+            print(f"Lease cleanup: Failed {expired} requests claimed by a worker that stopped")
     
     def _enhanced_cleanup(self):
-        current_time = time.time()
-        stale_requests = []
-        
         with self.lock:
-            for request_id, status in self.statuses.items():
-                if status["status"] == "queued":
-                    last_heartbeat = status.get("last_heartbeat", 0)
-                    if current_time - last_heartbeat > self.heartbeat_timeout:
-                        stale_requests.append(request_id)
+            stale_requests = self.backend.stale_requests(time.time() - self.heartbeat_timeout)
         
         for request_id in stale_requests:
             self.cancel_request(request_id)
@@ -320,25 +341,22 @@ class RequestQueue:
     
     def force_cleanup(self):
         with self.lock:
-            if self.cancelled_requests:
-                self._batch_remove_cancelled()
+            self.backend.compact()
         self._enhanced_cleanup()
         self._cleanup_old_entries()
     
     def get_queue_stats(self):
         with self.lock:
-            total_queued = sum(1 for s in self.statuses.values() if s["status"] == "queued")
-            total_processing = sum(1 for s in self.statuses.values() if s["status"] == "processing")
             recent_abandonments = len([a for a in self.abandonment_history 
                                       if time.time() - a['timestamp'] < 3600])
             
             return {
-                "queued": total_queued,
-                "processing": total_processing,
+                **self.backend.counts(),
+                "workers": len(self.worker_threads),
                 "avg_processing_time": round(self.avg_processing_time, 2),
                 "recent_abandonments": recent_abandonments,
-                "queue_size": self.queue.qsize(),
-                "cancelled_pending": len(self.cancelled_requests)
+                "merged_requests": self.merged_requests,
+                "backend": type(self.backend).__name__
             }
 
 request_queue = RequestQueue()
@@ -0,0 +1,96 @@
+from typing import Dict, List, Tuple
+
+from detailsSeatAvailability import sort_seats
+
+AVAILABLE = "available"
+BOOKING_PROCESS = "booking_process"
+ISSUED = "issued"
+SEAT_LISTS = (AVAILABLE, BOOKING_PROCESS, ISSUED)
+
+def seat_type_lists(seat_type) -> Dict[str, List[str]]:
+    ticket_types = seat_type['ticket_types'] or {}
+    issued = ticket_types.get('issued_combined') if ticket_types else None
+    return {
+        AVAILABLE: list(seat_type['available_seats']),
+        BOOKING_PROCESS: list(seat_type['booking_process_seats']),
+        ISSUED: list(issued['seats']) if issued else []
+    }
+
+def seat_type_signature(seat_type, lists: Dict[str, List[str]]) -> tuple:
+    ticket_types = seat_type['ticket_types'] or {}
+    return (
+        seat_type['type'],
+        seat_type['is_422'],
+        seat_type.get('error_message'),
+        bool(ticket_types),
+        bool(lists[AVAILABLE] or lists[BOOKING_PROCESS]),
+        bool(lists[ISSUED]),
+        tuple(ticket_types[2]['seats']) if 2 in ticket_types else (),
+        tuple(ticket_types[4]['seats']) if 4 in ticket_types else ()
+    )
+
+def train_snapshot(details) -> Tuple[Dict, List[Dict[str, List[str]]]]:
+    seat_lists = []
+    signatures = []
+    for seat_type in details['seat_data']:
+        lists = seat_type_lists(seat_type)
+        seat_lists.append(lists)
+        signatures.append(seat_type_signature(seat_type, lists))
+
+    snapshot = {
+        "signature": (details['departure_time'], details['arrival_time'], details.get('all_seats_422', False), tuple(signatures)),
+        "seats": [{name: frozenset(seats) for name, seats in lists.items()} for lists in seat_lists]
+    }
+    return snapshot, seat_lists
+
+def snapshot_result(result: Dict) -> Dict[str, Dict]:
+    return {train: train_snapshot(details)[0] for train, details in result.items()}
+
+def diff_seat_list(previous: frozenset, seats: List[str]) -> Dict[str, list]:
+    added = []
+    after = None
+    for seat in seats:
+        if seat not in previous:
+            added.append([seat, after])
+        after = seat
+
+    current = set(seats)
+    removed = sort_seats([seat for seat in previous if seat not in current])
+
+    changes = {}
+    if added:
+        changes["added"] = added
+    if removed:
+        changes["removed"] = removed
+    return changes
+
+def diff_results(snapshot: Dict[str, Dict], result: Dict) -> Tuple[Dict, Dict[str, Dict]]:
+    delta = {
+        "removed": [train for train in snapshot if train not in result],
+        "rerender": [],
+        "changed": {}
+    }
+    new_snapshot = {}
+
+    for train, details in result.items():
+        current, seat_lists = train_snapshot(details)
+        new_snapshot[train] = current
+        previous = snapshot.get(train)
+
+        if previous is None or previous["signature"] != current["signature"]:
+            delta["rerender"].append(train)
+            continue
+
+        train_changes = {}
+        for index, lists in enumerate(seat_lists):
+            seat_type_changes = {}
+            for name in SEAT_LISTS:
+                changes = diff_seat_list(previous["seats"][index][name], lists[name])
+                if changes:
+                    seat_type_changes[name] = changes
+            if seat_type_changes:
+                train_changes[str(index)] = seat_type_changes
+        if train_changes:
+            delta["changed"][train] = train_changes
+
+    return delta, new_snapshot
@@ -0,0 +1,258 @@
+import threading
+from array import array
+from typing import Dict, List
+
+from detailsSeatAvailability import TICKET_TYPE_LABELS, sort_seats
+from shared_state import register_type
+
+_SEAT_VOCABULARY = []
+_SEAT_PREFIXES = []
+_SEAT_IDS = {}
+_VOCABULARY_LOCK = threading.Lock()
+
+def seat_id(seat: str) -> int:
+    sid = _SEAT_IDS.get(seat)
+    if sid is None:
+        with _VOCABULARY_LOCK:
+            sid = _SEAT_IDS.get(seat)
+            if sid is None:
+                sid = len(_SEAT_VOCABULARY)
+                _SEAT_VOCABULARY.append(seat)
+                _SEAT_PREFIXES.append(seat.split('-')[0])
+                _SEAT_IDS[seat] = sid
+    return sid
+
+def get_vocabulary_size() -> int:
+    return len(_SEAT_VOCABULARY)
+
+class SeatList:
+    __slots__ = ("ids",)
+
+    def __init__(self, seats=()):
+        self.ids = array('I', [seat_id(seat) for seat in seats])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        vocabulary = _SEAT_VOCABULARY
+        return (vocabulary[sid] for sid in self.ids)
+
+    def __bool__(self):
+        return len(self.ids) > 0
+
+    def __reduce__(self):
+        return (SeatList, (self.seats(),))
+
+    def seats(self) -> List[str]:
+        vocabulary = _SEAT_VOCABULARY
+        return [vocabulary[sid] for sid in self.ids]
+
+    def grouped(self) -> Dict:
+        vocabulary = _SEAT_VOCABULARY
+        prefixes = _SEAT_PREFIXES
+        groups = {}
+        for sid in self.ids:
+            prefix = prefixes[sid]
+            group = groups.get(prefix)
+            if group is None:
+                groups[prefix] = [vocabulary[sid]]
+            else:
+                group.append(vocabulary[sid])
+        return {prefix: {"seats": seats, "count": len(seats)} for prefix, seats in groups.items()}
+
+EMPTY_SEAT_LIST = SeatList()
+
+class _SlotMapping:
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return isinstance(key, str) and hasattr(self, key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+class TicketTypeView(_SlotMapping):
+    __slots__ = ("label", "seat_list")
+
+    def __init__(self, label, seat_list):
+        self.label = label
+        self.seat_list = seat_list
+
+    @property
+    def count(self):
+        return len(self.seat_list)
+
+    @property
+    def seats(self):
+        return self.seat_list.seats()
+
+    @property
+    def grouped(self):
+        return self.seat_list.grouped()
+
+class IssuedTotalView(_SlotMapping):
+    __slots__ = ("count",)
+
+    def __init__(self, count):
+        self.count = count
+
+class SeatTypeResult(_SlotMapping):
+    __slots__ = ("type", "is_422", "has_layout", "available", "booking_process", "ticket_type_seats", "issued", "views",
+                 "error_info", "error_message")
+
+    def __init__(self, seat_info: Dict):
+        self.type = seat_info["type"]
+        self.is_422 = seat_info["is_422"]
+        ticket_types = seat_info.get("ticket_types") or {}
+        self.has_layout = seat_info.get("has_layout", bool(ticket_types))
+        self.available = SeatList(seat_info["available_seats"]) if seat_info["available_seats"] else EMPTY_SEAT_LIST
+        self.booking_process = SeatList(seat_info["booking_process_seats"]) if seat_info["booking_process_seats"] else EMPTY_SEAT_LIST
+        self.ticket_type_seats = {
+            t: SeatList(ticket_types[t]["seats"]) for t, _ in TICKET_TYPE_LABELS if t in ticket_types
+        }
+        if 1 in self.ticket_type_seats and 3 in self.ticket_type_seats:
+            self.issued = SeatList(sort_seats(self.ticket_type_seats[1].seats() + self.ticket_type_seats[3].seats()))
+        else:
+            self.issued = self.ticket_type_seats.get(1) or self.ticket_type_seats.get(3) or EMPTY_SEAT_LIST
+        self.views = None
+        if "error_info" in seat_info:
+            self.error_info = seat_info["error_info"]
+        if "error_message" in seat_info:
+            self.error_message = seat_info["error_message"]
+
+    @property
+    def available_count(self):
+        return len(self.available)
+
+    @property
+    def booking_process_count(self):
+        return len(self.booking_process)
+
+    @property
+    def available_seats(self):
+        return self.available.seats()
+
+    @property
+    def booking_process_seats(self):
+        return self.booking_process.seats()
+
+    @property
+    def grouped_seats(self):
+        return self.available.grouped()
+
+    @property
+    def grouped_booking_process(self):
+        return self.booking_process.grouped()
+
+    def issued_seats(self) -> SeatList:
+        return self.issued
+
+    @property
+    def ticket_types(self):
+        if not self.has_layout:
+            return {}
+        if self.views is None:
+            labels = dict(TICKET_TYPE_LABELS)
+            views = {t: TicketTypeView(labels[t], seat_list) for t, seat_list in self.ticket_type_seats.items()}
+            views["issued_total"] = IssuedTotalView(len(self.issued))
+            views["issued_combined"] = TicketTypeView("Issued Tickets to Buy", self.issued)
+            self.views = views
+        return self.views
+
+    @property
+    def grouped_ticket_types(self):
+        return {t: seat_list.grouped() for t, seat_list in self.ticket_type_seats.items()}
+
+    def state(self) -> Dict:
+        seat_info = {
+            "type": self.type,
+            "is_422": self.is_422,
+            "has_layout": self.has_layout,
+            "available_seats": self.available_seats,
+            "booking_process_seats": self.booking_process_seats,
+            "ticket_types": {t: {"seats": seat_list.seats()} for t, seat_list in self.ticket_type_seats.items()}
+        }
+        for optional in ("error_info", "error_message"):
+            if optional in self:
+                seat_info[optional] = self[optional]
+        return seat_info
+
+    def to_dict(self) -> Dict:
+        ticket_types = {}
+        for t, view in self.ticket_types.items():
+            if t == "issued_total":
+                ticket_types[t] = {"count": view.count}
+            elif t == "issued_combined":
+                ticket_types[t] = {"label": view.label, "seats": view.seats, "count": view.count, "grouped": view.grouped}
+            else:
+                ticket_types[t] = {"label": view.label, "seats": view.seats, "count": view.count}
+        seat_info = {
+            "type": self.type,
+            "available_count": self.available_count,
+            "booking_process_count": self.booking_process_count,
+            "available_seats": self.available_seats,
+            "booking_process_seats": self.booking_process_seats,
+            "is_422": self.is_422,
+            "ticket_types": ticket_types,
+            "grouped_seats": self.grouped_seats,
+            "grouped_booking_process": self.grouped_booking_process,
+            "grouped_ticket_types": self.grouped_ticket_types
+        }
+        for optional in ("error_info", "error_message"):
+            if optional in self:
+                seat_info[optional] = self[optional]
+        return seat_info
+
+class TrainResult(_SlotMapping):
+    __slots__ = ("departure_time", "arrival_time", "seat_data", "from_station", "to_station", "journey_duration", "all_seats_422")
+
+    def __init__(self, details: Dict):
+        self.departure_time = details["departure_time"]
+        self.arrival_time = details["arrival_time"]
+        self.seat_data = [SeatTypeResult(seat_info) for seat_info in details["seat_data"]]
+        for optional in ("from_station", "to_station", "journey_duration", "all_seats_422"):
+            if optional in details:
+                setattr(self, optional, details[optional])
+
+    def state(self) -> Dict:
+        details = {
+            "departure_time": self.departure_time,
+            "arrival_time": self.arrival_time,
+            "seat_data": [seat_type.state() for seat_type in self.seat_data]
+        }
+        for optional in ("from_station", "to_station", "journey_duration", "all_seats_422"):
+            if optional in self:
+                details[optional] = self[optional]
+        return details
+
+    def to_dict(self) -> Dict:
+        details = {
+            "departure_time": self.departure_time,
+            "arrival_time": self.arrival_time,
+            "seat_data": [seat_type.to_dict() for seat_type in self.seat_data]
+        }
+        for optional in ("from_station", "to_station", "journey_duration", "all_seats_422"):
+            if optional in self:
+                details[optional] = self[optional]
+        return details
+
+register_type(TrainResult, "train")
+
+def compact_result(result: Dict) -> Dict[str, TrainResult]:
+    return {train: TrainResult(details) for train, details in result.items()}
+
+def expand_result(result: Dict) -> Dict[str, Dict]:
+    return {train: details.to_dict() if isinstance(details, TrainResult) else details for train, details in result.items()}
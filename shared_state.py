@@ -0,0 +1,69 @@
+import json, os, stat
+
+_TYPES = {}
+_TAGS = {}
+
+def register_type(cls, tag):
+    _TYPES[cls] = tag
+    _TAGS[tag] = cls
+
+def to_state(value):
+    tag = _TYPES.get(type(value))
+    if tag is not None:
+        return {"__" + tag + "__": to_state(value.state())}
+    if isinstance(value, dict):
+        if all(isinstance(key, str) and not key.startswith("__") for key in value):
+            return {key: to_state(item) for key, item in value.items()}
+        return {"__items__": [[to_state(key), to_state(item)] for key, item in value.items()]}
+    if isinstance(value, tuple):
+        return {"__tuple__": [to_state(item) for item in value]}
+    if isinstance(value, (set, frozenset)):
+        return {"__frozenset__": [to_state(item) for item in value]}
+    if isinstance(value, list):
+        return [to_state(item) for item in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    raise TypeError(f"Cannot store {type(value).__name__} in shared state")
+
+def from_state(value):
+    if isinstance(value, list):
+        return [from_state(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if len(value) == 1:
+        (key, item), = value.items()
+        if key == "__items__":
+            return {from_state(k): from_state(v) for k, v in item}
+        if key == "__tuple__":
+            return tuple(from_state(element) for element in item)
+        if key == "__frozenset__":
+            return frozenset(from_state(element) for element in item)
+        if key.startswith("__") and key.endswith("__"):
+            cls = _TAGS.get(key[2:-2])
+            if cls is None:
+                raise ValueError(f"Unknown shared state type {key}")
+            return cls(from_state(item))
+    return {key: from_state(item) for key, item in value.items()}
+
+def dumps(value):
+    return json.dumps(to_state(value), separators=(",", ":"))
+
+def loads(text):
+    return from_state(json.loads(text))
+
+def private_database(path):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    try:
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_NOFOLLOW", 0), 0o600))
+    except FileExistsError:
+        pass
+
+    info = os.lstat(path)
+    if not stat.S_ISREG(info.st_mode):
+        raise Exception(f"Shared state database {path} is not a regular file")
+    if info.st_uid != os.getuid():
+        raise Exception(f"Shared state database {path} is owned by another user")
+    if info.st_mode & 0o077:
+        os.chmod(path, 0o600)
+    return path
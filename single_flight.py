@@ -0,0 +1,111 @@
+import threading, asyncio
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    def __init__(self, share_result=None, share_error=None):
+        self.share_result = share_result or (lambda result: True)
+        self.share_error = share_error or (lambda error: True)
+        self.calls = {}
+        self.async_calls = {}
+        self.lock = threading.Lock()
+
+        self.leader_calls = 0
+        self.shared_calls = 0
+        self.unshared_calls = 0
+
+    def do(self, key, func):
+        with self.lock:
+            call = self.calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _Call()
+                self.calls[key] = call
+                self.leader_calls += 1
+
+        if is_leader:
+            try:
+                call.result = func()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self.lock:
+                    del self.calls[key]
+                call.done.set()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        call.done.wait()
+        if self._is_shared(call.result, call.error):
+            if call.error is not None:
+                raise call.error
+            return call.result
+        return func()
+
+    async def do_async(self, key, coro_func):
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            future = self.async_calls.get(key)
+            is_leader = future is None or future.get_loop() is not loop
+            if is_leader:
+                future = loop.create_future()
+                self.async_calls[key] = future
+                self.leader_calls += 1
+
+        if is_leader:
+            try:
+                result = await coro_func()
+            except Exception as e:
+                future.set_exception(e)
+                future.exception()
+                raise
+            else:
+                future.set_result(result)
+                return result
+            finally:
+                with self.lock:
+                    if self.async_calls.get(key) is future:
+                        del self.async_calls[key]
+                if not future.done():
+                    future.cancel()
+
+        try:
+            result, error = await asyncio.shield(future), None
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+            return await coro_func()
+        except Exception as e:
+            result, error = None, e
+
+        if self._is_shared(result, error):
+            if error is not None:
+                raise error
+            return result
+        return await coro_func()
+
+    def _is_shared(self, result, error):
+        if error is None:
+            shared = self.share_result(result)
+        else:
+            shared = self.share_error(error)
+        with self.lock:
+            if shared:
+                self.shared_calls += 1
+            else:
+                self.unshared_calls += 1
+        return shared
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "in_flight": len(self.calls) + len(self.async_calls),
+                "upstream_calls": self.leader_calls + self.unshared_calls,
+                "upstream_calls_saved": self.shared_calls,
+                "unshared_followers": self.unshared_calls
+            }
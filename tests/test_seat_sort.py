@@ -0,0 +1,57 @@
+import random, string
+
+import pytest
+
+import detailsSeatAvailability as dsa
+from detailsSeatAvailability import BANGLA_COACH_ORDER, SEAT_KEY_CACHE_LIMIT, sort_seat_number, sort_seats
+
+UNKNOWN_COACHES = ["EXTRA", "PWR", "ZZ", "", "ka", "KA "]
+
+def random_seat(rng):
+    coach = rng.choice(BANGLA_COACH_ORDER + UNKNOWN_COACHES)
+    number = rng.choice([str(rng.randint(0, 120)), f"0{rng.randint(0, 9)}", "X" + str(rng.randint(1, 9)), "", " 7", "+3", "-"])
+    shape = rng.randint(0, 5)
+    if shape == 0:
+        return coach
+    if shape == 1:
+        return f"{coach}-{rng.choice(string.ascii_uppercase)}-{number}"
+    if shape == 2:
+        return f"{coach}-{number}-{rng.randint(1, 9)}-{rng.randint(1, 9)}"
+    return f"{coach}-{number}"
+
+def assert_sorted_like_legacy(seats):
+    original = list(seats)
+    assert sort_seats(seats) == sorted(original, key=sort_seat_number)
+    assert seats == original
+
+@pytest.fixture(autouse=True)
+def empty_key_cache():
+    dsa._SEAT_KEY_CACHE.clear()
+    yield
+    dsa._SEAT_KEY_CACHE.clear()
+
+@pytest.mark.parametrize("seed", range(20))
+def test_randomized_seats(seed):
+    rng = random.Random(seed)
+    for _ in range(50):
+        seats = [random_seat(rng) for _ in range(rng.randint(0, 200))]
+        if rng.random() < 0.3:
+            seats += rng.sample(seats, k=len(seats) // 2)
+        assert_sorted_like_legacy(seats)
+
+def test_unknown_coaches():
+    assert_sorted_like_legacy(["ZZ-3", "KA-2", "PWR-1", "EXTRA-10", "ZZ-1", "STD-4", "EXTRA-2", "KA-1", "PWR-B", "ka-1"])
+
+def test_three_part_seat_numbers():
+    assert_sorted_like_legacy(["KHA-B-12", "KA-A-2", "KA-B-1", "KA-A-10", "KA-12", "KA-A-X", "ZZ-A-1", "KA-B-", "KHA-3"])
+
+def test_single_coach():
+    assert_sorted_like_legacy(["GA-10", "GA-2", "GA-01", "GA-X1", "GA-1", "GA-"])
+
+def test_more_keys_than_the_cache_holds():
+    seats = [f"{coach}-{number}" for coach in BANGLA_COACH_ORDER + ["EXTRA", "PWR", "ZZ"] for number in range(1000)]
+    assert len(seats) > SEAT_KEY_CACHE_LIMIT
+    random.Random(0).shuffle(seats)
+    assert_sorted_like_legacy(seats)
+    assert len(dsa._SEAT_KEY_CACHE) == SEAT_KEY_CACHE_LIMIT
+    assert_sorted_like_legacy(seats)
@@ -0,0 +1,192 @@
+import threading, time, sqlite3
+from collections import OrderedDict
+from shared_state import dumps, loads, private_database
+
+FRESH = "fresh"
+STALE = "stale"
+
+class TTLCache:
+    def __init__(self, max_entries=512, ttl=10, stale_ttl=0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.entries = OrderedDict()
+        self.refreshing = set()
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key):
+        if not self.enabled:
+            return None, None
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, None
+
+            value, stored_at = entry
+            age = time.monotonic() - stored_at
+            if age <= self.ttl:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return value, FRESH
+
+            if age <= self.ttl + self.stale_ttl:
+                self.entries.move_to_end(key)
+                self.stale_hits += 1
+                return value, STALE
+
+            del self.entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None, None
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+
+        with self.lock:
+            self.entries[key] = (value, time.monotonic())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def begin_refresh(self, key):
+        with self.lock:
+            if key in self.refreshing:
+                return False
+            self.refreshing.add(key)
+            return True
+
+    def end_refresh(self, key):
+        with self.lock:
+            self.refreshing.discard(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self):
+        with self.lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "stale_ttl": self.stale_ttl,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": round((self.hits + self.stale_hits) / lookups, 3) if lookups else 0.0
+            }
+
+class SQLiteTTLCache:
+    def __init__(self, path, namespace, max_entries=512, ttl=10):
+        self.path = private_database(path)
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries (namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, "
+            "stored_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS cache_entries_age ON cache_entries (namespace, stored_at)")
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_entries > 0
+
+    def _connection(self):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            self.local.connection = connection
+        return connection
+
+    def get(self, key):
+        if not self.enabled:
+            return None, None
+
+        row = self._connection().execute(
+            "SELECT value FROM cache_entries WHERE namespace = ? AND key = ? AND stored_at > ?",
+            (self.namespace, key, time.time() - self.ttl)
+        ).fetchone()
+        value = None
+        if row is not None:
+            try:
+                value = loads(row[0])
+            except ValueError:
+                self.invalidate(key)
+                row = None
+        with self.lock:
+            if row is None:
+                self.misses += 1
+                return None, None
+            self.hits += 1
+        return value, FRESH
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+
+        connection = self._connection()
+        payload = dumps(value)
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, stored_at) VALUES (?, ?, ?, ?)",
+                (self.namespace, key, payload, time.time())
+            )
+            connection.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND (stored_at <= ? OR key IN "
+                "(SELECT key FROM cache_entries WHERE namespace = ? ORDER BY stored_at DESC LIMIT -1 OFFSET ?))",
+                (self.namespace, time.time() - self.ttl, self.namespace, self.max_entries)
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def invalidate(self, key):
+        self._connection().execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+
+    def clear(self):
+        self._connection().execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+
+    def get_stats(self):
+        entries = self._connection().execute("SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)).fetchone()[0]
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0
+            }